@@ -0,0 +1,191 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2026 Diogo Silva, Frederico Afonso, Tomás Pereira
+
+# ============ Array-backed GeoClaw AMR frame ============================= #
+# ==== Authors: Diogo Silva, Frederico Afonso, Tomás Pereira ============== #
+# ======================================================================== #
+
+# All patches of a frame in one structure-of-arrays buffer: data[f] holds
+# field f (h, hu, hv, eta) of every cell of the frame, patch k being the
+# cells offsets[k]:offsets[k + 1] in (i, j) order. Derived fields (b, u, v,
+# speed) are computed on first use for the whole frame in one vectorized
+# call and kept (u, v, speed, Froude number and momentum flux together, by
+# velocity_fields). Patches are PatchView objects (no arrays of their own)
+# with the same keys as the old per-patch dicts, so grid["h"],
+# grid["level"], grid["x"] ... keep working. Filled by parse_to_VTK.
+
+import numpy as np
+
+STORED = ("h", "hu", "hv", "eta")
+VELOCITY = ("u", "v", "speed", "froude", "flux")
+DERIVED = ("b",) + VELOCITY
+HEADER = ("grid_number", "level", "mx", "my", "dx", "dy")
+DRY_TOLERANCE = 1e-3
+GRAVITY = 9.81
+
+# ========================================= #
+# Derived-field kernel                      #
+# ========================================= #
+def velocity_fields(h, hu, hv, out, dry_tolerance=DRY_TOLERANCE, gravity=GRAVITY):
+
+    # One pass over a patch (or a whole frame) into the preallocated arrays
+    # of out, shaped like h: wet mask, u, v, speed, Froude number and
+    # momentum flux h * speed**2, all zero on dry cells. No temporaries
+    wet = np.greater(h, dry_tolerance, out=out["wet"])
+    u, v, speed, froude, flux = (out[name] for name in VELOCITY)
+
+    u.fill(0.0)
+    v.fill(0.0)
+    froude.fill(0.0)
+    np.divide(hu, h, out=u, where=wet)
+    np.divide(hv, h, out=v, where=wet)
+
+    np.multiply(u, u, out=speed)
+    np.multiply(v, v, out=flux)
+    np.add(speed, flux, out=speed)
+    np.sqrt(speed, out=speed)
+
+    np.multiply(speed, speed, out=flux)
+    np.multiply(h, flux, out=flux)
+
+    # Fr = speed / sqrt(g h)
+    np.multiply(h, gravity, out=froude, where=wet)
+    np.sqrt(froude, out=froude, where=wet)
+    np.divide(speed, froude, out=froude, where=wet)
+
+    return out
+
+class DerivedBuffers:
+
+    # velocity_fields into buffers reused from patch to patch (grown when a
+    # larger patch comes), for the streaming converter. The arrays returned
+    # are overwritten by the next compute()
+    def __init__(self):
+        self._flat = {}
+
+    def compute(self, h, hu, hv):
+        n = h.size
+        if not self._flat or self._flat["u"].size < n or self._flat["u"].dtype != h.dtype:
+            self._flat = {name: np.empty(n, dtype=h.dtype) for name in VELOCITY}
+            self._flat["wet"] = np.empty(n, dtype=bool)
+        out = {name: a[:n].reshape(h.shape) for name, a in self._flat.items()}
+        return velocity_fields(h, hu, hv, out)
+
+# ========================================= #
+# Frame                                     #
+# ========================================= #
+
+class AmrFrame:
+    def __init__(self, headers, data=None, dtype=np.float64):
+
+        # headers: one dict per patch with grid_number, level, mx, my, xlow,
+        # ylow, dx, dy; data: (4, cells) buffer, allocated if not given
+        self.grid_number = np.array([h["grid_number"] for h in headers], dtype=int)
+        self.level = np.array([h["level"] for h in headers], dtype=int)
+        self.mx = np.array([h["mx"] for h in headers], dtype=int)
+        self.my = np.array([h["my"] for h in headers], dtype=int)
+        self.xlow = np.array([h["xlow"] for h in headers], dtype=float)
+        self.ylow = np.array([h["ylow"] for h in headers], dtype=float)
+        self.dx = np.array([h["dx"] for h in headers], dtype=float)
+        self.dy = np.array([h["dy"] for h in headers], dtype=float)
+
+        self.offsets = np.concatenate([[0], np.cumsum(self.mx * self.my)]).astype(int)
+        self.data = np.zeros((len(STORED), self.offsets[-1]), dtype=dtype) if data is None else data
+        self._derived = {}
+
+    @property
+    def cells(self):
+        return int(self.offsets[-1])
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + sum(a.nbytes for a in self._derived.values())
+
+    def __len__(self):
+        return len(self.mx)
+
+    def __getitem__(self, k):
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError(k)
+        return PatchView(self, k)
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield PatchView(self, k)
+
+    def layout(self):
+
+        # Patch geometries in buffer order: frames with the same layout have
+        # every cell at the same offset of the buffer
+        return tuple(zip(self.level.tolist(), self.mx.tolist(), self.my.tolist(), self.xlow.tolist(),
+                         self.ylow.tolist(), self.dx.tolist(), self.dy.tolist()))
+
+    def field(self, name):
+
+        # Whole-frame array of a stored or derived field
+        if name in STORED:
+            return self.data[STORED.index(name)]
+        if name not in self._derived:
+            self._derived[name] = self._derive(name)
+        return self._derived[name]
+
+    def _derive(self, name):
+
+        h = self.field("h")
+        if name == "b":
+            return self.field("eta") - h
+        if name in VELOCITY or name == "wet":
+            out = {key: np.empty_like(h) for key in VELOCITY}
+            out["wet"] = np.empty(h.shape, dtype=bool)
+            velocity_fields(h, self.field("hu"), self.field("hv"), out)
+            self._derived.update(out)
+            return out[name]
+        raise KeyError(name)
+
+    def drop_derived(self):
+        self._derived = {}
+
+    def fill(self, k, values):
+
+        # values: (my, mx, 4) as read (x fastest) -> patch k of the buffer
+        a, b = self.offsets[k], self.offsets[k + 1]
+        mx, my = self.mx[k], self.my[k]
+        for f in range(len(STORED)):
+            self.data[f, a:b].reshape(mx, my)[...] = values[:, :, f].T
+        self._derived = {}
+
+class PatchView:
+    __slots__ = ("frame", "index")
+
+    def __init__(self, frame, index):
+        self.frame = frame
+        self.index = index
+
+    def __getitem__(self, key):
+
+        frame, k = self.frame, self.index
+        if key in STORED or key in DERIVED:
+            a, b = frame.offsets[k], frame.offsets[k + 1]
+            return frame.field(key)[a:b].reshape(frame.mx[k], frame.my[k])
+        if key == "x":
+            return frame.xlow[k] + (np.arange(frame.mx[k]) + 0.5) * frame.dx[k]
+        if key == "y":
+            return frame.ylow[k] + (np.arange(frame.my[k]) + 0.5) * frame.dy[k]
+        if key in HEADER:
+            return getattr(frame, key)[k].item()
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in STORED or key in DERIVED or key in HEADER or key in ("x", "y")
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def keys(self):
+        return HEADER + ("x", "y") + STORED + DERIVED
+
+    def __repr__(self):
+        return (f"PatchView(grid_number={self['grid_number']}, level={self['level']}, "
+                f"mx={self['mx']}, my={self['my']})")
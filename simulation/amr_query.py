@@ -0,0 +1,256 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2026 Diogo Silva, Frederico Afonso, Tomás Pereira
+
+# ============ Transect and region queries on GeoClaw frames ============== #
+# ==== Authors: Diogo Silva, Frederico Afonso, Tomás Pereira ============== #
+# ======================================================================== #
+
+# Point, transect and box queries on the AMR patches of a fort.q frame,
+# without ParaView. Every answer comes from the finest patch covering the
+# location (cell value, as GeoClaw stores cell averages):
+#   - FrameIndex: all patches of one frame, indexed by level and bounding box
+#   - FrameSeries: the same query over every frame of an _output directory,
+#     read lazily one frame at a time. With the byte-offset index
+#     (_output/fort_index.json, built on first use) transect and box queries
+#     only read the patches crossing their bounding box
+#
+#   python amr_query.py _output --transect -9.5 38.65 -9.1 38.70 --n 300
+#   python amr_query.py _output --box -9.6 -9.0 38.5 38.8 --field eta
+
+import argparse
+import numpy as np
+
+from parse_to_VTK import (read_geoclaw_amr, amr_coverage, UNCOVERED, frame_time, fort_q_files,
+                          load_output_index, select_patches)
+
+FIELDS = ("h", "eta", "u", "v")
+DRY_TOLERANCE = 1e-3
+METERS_PER_DEGREE = 111320.0
+
+# ========================================= #
+# One frame                                 #
+# ========================================= #
+class FrameIndex:
+    def __init__(self, grids, time=None):
+
+        # Finest patches first, so the first patch containing a point wins
+        self.grids = sorted(grids, key=lambda g: -g["level"])
+        self.time = time
+
+        g = self.grids
+        self.level = np.array([p["level"] for p in g])
+        self.x0 = np.array([p["x"][0] - 0.5 * p["dx"] for p in g])
+        self.y0 = np.array([p["y"][0] - 0.5 * p["dy"] for p in g])
+        self.dx = np.array([p["dx"] for p in g])
+        self.dy = np.array([p["dy"] for p in g])
+        self.mx = np.array([len(p["x"]) for p in g])
+        self.my = np.array([len(p["y"]) for p in g])
+        self.x1 = self.x0 + self.mx * self.dx
+        self.y1 = self.y0 + self.my * self.dy
+
+        self._coverage = None
+
+    def signature(self):
+
+        # Same signature -> same patch layout, so point locations can be reused
+        return tuple(zip(self.level.tolist(), self.x0.round(9).tolist(), self.y0.round(9).tolist(),
+                         self.mx.tolist(), self.my.tolist()))
+
+    def field(self, k, name):
+
+        # u and v are computed once for the whole AmrFrame
+        return self.grids[k][name]
+
+    def locate(self, x, y):
+
+        # Finest patch and cell (i, j) holding each point, patch -1 outside
+        x, y = np.asarray(x, dtype=float).ravel(), np.asarray(y, dtype=float).ravel()
+        patch = np.full(x.shape, -1)
+        i = np.zeros(x.shape, dtype=int)
+        j = np.zeros(x.shape, dtype=int)
+
+        for k in range(len(self.grids)):
+            free = patch < 0
+            if not free.any():
+                break
+            inside = free & (x >= self.x0[k]) & (x < self.x1[k]) & (y >= self.y0[k]) & (y < self.y1[k])
+            if not inside.any():
+                continue
+            patch[inside] = k
+            i[inside] = np.minimum(((x[inside] - self.x0[k]) / self.dx[k]).astype(int), self.mx[k] - 1)
+            j[inside] = np.minimum(((y[inside] - self.y0[k]) / self.dy[k]).astype(int), self.my[k] - 1)
+
+        return patch, i, j
+
+    def values(self, x, y, fields=FIELDS, location=None):
+
+        # Finest available values at the points (NaN outside the domain)
+        patch, i, j = location if location is not None else self.locate(x, y)
+        out = {name: np.full(patch.shape, np.nan) for name in fields}
+        out["level"] = np.where(patch >= 0, self.level[np.maximum(patch, 0)], 0)
+
+        for k in np.unique(patch[patch >= 0]):
+            sel = patch == k
+            for name in fields:
+                out[name][sel] = self.field(k, name)[i[sel], j[sel]]
+
+        return out
+
+    def transect(self, start, end, n=200, fields=FIELDS, location=None):
+
+        # n points from start to end (lon, lat); s is the distance in metres
+        x = np.linspace(start[0], end[0], n)
+        y = np.linspace(start[1], end[1], n)
+        out = self.values(x, y, fields, location)
+        out["x"], out["y"] = x, y
+        out["s"] = transect_distance(x, y)
+        return out
+
+    def coverage(self):
+
+        if self._coverage is None:
+            self._coverage = [cover < UNCOVERED for cover in amr_coverage(self.grids)]
+        return self._coverage
+
+    def box(self, x0, x1, y0, y1, fields=FIELDS):
+
+        # Every finest-level cell whose centre lies in the box
+        parts = {name: [] for name in ("x", "y", "level", "area") + tuple(fields)}
+        covered = self.coverage()
+
+        for k, p in enumerate(self.grids):
+            if self.x1[k] < x0 or self.x0[k] > x1 or self.y1[k] < y0 or self.y0[k] > y1:
+                continue
+            ix = np.nonzero((p["x"] >= x0) & (p["x"] <= x1))[0]
+            iy = np.nonzero((p["y"] >= y0) & (p["y"] <= y1))[0]
+            if ix.size == 0 or iy.size == 0:
+                continue
+
+            keep = ~covered[k][np.ix_(ix, iy)]
+            X, Y = np.meshgrid(p["x"][ix], p["y"][iy], indexing="ij")
+            parts["x"].append(X[keep])
+            parts["y"].append(Y[keep])
+            parts["level"].append(np.full(keep.sum(), self.level[k]))
+            parts["area"].append(np.full(keep.sum(), self.dx[k] * self.dy[k]))
+            for name in fields:
+                parts[name].append(self.field(k, name)[np.ix_(ix, iy)][keep])
+
+        return {name: np.concatenate(v) if v else np.empty(0) for name, v in parts.items()}
+
+    def box_maximum(self, x0, x1, y0, y1, field="eta", wet_only=True):
+
+        # Largest value in the box and where it is
+        cells = self.box(x0, x1, y0, y1, fields=(field, "h"))
+        values = cells[field]
+        if wet_only:
+            values = np.where(cells["h"] > DRY_TOLERANCE, values, -np.inf)
+        if values.size == 0 or not np.isfinite(values).any():
+            return None
+        k = int(np.argmax(values))
+        return {"value": float(values[k]), "x": float(cells["x"][k]), "y": float(cells["y"][k]),
+                "level": int(cells["level"][k])}
+
+def transect_distance(x, y):
+
+    # Cumulative distance along (lon, lat) points, equirectangular
+    dx = np.diff(x) * np.cos(np.radians(0.5 * (y[1:] + y[:-1])))
+    return np.concatenate([[0.0], np.cumsum(np.hypot(dx, np.diff(y)))]) * METERS_PER_DEGREE
+
+# ========================================= #
+# All frames                                #
+# ========================================= #
+class FrameSeries:
+    def __init__(self, output_dir="_output", indexed=True):
+
+        self.files = fort_q_files(output_dir)
+        self.index = load_output_index(output_dir) if (indexed and self.files) else None
+        if self.index:
+            self.times = np.array([frame["time"] for frame in self.index])
+        else:
+            self.times = np.array([frame_time(f, step) for step, f in enumerate(self.files)])
+
+    def __len__(self):
+        return len(self.files)
+
+    def frame(self, step, bbox=None):
+
+        # bbox [x0, x1, y0, y1]: only the patches crossing it (seek via the index)
+        if bbox is None or self.index is None:
+            return FrameIndex(read_geoclaw_amr(self.files[step]), self.times[step])
+        entries = select_patches(self.index[step]["patches"], bbox)
+        return FrameIndex(read_geoclaw_amr(self.files[step], entries=entries), self.times[step])
+
+    def frames(self, bbox=None):
+
+        # One frame in memory at a time
+        for step in range(len(self.files)):
+            yield self.frame(step, bbox)
+
+    def __iter__(self):
+        return self.frames()
+
+    def transects(self, start, end, n=200, fields=FIELDS):
+
+        # Lazily, frame by frame; point locations are reused while the
+        # patch layout does not change between frames
+        bbox = [min(start[0], end[0]), max(start[0], end[0]), min(start[1], end[1]), max(start[1], end[1])]
+        cache = {}
+        for frame in self.frames(bbox):
+            key = frame.signature()
+            if key not in cache:
+                x = np.linspace(start[0], end[0], n)
+                y = np.linspace(start[1], end[1], n)
+                cache = {key: frame.locate(x, y)}
+            yield frame.time, frame.transect(start, end, n, fields, cache[key])
+
+    def box_maxima(self, x0, x1, y0, y1, field="eta"):
+        for frame in self.frames([x0, x1, y0, y1]):
+            yield frame.time, frame.box_maximum(x0, x1, y0, y1, field)
+
+    def collect(self, results, fields=FIELDS):
+
+        # (times, {field: (frame, point) array}) from a transects() generator
+        times, stacked = [], {name: [] for name in fields}
+        for t, out in results:
+            times.append(t)
+            for name in fields:
+                stacked[name].append(out[name])
+        return np.array(times), {name: np.array(v) for name, v in stacked.items()}
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Transect and box queries on GeoClaw AMR frames")
+    parser.add_argument("output_dir", nargs="?", default="_output")
+    parser.add_argument("--transect", type=float, nargs=4, metavar=("X0", "Y0", "X1", "Y1"))
+    parser.add_argument("--n", type=int, default=200, help="points along the transect")
+    parser.add_argument("--box", type=float, nargs=4, metavar=("X0", "X1", "Y0", "Y1"))
+    parser.add_argument("--field", default="eta", choices=FIELDS)
+    parser.add_argument("--out", default=None, help="transect .npz (default transect.npz)")
+    parser.add_argument("--no-index", action="store_true", help="parse whole frames instead of seeking to patches")
+    args = parser.parse_args(argv)
+
+    series = FrameSeries(args.output_dir, indexed=not args.no_index)
+    if len(series) == 0:
+        print(f"No fort.q files in {args.output_dir}")
+        return 1
+
+    if args.transect:
+        x0, y0, x1, y1 = args.transect
+        times, values = series.collect(series.transects((x0, y0), (x1, y1), args.n))
+        x, y = np.linspace(x0, x1, args.n), np.linspace(y0, y1, args.n)
+        out = args.out or "transect.npz"
+        np.savez_compressed(out, time=times, x=x, y=y, s=transect_distance(x, y), **values)
+        print(f"{len(times)} frames x {args.n} points -> {out}")
+
+    if args.box:
+        print(f"{'time (min)':>10s} {'max ' + args.field:>10s} {'lon':>9s} {'lat':>9s} {'level':>5s}")
+        for t, best in series.box_maxima(*args.box, field=args.field):
+            if best is None:
+                print(f"{t / 60:10.1f} {'-':>10s}")
+            else:
+                print(f"{t / 60:10.1f} {best['value']:10.3f} {best['x']:9.4f} {best['y']:9.4f} {best['level']:5d}")
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
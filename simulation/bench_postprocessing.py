@@ -0,0 +1,266 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2026 Diogo Silva, Frederico Afonso, Tomás Pereira
+
+# ============ Post-processing benchmarks ================================= #
+# ==== Authors: Diogo Silva, Frederico Afonso, Tomás Pereira ============== #
+# ======================================================================== #
+
+# Times the GeoClaw post-processing stages on synthetic frames
+# (synthetic_frames.py) at several sizes:
+#   read        read_geoclaw_amr on every frame
+#   derived     u, v, speed, Froude number and momentum flux of every patch
+#               (DerivedBuffers, as geoclaw_to_vtk; patches read untimed)
+#   derived_masks  the same with the per-patch zeros_like / boolean-mask code
+#               it replaced, as the reference
+#   statistics  write_statistics on every frame (arrays prepared untimed)
+#   vtk         geoclaw_to_vtk (read + .vtr + statistics + .pvd)
+#   max_height  compute_maximum_wave_height (pyclaw reader + interpolation)
+# Every stage runs in a fresh interpreter, so the peak resident memory is its
+# own. One JSON line per (size, stage) is appended to the results file with
+# the commit, wall time, AMR cells per second and peak memory, and each run
+# is compared with the last one from another commit.
+#
+#   python bench_postprocessing.py                       # small and medium
+#   python bench_postprocessing.py --sizes small medium large --stages read vtk
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SIZES = {
+    "small": {"frames": 3, "mx": 60, "my": 40, "ratios": [3, 3, 2], "patches": [2, 2, 2], "patch_cells": 30},
+    "medium": {"frames": 4, "mx": 150, "my": 100, "ratios": [3, 3, 2], "patches": [4, 4, 3], "patch_cells": 60},
+    "large": {"frames": 4, "mx": 300, "my": 200, "ratios": [3, 3, 2], "patches": [8, 8, 6], "patch_cells": 90},
+}
+STAGES = ("read", "derived", "derived_masks", "statistics", "vtk", "max_height")
+
+HERE = Path(__file__).resolve().parent
+
+# ========================================= #
+# Synthetic data                            #
+# ========================================= #
+def prepare(bench_dir, size, regenerate=False):
+
+    # Frames are kept between runs while the generator settings are the same
+    from synthetic_frames import write_frames
+
+    data_dir = Path(bench_dir) / size
+    output_dir = data_dir / "_output"
+    settings = data_dir / "synthetic.json"
+    params = SIZES[size]
+
+    if not regenerate and settings.exists():
+        with open(settings) as f:
+            info = json.load(f)
+        if info["params"] == params and any(output_dir.glob("fort.q*")):
+            return output_dir, info
+
+    print(f"Writing {size} synthetic frames ...")
+    info = {"params": params, **write_frames(output_dir, **params)}
+    with open(settings, "w") as f:
+        json.dump(info, f, indent=2)
+
+    return output_dir, info
+
+# ========================================= #
+# Stages (run in the child interpreter)     #
+# ========================================= #
+def fort_files(output_dir):
+    return sorted(f for f in Path(output_dir).glob("fort.q*") if f.name[6:].isdigit())
+
+def stage_read(output_dir, options):
+
+    from parse_to_VTK import read_geoclaw_amr
+
+    t0 = time.perf_counter()
+    cells = sum(read_geoclaw_amr(f).cells for f in fort_files(output_dir))
+    return time.perf_counter() - t0, cells
+
+def stage_derived(output_dir, options):
+
+    from amr_frame import DerivedBuffers
+    from parse_to_VTK import read_geoclaw_amr
+
+    frames = [read_geoclaw_amr(f) for f in fort_files(output_dir)]
+    t0 = time.perf_counter()
+    derived = DerivedBuffers()
+    for frame in frames:
+        for g in frame:
+            derived.compute(g["h"], g["hu"], g["hv"])
+    return time.perf_counter() - t0, sum(frame.cells for frame in frames)
+
+def stage_derived_masks(output_dir, options):
+
+    import numpy as np
+    from parse_to_VTK import read_geoclaw_amr
+
+    frames = [read_geoclaw_amr(f) for f in fort_files(output_dir)]
+    t0 = time.perf_counter()
+    for frame in frames:
+        for g in frame:
+            h, hu, hv = g["h"], g["hu"], g["hv"]
+            u = np.zeros_like(h)
+            v = np.zeros_like(h)
+            wet = h > 1.0e-3
+            u[wet] = hu[wet] / h[wet]
+            v[wet] = hv[wet] / h[wet]
+            vel_mag = np.sqrt(u**2 + v**2)
+            flux = (h * (vel_mag**2))[wet]
+            froude = np.zeros_like(h)
+            froude[wet] = vel_mag[wet] / np.sqrt(9.81 * h[wet])
+    return time.perf_counter() - t0, sum(frame.cells for frame in frames)
+
+def stage_statistics(output_dir, options):
+
+    from parse_to_VTK import read_geoclaw_amr, write_statistics
+
+    frames = []
+    for step, f in enumerate(fort_files(output_dir)):
+        frame = read_geoclaw_amr(f)
+        frames.append((frame.field("h"), frame.field("b"), frame.field("eta"), frame.field("speed"),
+                       frame.field("u"), frame.field("v"), frame[-1]["dx"], frame[-1]["dy"], step, 300.0 * step))
+
+    with tempfile.TemporaryDirectory() as stats_dir:
+        t0 = time.perf_counter()
+        for args in frames:
+            write_statistics(stats_dir, *args)
+        elapsed = time.perf_counter() - t0
+
+    return elapsed, sum(frame[0].size for frame in frames)
+
+def stage_vtk(output_dir, options):
+
+    from parse_to_VTK import geoclaw_to_vtk, read_geoclaw_amr
+
+    cells = sum(read_geoclaw_amr(f).cells for f in fort_files(output_dir))
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            geoclaw_to_vtk(os.path.join(tmp, "_stats"), str(output_dir), os.path.join(tmp, "_vtk"))
+        elapsed = time.perf_counter() - t0
+
+    return elapsed, cells
+
+def stage_max_height(output_dir, options):
+
+    from extract_results import compute_maximum_wave_height
+    from parse_to_VTK import read_geoclaw_amr
+
+    cells = sum(read_geoclaw_amr(f).cells for f in fort_files(output_dir))
+    t0 = time.perf_counter()
+    compute_maximum_wave_height(str(output_dir), resolution=options.get("resolution", 1000))
+    return time.perf_counter() - t0, cells
+
+def run_stage(stage, output_dir, options):
+
+    # Child side: peak RSS of this interpreter (kB on Linux, bytes on macOS)
+    sys.path.insert(0, str(HERE))
+    elapsed, cells = globals()["stage_" + stage](output_dir, options)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+    print(json.dumps({"seconds": elapsed, "cells": cells, "peak_memory_mb": peak_mb}))
+
+# ========================================= #
+# Driver                                    #
+# ========================================= #
+def git_commit():
+
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                             capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=HERE,
+                               capture_output=True, text=True).stdout.strip()
+        return out.stdout.strip() + ("+dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def measure(stage, output_dir, options, repeats=1):
+
+    # Best of the repeats, each in a fresh interpreter
+    best = None
+    for _ in range(repeats):
+        proc = subprocess.run([sys.executable, str(Path(__file__).resolve()),
+                               "--child", stage, "--data", str(output_dir), "--options", json.dumps(options)],
+                              capture_output=True, text=True, cwd=HERE)
+        if proc.returncode != 0:
+            lines = proc.stderr.strip().splitlines()
+            return {"error": lines[-1] if lines else "failed"}
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    return best
+
+def previous_results(path):
+
+    if not path.exists():
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Benchmark the GeoClaw post-processing on synthetic frames")
+    parser.add_argument("--sizes", nargs="+", default=["small", "medium"], choices=list(SIZES))
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=STAGES)
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--resolution", type=int, default=1000, help="max_height grid (as extract_results)")
+    parser.add_argument("--bench-dir", default=str(HERE / "_bench"))
+    parser.add_argument("--results", default=None, help="JSON lines file (default <bench-dir>/results.jsonl)")
+    parser.add_argument("--regenerate", action="store_true", help="rewrite the synthetic frames")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--data", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--options", default="{}", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_stage(args.child, args.data, json.loads(args.options))
+        return 0
+
+    results_path = Path(args.results or Path(args.bench_dir) / "results.jsonl")
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    history = previous_results(results_path)
+    commit = git_commit()
+    options = {"resolution": args.resolution}
+
+    print(f"{'size':8s} {'stage':14s} {'cells':>10s} {'time (s)':>9s} {'Mcells/s':>9s} {'peak MB':>8s}  vs previous commit")
+    failed = False
+    with open(results_path, "a") as out:
+        for size in args.sizes:
+            output_dir, info = prepare(args.bench_dir, size, args.regenerate)
+            for stage in args.stages:
+                result = measure(stage, output_dir, options, args.repeats)
+                if "error" in result:
+                    print(f"{size:8s} {stage:14s} FAILED: {result['error']}")
+                    failed = True
+                    continue
+
+                record = {"date": time.strftime("%Y-%m-%d %H:%M:%S"), "commit": commit, "size": size,
+                          "stage": stage, "frames": info["frames"], "patches": info["patches"],
+                          "cells": result["cells"], "seconds": result["seconds"],
+                          "cells_per_second": result["cells"] / result["seconds"],
+                          "peak_memory_mb": result["peak_memory_mb"], "options": options,
+                          "python": platform.python_version()}
+                out.write(json.dumps(record) + "\n")
+
+                before = [r for r in history if r["size"] == size and r["stage"] == stage and r["commit"] != commit]
+                change = ""
+                if before:
+                    change = f"x{before[-1]['seconds'] / record['seconds']:.2f} speed vs {before[-1]['commit']}"
+
+                print(f"{size:8s} {stage:14s} {record['cells']:10d} {record['seconds']:9.3f} "
+                      f"{record['cells_per_second'] / 1e6:9.3f} {record['peak_memory_mb']:8.1f}  {change}")
+
+    print(f"Results appended to {results_path}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,212 +5,68 @@
 # ==== Authors: Diogo Silva, Frederico Afonso, Tomás Pereira ============== #
 # ======================================================================== #
 
+import argparse
+import os
+import sys
 from clawpack.geoclaw import dtopotools
 import numpy as np
-import matplotlib.pyplot as plt
-import scienceplots
 
-# =========================== #
-#   Make topology of seabed    #
-# =========================== #
+# Faults (hsf_fault, mpf_fault) are defined in fault_model
+from fault_model import load_fault, subfault_table, subfaults_from_table, static_dz, seismic_moment, moment_magnitude
 
-# ====================================== #
-#  Elsevier plotting configurations      #
-# ====================================== #
-
-width_inch = 190 / 25.4
-height_inch = width_inch * 0.5
-
-plt.rcParams.update({
-    "figure.figsize": (width_inch, height_inch),
-    "font.size": 10,
-    "axes.labelsize": 11,
-    "xtick.labelsize": 8,
-    "ytick.labelsize": 8,
-    "legend.fontsize": 10,
-    "savefig.dpi": 600,
-    "figure.autolayout": True
-})
-
-hsf_fault = {
-    "longitude": -9.91,
-    "latitude": 35.74,
-    "rake": 90,
-    "length": 165000.0,
-    "width": 70000.0,
-    "dip": 35,
-    "slip": 10.7,
-    "strike": 42.1,
-    "depth": 4000.0,
-    "subfaults": [
-        {"slip": 8.5, "offset": -55000.0},
-        {"slip": 10.7, "offset": 0.0},
-        {"slip": 9.2, "offset": 55000.0}
-    ]
-}
-
-mpf_fault = {
-    "longitude": -9.89,
-    "latitude": 36.57,
-    "rake": 90,
-    "length": 129000.0,
-    "width": 70000.0,
-    "dip": 35,
-    "slip": 8.0,
-    "strike": 20.0,
-    "depth": 4000.0,
-    "subfaults": [
-        {"slip": 6.5, "offset": -43000.0},
-        {"slip": 8.0, "offset": 0.0},
-        {"slip": 7.0, "offset": 43000.0}
-    ]
-}
-
-# List of default faults that can be selected
-faults = [(hsf_fault, "hsf"), (mpf_fault, "mpf")]
+# Default outputs, relative to the repository (not to the working directory)
+REPO = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+TOPO_DIR = os.path.join(REPO, "data", "topology")
+VALIDATION_DIR = os.path.join(REPO, "plots", "validation")
 
 # ======================= #
 # Build topology function #
 # ======================= #
 # It's important to choose an arc-minutes resolution for the grid #
 
-def build_topology(fault_params, fault_name):
-
-    # Fault configuration with multiple subfaults
-    fault1 = dtopotools.Fault()
-
-    subfaults_list = []
-    segment_length = fault_params['length'] / len(fault_params['subfaults'])
+def build_topology(fault_params, fault_name, plots=True, topo_dir=TOPO_DIR, stats_dir=VALIDATION_DIR):
 
-    for i, subfault_data in enumerate(fault_params['subfaults']):
-        sub = dtopotools.SubFault()
-        sub.strike = fault_params['strike']
-        sub.length = segment_length
-        sub.width = fault_params['width']
-        sub.depth = fault_params['depth']
-        sub.slip = subfault_data['slip']
-        sub.rake = fault_params['rake']
-        sub.dip = fault_params['dip']
+    # Fault configuration with multiple subfaults, placed from the subfault table
+    table = subfault_table(fault_params)
 
-        # Calculate position along strike
-        strike_rad = np.radians(sub.strike)
-        offset = subfault_data['offset']
-        cos_lat = np.cos(np.radians(fault_params['latitude']))
-
-        dx = offset * np.sin(strike_rad) / (111000.0 * cos_lat)
-        dy = offset * np.cos(strike_rad) / 111000.0
-
-        sub.longitude = fault_params['longitude'] + dx
-        sub.latitude = fault_params['latitude'] + dy
-        sub.coordinate_specification = 'top center'
-
-        subfaults_list.append(sub)
-
-    fault1.subfaults = subfaults_list
+    fault1 = dtopotools.Fault()
+    fault1.subfaults = subfaults_from_table(table, dtopotools)
     fault1.rupture_type = "static"
 
     # Resolution of 300*200
     x = np.linspace(-12, -6, 300)
     y = np.linspace(34, 40, 200)
     time_rupture = [0., 1.]
-    fault1.create_dtopography(x, y, time_rupture, verbose=True)
+
+    # Okada deformation, vectorized over the grid points, summed over subfaults
+    dtopo = dtopotools.DTopography()
+    dtopo.x = x
+    dtopo.y = y
+    dtopo.X, dtopo.Y = np.meshgrid(x, y)
+    dtopo.times = np.array(time_rupture)
+    dtopo.dZ = static_dz(table, x, y, time_rupture)
+    fault1.dtopo = dtopo
 
     # Topology file
-    dtopo = fault1.dtopo
+    os.makedirs(topo_dir, exist_ok=True)
     topo_name = "topo_lisbon1755_" + fault_name + ".tt3"
-    dtopo.write(f"../data/topology/{topo_name}", dtopo_type=3)
+    dtopo.write(os.path.join(topo_dir, topo_name), dtopo_type=3)
     print("Created a file with topologic deformation\n")
 
-    # Plotting
-    plotting_topological(fault1, dtopo, x, y, fault_name, fault_params)
-
-# ========================================= #
-# All of this pictures are used on the report
-# ========================================= #
-def plotting_topological(fault, dtopo, x, y, fault_name, fault_params):
-
-    plt.style.use(['science', 'no-latex'])
-
-    # 1. Plot - Deformation Contour lines (2D)
-    fig, ax = plt.subplots(figsize=(width_inch, height_inch))
-
+    # Seismic statistics are always written, the figures only on request
     dz = dtopo.dZ[-1,:,:]
+    validation_stats(dtopo, dz, x, y, fault_params, fault_name, stats_dir)
 
-    # Levels
-    v_max = np.max(dz)
-    v_min = np.min(dz)
-    v_limit = max(abs(v_max), abs(v_min))
-    v_limit = np.ceil(v_limit) if v_limit > 0 else 1
-    levels = np.linspace(-v_limit, v_limit, 21)
-
-    im = ax.contourf(x, y, dz, levels=levels, cmap='RdBu_r', extend='both')
-
-    ax.contour(x, y, dz, levels=np.linspace(0.1, v_limit, 10), colors='black', linestyles='dashed',  linewidths=0.4, alpha=0.8)
-
-    ax.contour(x, y, dz, levels=np.linspace(-v_limit, -0.05, 5), colors='blue', linestyles='dashed', linewidths=0.4, alpha=0.8)
-
-    ax.set_facecolor('#fdfdfd')
-
-    cbar = fig.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
-    cbar.set_label('Deformation (m)')
-    cbar.set_ticks([-v_limit, -v_limit/2, 0, v_limit/2, v_limit])
-
-    ax.set_xlabel(r'Longitude ($^\circ$)')
-    ax.set_ylabel(r'Latitude ($^\circ$)')
-
-    ax.grid(True, linestyle=':', alpha=0.4)
-    ax.set_aspect('equal')
-
-    plot_name = "fault_deformation_" + fault_name + ".pdf"
-    plt.savefig(f"../plots/fault_deformation/{plot_name}", bbox_inches='tight')
-    plt.close()
-
-    # 2. Plot the contours on a 3D surface
-    X, Y = np.meshgrid(x, y)
-
-    fig = plt.figure(figsize=(width_inch, height_inch))
-    ax = fig.add_subplot(111, projection='3d')
-
-    levels_pos = np.linspace(0.1, v_limit, 10)
-    levels_neg = np.linspace(-v_limit, -0.05, 5)
-
-    for level in levels_pos:
-        ax.contour(X, Y, dz, levels=[level], colors='red', linewidths=1.5, alpha=0.8)
-
-    for level in levels_neg:
-        ax.contour(X, Y, dz, levels=[level], colors='blue', linewidths=1.5, alpha=0.8)
-
-    ax.contour(X, Y, dz, levels=[0], colors='black', linewidths=2.5)
-    ax.plot_surface(X, Y, np.zeros_like(dz), alpha=0.1, color='gray')
-
-    ax.set_xlabel('Longitude (°)', fontsize = 9)
-    ax.set_ylabel('Latitude (°)', fontsize = 9)
-    ax.set_zlabel('Deformation (m)', fontsize =9)
-    ax.zaxis.label.set_rotation(90)
-    ax.set_box_aspect(None, zoom=0.7)
-    ax.grid(True, linestyle=':', alpha=0.4)
-
-    import matplotlib.patches as mpatches
-
-    red_patch = mpatches.Patch(color='red', alpha=0.6,   label='Uplift')
-    blue_patch = mpatches.Patch(color='blue', alpha=0.6, label='Subsidence')
-    black_patch = mpatches.Patch(color='black', alpha=0.6, label='Zero deformation')
-
-    ax.legend(handles=[red_patch, blue_patch, black_patch], loc='upper right', fontsize = 8)
-    ax.view_init(elev=25, azim=135)
-
-    plot_name = "fault_deformation_3D_" + fault_name + ".pdf"
-    plt.savefig(f"../plots/fault_deformation/{plot_name}", bbox_inches='tight')
-    plt.close()
-
-    # 3. Validation statistics
-    validation_stats(dtopo, dz, x, y, fault_params, fault_name)
+    if plots:
+        from plotting import plotting_topological
+        plotting_topological(fault1, dtopo, x, y, fault_name, fault_params)
 
+    return dtopo
 
 # ========================================= #
 # Validation statistics                     #
 # ========================================= #
-def validation_stats(dtopo, dz, x, y, fault_params, fault_name):
+def validation_stats(dtopo, dz, x, y, fault_params, fault_name, stats_dir=VALIDATION_DIR):
 
     # 0. Save seismic statistics into a file (<fault_<name>>.txt)
 
@@ -223,19 +79,12 @@ def validation_stats(dtopo, dz, x, y, fault_params, fault_name):
     if max_subsidience > 0:
         max_subsidience = 0
 
-    rigidity = 3e10
-    total_moment = 0
-
-    for subfault_data  in fault_params["subfaults"]:
-        segment_length = fault_params['length'] / len(fault_params['subfaults'])
-        area = segment_length * fault_params['width']
-        slip = subfault_data['slip']
-        total_moment += rigidity * area * slip
-
-    M0 = total_moment
-    Mw = (2/3) * np.log10(M0) - 6.07
+    table = subfault_table(fault_params)
+    M0 = seismic_moment(table)
+    Mw = moment_magnitude(M0)
 
-    file_stats = f"../plots/validation/fault_{fault_name}.txt"
+    os.makedirs(stats_dir, exist_ok=True)
+    file_stats = os.path.join(stats_dir, f"fault_{fault_name}.txt")
     with open(file_stats, "w") as f:
 
         f.write(f"##########################################################\n")
@@ -245,100 +94,40 @@ def validation_stats(dtopo, dz, x, y, fault_params, fault_name):
         f.write(f"# max_subsidience: {max_subsidience}\n")
         f.write(f"# total_moment (M0): {M0}\n")
         f.write(f"# Magnitude (Mw): {Mw}\n")
+        f.write(f"# subfaults: {len(table['slip'])}\n")
 
+    return {"max_uplift": max_uplift, "max_subsidience": max_subsidience, "M0": M0, "Mw": Mw}
 
-    # 1. Histogram
-    fig, ax = plt.subplots(figsize=(width_inch, height_inch))
-
-    n, bins, patches_hist = ax.hist(dz.flatten(), bins=50,
-                                      color='blue',
-                                      edgecolor='black',
-                                      linewidth=0.8,
-                                      alpha=0.2)
-
-
-    ax.set_xlabel('Deformation (m)')
-    ax.set_ylabel('Frequency')
-    ax.set_title('Deformation Distribution')
-    ax.grid(True, linestyle=':', alpha=0.3, axis='y')
-
-    plt.savefig(f"../plots/validation/histogram_{fault_name}.pdf", bbox_inches='tight')
-    plt.close()
-
-    # 2. E-W Profile
-    fig, ax = plt.subplots(figsize=(width_inch, height_inch))
-
-    mid_lat = dz.shape[0] // 2
-    ax.plot(x, dz[mid_lat, :], 'b-', linewidth=1.5, label='E-W Profile')
-    ax.axhline(0, color='k', linestyle='--', linewidth=0.8, alpha=0.5)
-    ax.fill_between(x, 0, dz[mid_lat, :], where=(dz[mid_lat, :] > 0),
-                     color='red', alpha=0.2, label='Uplift')
-    ax.fill_between(x, 0, dz[mid_lat, :], where=(dz[mid_lat, :] < 0),
-                     color='blue', alpha=0.2, label='Subsidence')
-
-    ax.set_xlabel(r'Longitude ($^\circ$)')
-    ax.set_ylabel('Deformation (m)')
-    ax.set_title('East-West Profile')
-    ax.grid(True, linestyle=':', alpha=0.3)
-    ax.legend(loc='best', framealpha=0.9)
-
-    plt.savefig(f"../plots/validation/profile_ew_{fault_name}.pdf", bbox_inches='tight')
-    plt.close()
-
-    # 3. N-S Profile
-    fig, ax = plt.subplots(figsize=(width_inch, height_inch))
-
-    mid_lon = dz.shape[1] // 2
-    ax.plot(y, dz[:, mid_lon], 'r-', linewidth=1.5, label='N-S Profile')
-    ax.axhline(0, color='k', linestyle='--', linewidth=0.8, alpha=0.5)
-    ax.fill_between(y, 0, dz[:, mid_lon], where=(dz[:, mid_lon] > 0),
-                     color='red', alpha=0.2, label='Uplift')
-    ax.fill_between(y, 0, dz[:, mid_lon], where=(dz[:, mid_lon] < 0),
-                     color='blue', alpha=0.2, label='Subsidence')
-
-    ax.set_xlabel(r'Latitude ($^\circ$)')
-    ax.set_ylabel('Deformation (m)')
-    ax.set_title('North-South Profile')
-    ax.grid(True, linestyle=':', alpha=0.3)
-    ax.legend(loc='best', framealpha=0.9)
-
-    plt.savefig(f"../plots/validation/profile_ns_{fault_name}.pdf", bbox_inches='tight')
-    plt.close()
-
-
-
-# ============================= #
 # ============================= #
-# Menu - Choose Fault Topology  #
+# Command line                  #
 # ============================= #
-# 1. Horshe-Shoe Fault - Normally goes more in accord with the
-# reports of magnitude          #
-# 2. MPF - Marques de Pombal    #
+# hsf - Horse-Shoe Fault (normally more in accord with the
+#       reports of magnitude)
+# mpf - Marques de Pombal Fault
+# or a JSON file with the same keys as the faults in fault_model
 # ============================= #
 
-while True:
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Build the GeoClaw seabed deformation (dtopo) for a fault")
+    parser.add_argument("--fault", nargs="+", default=["hsf"],
+                        help="hsf, mpf or a fault .json file (several may be given)")
+    parser.add_argument("--no-plots", action="store_true", help="only write the .tt3 and statistics files")
+    parser.add_argument("--topo-dir", default=TOPO_DIR, help="directory of the .tt3 files")
+    parser.add_argument("--stats-dir", default=VALIDATION_DIR, help="directory of the fault_<name>.txt statistics")
+    args = parser.parse_args(argv)
 
-    # Menu Header
-    print("============================================\n")
-    print("                                            \n")
-    print("               Choose Topology              \n")
-    print("                                            \n")
-    print("             1. Horse-Shoe Fault            \n")
-    print("             2. Marques de Pombal Fault     \n")
-    print("             3. Exit Menu                   \n")
-    print("                                            \n")
-    print("============================================\n")
+    for spec in args.fault:
+        try:
+            fault_params, fault_name = load_fault(spec)
+        except (ValueError, OSError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
 
-    # Menu question
-    try:
-        user_input = input("Insert topology you want: ")
-        topo = int(user_input)
-    except ValueError:
-        print("Insert a valid number, considering the options available\n")
-        continue
+        build_topology(fault_params, fault_name, plots=not args.no_plots, topo_dir=args.topo_dir,
+                       stats_dir=args.stats_dir)
 
-    if topo == 3:
-        break
+    return 0
 
-    if 1 <= topo <= len(faults):
-        build_topology(*faults[topo - 1])
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,305 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2026 Diogo Silva, Frederico Afonso, Tomás Pereira
+
+# ============ Tiled multi-resolution pyramid for browsing =============== #
+# ==== Authors: Diogo Silva, Frederico Afonso, Tomás Pereira ============== #
+# ======================================================================== #
+
+# Writes <tile_dir>/<z>/<x>/<y>.npy (and optionally .png) tiles of a fixed
+# size plus a metadata.json. Zoom 0 is a single tile covering the union of
+# all sources, every deeper zoom halves the cell size. Tile (x, y) counts
+# from the north-west corner, as in the usual web map z/x/y scheme.
+#
+# A source only contributes down to the zoom that matches its own
+# resolution, so the fine Lisbon grid produces deep tiles while the Gulf
+# of Cadiz stops at its native zoom. Missing tiles are filled by the viewer
+# from the nearest ancestor (load_tiles).
+
+import argparse
+import json
+import os
+import numpy as np
+
+TILE_SIZE = 256
+
+# ========================================= #
+# Sources                                   #
+# ========================================= #
+# A source is a regular lon/lat grid with values[lat, lon], lats ascending
+
+def make_source(lons, lats, values, name=""):
+
+    values = np.ma.filled(np.ma.asarray(values, dtype=float), np.nan)
+
+    return {
+        "name": name,
+        "lons": np.asarray(lons, dtype=float),
+        "lats": np.asarray(lats, dtype=float),
+        "values": values,
+        "dx": abs(float(lons[1] - lons[0])),
+        "dy": abs(float(lats[1] - lats[0])),
+    }
+
+def source_bounds(src):
+
+    return (src["lons"][0] - src["dx"] / 2, src["lons"][-1] + src["dx"] / 2,
+            src["lats"][0] - src["dy"] / 2, src["lats"][-1] + src["dy"] / 2)
+
+def bathymetry_sources(gebco_path="../data/GEBCO_data/"):
+
+    from parse_NETCDF4 import read_gebco_region, regions
+
+    sources = []
+    for name, coords in regions:
+        region = read_gebco_region(os.path.join(gebco_path, f"gebco_{name}_data.nc"), coords)
+        if region is not None:
+            sources.append(make_source(*region, name=name))
+
+    return sources
+
+def max_wave_height_sources(output_dir="_output", resolution=1000):
+
+    from extract_results import compute_maximum_wave_height
+
+    result = compute_maximum_wave_height(output_dir, resolution=resolution)
+    if result is None:
+        return []
+
+    lon_fixed, lat_fixed, max_eta_global = result
+    return [make_source(lon_fixed, lat_fixed, max_eta_global, name="max_wave_height")]
+
+# ========================================= #
+# Rasterize sources on one zoom level       #
+# ========================================= #
+def rasterize_source(src, lon0, lat1, cell, col0, row0, shape, reduce="mean"):
+
+    ny, nx = shape
+
+    # Level cell of every source row/column (rows count from the north)
+    cols = np.floor((src["lons"] - lon0) / cell).astype(np.int64) - col0
+    rows = np.floor((lat1 - src["lats"]) / cell).astype(np.int64) - row0
+
+    keep_c = (cols >= 0) & (cols < nx)
+    keep_r = (rows >= 0) & (rows < ny)
+    values = src["values"][np.ix_(keep_r, keep_c)]
+    flat = (rows[keep_r][:, None] * nx + cols[keep_c][None, :]).ravel()
+    values = values.ravel()
+
+    finite = np.isfinite(values)
+    flat, values = flat[finite], values[finite]
+
+    if reduce == "max":
+        out = np.full(ny * nx, -np.inf)
+        np.maximum.at(out, flat, values)
+        out[np.isneginf(out)] = np.nan
+    else:
+        total = np.bincount(flat, weights=values, minlength=ny * nx)
+        count = np.bincount(flat, minlength=ny * nx)
+        out = np.full(ny * nx, np.nan)
+        np.divide(total, count, out=out, where=count > 0)
+
+    out = out.reshape(ny, nx)
+
+    # Cells finer than the source receive no sample: take the nearest one
+    lon_c = lon0 + (col0 + np.arange(nx) + 0.5) * cell
+    lat_c = lat1 - (row0 + np.arange(ny) + 0.5) * cell
+    west, east, south, north = source_bounds(src)
+    inside = ((lat_c >= south) & (lat_c <= north))[:, None] & ((lon_c >= west) & (lon_c <= east))[None, :]
+    holes = inside & np.isnan(out)
+
+    if np.any(holes):
+        ci = np.clip(np.rint((lon_c - src["lons"][0]) / src["dx"]).astype(np.int64), 0, len(src["lons"]) - 1)
+        ri = np.clip(np.rint((lat_c - src["lats"][0]) / src["dy"]).astype(np.int64), 0, len(src["lats"]) - 1)
+        hr, hc = np.nonzero(holes)
+        out[hr, hc] = src["values"][ri[hr], ci[hc]]
+
+    return out
+
+# ========================================= #
+# Build the pyramid                         #
+# ========================================= #
+def build_pyramid(sources, tile_dir, tile_size=TILE_SIZE, reduce="mean",
+                  png=False, cmap="viridis", vmin=None, vmax=None):
+
+    if not sources:
+        print("No sources to tile.")
+        return None
+
+    bounds = np.array([source_bounds(s) for s in sources])
+    lon0, lon1 = bounds[:, 0].min(), bounds[:, 1].max()
+    lat0, lat1 = bounds[:, 2].min(), bounds[:, 3].max()
+
+    cell0 = max(lon1 - lon0, lat1 - lat0) / tile_size
+    finest = min(min(s["dx"], s["dy"]) for s in sources)
+
+    def native_zoom(res):
+        return max(0, int(np.ceil(np.log2(cell0 / res) - 1e-6)))
+
+    max_zoom = native_zoom(finest)
+
+    # Coarse sources are painted first so finer ones win where they overlap
+    sources = sorted(sources, key=lambda s: -min(s["dx"], s["dy"]))
+
+    finite = np.concatenate([s["values"][np.isfinite(s["values"])] for s in sources])
+    vmin = float(finite.min()) if vmin is None else vmin
+    vmax = float(finite.max()) if vmax is None else vmax
+
+    if png:
+        import matplotlib.pyplot as plt
+        colormap = plt.get_cmap(cmap)
+
+    meta = {
+        "bounds": [float(lon0), float(lon1), float(lat0), float(lat1)],
+        "tile_size": tile_size,
+        "min_zoom": 0,
+        "max_zoom": max_zoom,
+        "reduce": reduce,
+        "vmin": vmin,
+        "vmax": vmax,
+        "png": png,
+        "sources": [s["name"] for s in sources],
+        "levels": {},
+    }
+
+    for z in range(max_zoom + 1):
+        cell = cell0 / 2**z
+        active = [s for s in sources if native_zoom(min(s["dx"], s["dy"])) >= z]
+
+        # Window of whole tiles covering every source active at this zoom
+        act = np.array([source_bounds(s) for s in active])
+        tx0 = int(np.floor((act[:, 0].min() - lon0) / cell / tile_size))
+        tx1 = int(np.ceil((act[:, 1].max() - lon0) / cell / tile_size))
+        ty0 = int(np.floor((lat1 - act[:, 3].max()) / cell / tile_size))
+        ty1 = int(np.ceil((lat1 - act[:, 2].min()) / cell / tile_size))
+
+        shape = ((ty1 - ty0) * tile_size, (tx1 - tx0) * tile_size)
+        raster = np.full(shape, np.nan)
+
+        for src in active:
+            layer = rasterize_source(src, lon0, lat1, cell, tx0 * tile_size, ty0 * tile_size, shape, reduce)
+            raster = np.where(np.isnan(layer), raster, layer)
+
+        tiles = []
+        for ty in range(ty0, ty1):
+            for tx in range(tx0, tx1):
+                r = (ty - ty0) * tile_size
+                c = (tx - tx0) * tile_size
+                tile = raster[r:r + tile_size, c:c + tile_size]
+                if np.all(np.isnan(tile)):
+                    continue
+
+                tile_path = os.path.join(tile_dir, str(z), str(tx))
+                os.makedirs(tile_path, exist_ok=True)
+                np.save(os.path.join(tile_path, f"{ty}.npy"), tile.astype(np.float32))
+
+                if png:
+                    plt.imsave(os.path.join(tile_path, f"{ty}.png"),
+                               np.ma.masked_invalid(tile), cmap=colormap, vmin=vmin, vmax=vmax)
+
+                tiles.append([tx, ty])
+
+        meta["levels"][str(z)] = {"cell_size": cell, "tiles": tiles}
+        print(f"Zoom {z}: {len(tiles)} tiles, cell {cell:.6f} deg")
+
+    with open(os.path.join(tile_dir, "metadata.json"), "w") as f:
+        json.dump(meta, f, indent=1)
+
+    return meta
+
+# ========================================= #
+# Viewer side: load only the visible tiles  #
+# ========================================= #
+def read_metadata(tile_dir):
+
+    with open(os.path.join(tile_dir, "metadata.json")) as f:
+        return json.load(f)
+
+def zoom_for_extent(meta, extent, pixels):
+
+    lon_min, lon_max, lat_min, lat_max = extent
+    span = max(lon_max - lon_min, lat_max - lat_min)
+    cell0 = meta["levels"]["0"]["cell_size"]
+
+    # Smallest zoom whose cells are not larger than one screen pixel
+    z = int(np.ceil(np.log2(cell0 * pixels / span))) if span > 0 else meta["max_zoom"]
+    return int(np.clip(z, 0, meta["max_zoom"]))
+
+def _read_tile(tile_dir, meta, z, tx, ty):
+
+    # Walk up the pyramid and fill whatever the finer tiles leave empty
+    # (outside a fine source, or no tile at all) from upsampled ancestors
+    tile_size = meta["tile_size"]
+    out = None
+
+    for up in range(z + 1):
+        path = os.path.join(tile_dir, str(z - up), str(tx >> up), f"{ty >> up}.npy")
+        if not os.path.exists(path):
+            continue
+
+        tile = np.load(path, mmap_mode="r")
+        if up > 0:
+            size = tile_size >> up
+            r = (ty - ((ty >> up) << up)) * size
+            c = (tx - ((tx >> up) << up)) * size
+            block = tile[r:r + size, c:c + size]
+            tile = np.repeat(np.repeat(block, 1 << up, axis=0), 1 << up, axis=1)
+
+        if out is None:
+            out = np.array(tile)
+        else:
+            holes = np.isnan(out)
+            out[holes] = tile[holes]
+
+        if not np.any(np.isnan(out)):
+            break
+
+    return out
+
+def load_tiles(tile_dir, z, extent, meta=None):
+
+    meta = read_metadata(tile_dir) if meta is None else meta
+    lon0, _, _, lat1 = meta["bounds"]
+    tile_size = meta["tile_size"]
+    cell = meta["levels"]["0"]["cell_size"] / 2**z
+    span = cell * tile_size
+
+    lon_min, lon_max, lat_min, lat_max = extent
+    tx0 = int(np.floor((lon_min - lon0) / span))
+    tx1 = int(np.ceil((lon_max - lon0) / span))
+    ty0 = int(np.floor((lat1 - lat_max) / span))
+    ty1 = int(np.ceil((lat1 - lat_min) / span))
+
+    mosaic = np.full(((ty1 - ty0) * tile_size, (tx1 - tx0) * tile_size), np.nan, dtype=np.float32)
+
+    for ty in range(max(ty0, 0), ty1):
+        for tx in range(max(tx0, 0), tx1):
+            tile = _read_tile(tile_dir, meta, z, tx, ty)
+            if tile is not None:
+                r = (ty - ty0) * tile_size
+                c = (tx - tx0) * tile_size
+                mosaic[r:r + tile_size, c:c + tile_size] = tile
+
+    # Extent of the mosaic as [west, east, south, north]
+    mosaic_extent = [lon0 + tx0 * span, lon0 + tx1 * span, lat1 - ty1 * span, lat1 - ty0 * span]
+
+    return mosaic, mosaic_extent
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Write a z/x/y tile pyramid of bathymetry or maximum wave height")
+    parser.add_argument("product", choices=["bathymetry", "max-wave-height"])
+    parser.add_argument("--tile-dir", default=None, help="output directory (default ../tiles/<product>)")
+    parser.add_argument("--gebco-path", default="../data/GEBCO_data/")
+    parser.add_argument("--output-dir", default="_output", help="GeoClaw output directory")
+    parser.add_argument("--tile-size", type=int, default=TILE_SIZE)
+    parser.add_argument("--png", action="store_true", help="also write coloured PNG tiles")
+    args = parser.parse_args()
+
+    tile_dir = args.tile_dir or f"../tiles/{args.product}"
+
+    if args.product == "bathymetry":
+        build_pyramid(bathymetry_sources(args.gebco_path), tile_dir, args.tile_size,
+                      reduce="mean", png=args.png, cmap="terrain")
+    else:
+        build_pyramid(max_wave_height_sources(args.output_dir), tile_dir, args.tile_size,
+                      reduce="max", png=args.png, cmap="turbo", vmin=0.0, vmax=7.0)
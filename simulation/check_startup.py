@@ -0,0 +1,101 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2026 Diogo Silva, Frederico Afonso, Tomás Pereira
+
+# ============ Startup-time budget of the data-only path ================= #
+# ==== Authors: Diogo Silva, Frederico Afonso, Tomás Pereira ============== #
+# ======================================================================== #
+
+# Imports every data script in a fresh interpreter (as an ensemble member
+# would), measures the import time and checks that none of the plotting
+# libraries were pulled in. Exits with 1 if a budget is exceeded or a
+# module fails to import; only a missing optional dependency (OPTIONAL) is
+# reported as SKIP.
+#
+#   python check_startup.py            # default budgets
+#   python check_startup.py --budget 0.5
+
+import argparse
+import json
+import subprocess
+import sys
+
+# Seconds allowed to import each module in a fresh interpreter
+BUDGETS = {
+    "fault_model": 0.5,
+    "setrun": 0.5,
+    "build_sea_topology": 2.0,
+    "parse_NETCDF4": 1.0,
+    "extract_results": 2.0,
+}
+
+PLOTTING_MODULES = ("matplotlib", "scienceplots", "cartopy", "cmocean")
+
+# Packages whose absence skips a module instead of failing the check
+OPTIONAL = PLOTTING_MODULES
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+try:
+    import {module}
+except ModuleNotFoundError as e:
+    print(json.dumps({{"missing": (e.name or "").split(".")[0], "error": str(e)}}))
+    sys.exit(0)
+elapsed = time.perf_counter() - t0
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print(json.dumps({{"seconds": elapsed, "plotting_imports": heavy}}))
+"""
+
+def measure(module, repeats=3):
+
+    best = None
+    for _ in range(repeats):
+        proc = subprocess.run([sys.executable, "-c", PROBE.format(module=module, heavy=PLOTTING_MODULES)],
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr else "import failed"}
+
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        if "missing" in result:
+            return result
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+
+    return best
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Check the import-time budget of the data-only scripts")
+    parser.add_argument("--budget", type=float, default=None, help="override every budget (seconds)")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    failed = False
+    print(f"{'module':20s} {'import (s)':>10s} {'budget (s)':>10s}  status")
+
+    for module, budget in BUDGETS.items():
+        budget = args.budget if args.budget is not None else budget
+        result = measure(module, args.repeats)
+
+        if result.get("missing") in OPTIONAL:
+            print(f"{module:20s} {'-':>10s} {budget:10.2f}  SKIP ({result['error']})")
+            continue
+        if "error" in result:
+            print(f"{module:20s} {'-':>10s} {budget:10.2f}  FAIL import ({result['error']})")
+            failed = True
+            continue
+
+        status = "ok"
+        if result["plotting_imports"]:
+            status = "FAIL imports " + ", ".join(result["plotting_imports"])
+            failed = True
+        elif result["seconds"] > budget:
+            status = "FAIL over budget"
+            failed = True
+
+        print(f"{module:20s} {result['seconds']:10.3f} {budget:10.2f}  {status}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,253 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2026 Diogo Silva, Frederico Afonso, Tomás Pereira
+
+# ============ Regridded CF-NetCDF export of the GeoClaw run ============== #
+# ==== Authors: Diogo Silva, Frederico Afonso, Tomás Pereira ============== #
+# ======================================================================== #
+
+# Samples every frame on uniform lon/lat grids (the finest patch covering
+# each raster point, cell value as in amr_query) and writes one CF-1.8
+# netCDF4 file per grid, (time, lat, lon), chunked one frame per chunk with
+# zlib + shuffle, for xarray:
+#   - the raster point -> AMR cell mapping of a grid is computed once per
+#     patch layout and reused while the layout does not change between
+#     frames, so regridding a frame is one gather per field
+#   - one pass over the frames, one frame in memory at a time; with the
+#     byte-offset index only the patches crossing the grids are read
+#   - --zarr also writes a Zarr store (needs xarray and zarr)
+#
+#   python export_netcdf.py _output _netcdf --grids domain lisbon
+#   python export_netcdf.py _output _netcdf --grid tagus -9.45 -9.0 38.6 38.8 900 400
+
+import argparse
+import os
+import time
+import numpy as np
+from pathlib import Path
+
+from amr_query import FrameSeries
+from tracing import Tracer, NULL_TRACER
+
+# name: lon0, lon1, lat0, lat1, nx, ny
+GRIDS = {
+    "domain": (-12.0, -6.0, 36.0, 40.0, 1000, 1000),
+    "lisbon": (-9.5, -9.0, 38.55, 38.80, 1000, 500),
+}
+
+# name: standard_name, long_name, units (CF)
+FIELDS = {
+    "eta": ("sea_surface_height_above_mean_sea_level", "surface elevation", "m"),
+    "h": ("sea_floor_depth_below_sea_surface", "water depth", "m"),
+    "u": ("eastward_sea_water_velocity", "velocity x", "m s-1"),
+    "v": ("northward_sea_water_velocity", "velocity y", "m s-1"),
+    "speed": ("sea_water_speed", "velocity magnitude", "m s-1"),
+    "froude": (None, "Froude number", "1"),
+    "level": (None, "AMR level of the source cell", "1"),
+}
+
+# Earthquake at about 09:40 local time
+TIME_UNITS = "seconds since 1755-11-01 09:40:00"
+
+# ========================================= #
+# Raster grids and cached mappings          #
+# ========================================= #
+class RasterGrid:
+    def __init__(self, name, lon0, lon1, lat0, lat1, nx, ny):
+
+        # Cell centres of nx x ny cells over [lon0, lon1] x [lat0, lat1]
+        self.name = name
+        self.lon = lon0 + (np.arange(nx) + 0.5) * (lon1 - lon0) / nx
+        self.lat = lat0 + (np.arange(ny) + 0.5) * (lat1 - lat0) / ny
+        self.bbox = [lon0, lon1, lat0, lat1]
+
+    @property
+    def shape(self):
+        return len(self.lat), len(self.lon)
+
+class RegridMap:
+    def __init__(self, frame_index, grid):
+
+        # Buffer offset (AmrFrame) of the cell holding each raster point;
+        # points outside every patch stay NaN
+        lon, lat = np.meshgrid(grid.lon, grid.lat)
+        patch, i, j = frame_index.locate(lon, lat)
+        self.points = np.flatnonzero(patch >= 0)
+
+        grids = frame_index.grids
+        if grids:
+            frame = grids[0].frame
+            k = np.array([g.index for g in grids])[patch[self.points]]
+            self.cells = frame.offsets[k] + i[self.points] * frame.my[k] + j[self.points]
+            self.level = frame.level[k].astype(np.uint8)
+        else:
+            self.cells = np.empty(0, dtype=int)
+            self.level = np.empty(0, dtype=np.uint8)
+        self.shape = grid.shape
+
+    def regrid(self, values, dtype=np.float32, fill=np.nan):
+        out = np.full(self.shape[0] * self.shape[1], fill, dtype=dtype)
+        out[self.points] = values.take(self.cells)
+        return out.reshape(self.shape)
+
+    def levels(self):
+        out = np.zeros(self.shape[0] * self.shape[1], dtype=np.uint8)
+        out[self.points] = self.level
+        return out.reshape(self.shape)
+
+class Regridder:
+
+    # RegridMap per (grid, patch layout); a new layout replaces the old one
+    def __init__(self):
+        self._maps = {}
+        self.built = 0
+        self.reused = 0
+
+    def map(self, frame_index, grid):
+        layout = frame_index.grids[0].frame.layout() if frame_index.grids else ()
+        cached = self._maps.get(grid.name)
+        if cached is not None and cached[0] == layout:
+            self.reused += 1
+            return cached[1]
+        mapping = RegridMap(frame_index, grid)
+        self._maps[grid.name] = (layout, mapping)
+        self.built += 1
+        return mapping
+
+# ========================================= #
+# netCDF                                    #
+# ========================================= #
+def create_dataset(path, grid, fields, complevel=4, double=False):
+
+    from netCDF4 import Dataset
+
+    ds = Dataset(path, "w", format="NETCDF4")
+    ds.Conventions = "CF-1.8"
+    ds.title = f"1755 Lisbon tsunami, GeoClaw AMR output regridded on the {grid.name} grid"
+    ds.source = "GeoClaw (Clawpack) fort.q frames, finest AMR level at each point"
+    ds.history = f"{time.strftime('%Y-%m-%d %H:%M:%S')} export_netcdf.py"
+
+    ny, nx = grid.shape
+    ds.createDimension("time", None)
+    ds.createDimension("lat", ny)
+    ds.createDimension("lon", nx)
+
+    t = ds.createVariable("time", "f8", ("time",))
+    t.standard_name, t.units, t.calendar, t.axis = "time", TIME_UNITS, "proleptic_gregorian", "T"
+    lat = ds.createVariable("lat", "f8", ("lat",))
+    lat.standard_name, lat.units, lat.axis = "latitude", "degrees_north", "Y"
+    lat[:] = grid.lat
+    lon = ds.createVariable("lon", "f8", ("lon",))
+    lon.standard_name, lon.units, lon.axis = "longitude", "degrees_east", "X"
+    lon[:] = grid.lon
+
+    chunks = (1, ny, nx)
+    for name in fields:
+        standard_name, long_name, units = FIELDS[name]
+        if name == "level":
+            var = ds.createVariable(name, "u1", ("time", "lat", "lon"), zlib=True, complevel=complevel,
+                                    shuffle=True, chunksizes=chunks, fill_value=0)
+        else:
+            var = ds.createVariable(name, "f8" if double else "f4", ("time", "lat", "lon"), zlib=True,
+                                    complevel=complevel, shuffle=True, chunksizes=chunks, fill_value=np.nan)
+        if standard_name:
+            var.standard_name = standard_name
+        var.long_name, var.units = long_name, units
+
+    return ds
+
+def export(output_dir="_output", out_dir="_netcdf", grids=None, fields=("eta", "h", "u", "v"), complevel=4,
+           double=False, indexed=True, tracer=NULL_TRACER):
+
+    # One streaming pass over the frames, every grid written as it goes
+    grids = grids or [RasterGrid(name, *GRIDS[name]) for name in GRIDS]
+    series = FrameSeries(output_dir, indexed=indexed)
+    if len(series) == 0:
+        return {}
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {g.name: os.path.join(out_dir, f"tsunami_1755_{g.name}.nc") for g in grids}
+    datasets = {g.name: create_dataset(paths[g.name], g, fields, complevel, double) for g in grids}
+    bbox = [min(g.bbox[0] for g in grids), max(g.bbox[1] for g in grids),
+            min(g.bbox[2] for g in grids), max(g.bbox[3] for g in grids)]
+    regridder = Regridder()
+    dtype = np.float64 if double else np.float32
+
+    try:
+        for step, frame in enumerate(series.frames(bbox)):
+            with tracer.frame(step, time=float(frame.time)):
+                for g in grids:
+                    ds = datasets[g.name]
+                    with tracer.stage("regrid_map"):
+                        mapping = regridder.map(frame, g)
+                    with tracer.stage("regrid", cells=mapping.points.size * len(fields)):
+                        ds["time"][step] = frame.time
+                        for name in fields:
+                            if name == "level":
+                                ds[name][step] = mapping.levels()
+                            elif frame.grids:
+                                ds[name][step] = mapping.regrid(frame.grids[0].frame.field(name), dtype)
+                            else:
+                                ds[name][step] = np.full(g.shape, np.nan, dtype=dtype)
+            print(f"[{step + 1:3d}/{len(series)}] t={frame.time / 60:6.1f} min")
+    finally:
+        for ds in datasets.values():
+            ds.close()
+
+    print(f"{len(series)} frames, regrid maps built {regridder.built}, reused {regridder.reused}")
+    return paths
+
+def write_zarr(nc_path):
+
+    # Same dataset as a Zarr store next to the netCDF file
+    try:
+        import xarray as xr
+        import zarr  # noqa: F401
+    except ImportError:
+        print(f"xarray and zarr are needed for --zarr, skipped {nc_path}")
+        return None
+
+    zarr_path = str(Path(nc_path).with_suffix(".zarr"))
+    with xr.open_dataset(nc_path, chunks={"time": 1}) as ds:
+        ds.to_zarr(zarr_path, mode="w")
+    return zarr_path
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Regridded CF-NetCDF export of GeoClaw AMR frames")
+    parser.add_argument("output_dir", nargs="?", default="_output")
+    parser.add_argument("out_dir", nargs="?", default="_netcdf")
+    parser.add_argument("--grids", nargs="+", default=list(GRIDS), choices=list(GRIDS))
+    parser.add_argument("--grid", nargs=7, action="append", default=[],
+                        metavar=("NAME", "LON0", "LON1", "LAT0", "LAT1", "NX", "NY"), help="extra grid")
+    parser.add_argument("--fields", nargs="+", default=["eta", "h", "u", "v"], choices=list(FIELDS))
+    parser.add_argument("--complevel", type=int, default=4, help="zlib level (1-9)")
+    parser.add_argument("--double", action="store_true", help="float64 variables (default float32)")
+    parser.add_argument("--no-index", action="store_true", help="parse whole frames instead of seeking to patches")
+    parser.add_argument("--zarr", action="store_true", help="also write a Zarr store per grid")
+    parser.add_argument("--trace", default=None, help="per-frame, per-stage JSON lines")
+    args = parser.parse_args(argv)
+
+    grids = [RasterGrid(name, *GRIDS[name]) for name in args.grids]
+    for name, *values in args.grid:
+        lon0, lon1, lat0, lat1 = (float(v) for v in values[:4])
+        grids.append(RasterGrid(name, lon0, lon1, lat0, lat1, int(values[4]), int(values[5])))
+
+    tracer = Tracer(args.trace) if args.trace else NULL_TRACER
+    paths = export(args.output_dir, args.out_dir, grids, args.fields, args.complevel, args.double,
+                   not args.no_index, tracer)
+    tracer.summary()
+    tracer.close()
+    if not paths:
+        print(f"No fort.q files in {args.output_dir}")
+        return 1
+
+    for name, path in paths.items():
+        print(f"{name:10s} -> {path} ({os.path.getsize(path) / 2**20:.1f} MB)")
+        if args.zarr:
+            zarr_path = write_zarr(path)
+            if zarr_path:
+                print(f"{'':10s} -> {zarr_path}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,119 +1,156 @@
 # SPDX-License-Identifier: MIT
 # Copyright (c) 2026 Diogo Silva, Frederico Afonso, Tomás Pereira
 
+import argparse
 import os
 import sys
 import numpy as np
-import matplotlib.pyplot as plt
-import scienceplots
 from pathlib import Path
 from clawpack.pyclaw import Solution
 from scipy.interpolate import RegularGridInterpolator
-import matplotlib.ticker as ticker
-
-# ====================================== #
-#  Elsevier plotting configurations      #
-# ====================================== #
-
-width_inch = 190 / 25.4
-height_inch = width_inch * 0.45
-
-plt.rcParams.update({
-     "figure.figsize": (width_inch, height_inch),
-     "font.size": 10,
-     "axes.labelsize": 11,
-     "xtick.labelsize": 9,
-     "ytick.labelsize": 9,
-     "legend.fontsize": 8,
-     "savefig.dpi": 600,
-     "figure.autolayout": True,
-     "lines.linewidth": 1.2
- })
-
-gauge_names = {
-    "00001": "Lisbon (Terreiro do Paço)",
-    "00002": "Lisbon (Cascais Harbor)",
-    "00003": "Tagus River (Cacilhas)",
-    "00004": "Offshore",
-    "00005": "Fault (Horsehoe - HSF)",
-    "00006": "Lisbon (Forte do Bugio)"
-}
-
-# Style copied from paper in report
-def marigrams_gauges(output_dir, plots_dir):
+from tracing import Tracer, NULL_TRACER
+from setrun import FIXED_GRIDS
 
-    output_path = Path(output_dir)
-    plots_path = Path(plots_dir)
-    plots_path.mkdir(parents=True, exist_ok=True)
-
-    gauge_files = sorted(output_path.glob("gauge*.txt"))
-
-    amr_styles = {
-        1: {'color': '#bdc3c7', 'lw': 0.7, 'alpha': 0.6, 'label': 'L1'},
-        2: {'color': '#7f8c8d', 'lw': 0.8, 'alpha': 0.8, 'label': 'L2'},
-        3: {'color': '#2c3e50', 'lw': 1.0, 'alpha': 0.9, 'label': 'L3'},
-        4: {'color': '#000000', 'lw': 1.2, 'alpha': 1.0, 'label': 'L4'}
-    }
-
-    for gauge_file in gauge_files:
-
-        gid = gauge_file.stem.replace('gauge', '')
-        gname = gauge_names.get(gid, f"Gauge {gid}")
+# Marigrams and the maximum wave height map are drawn by plotting.py,
+# imported only when plots are requested
 
-        try:
-            data = np.loadtxt(gauge_file)
-            if data.size == 0: continue
-            levels, times, eta = data[:, 0].astype(int), data[:, 1] / 60.0, data[:, 5]
-        except: continue
+# When the run has fgmax grids (setrun.FIXED_GRIDS) the maxima come from
+# them, exact at every solver step; the fort.q frames are only re-read and
+# interpolated for runs without them. fgout frames are memory-mapped.
 
-        plt.style.use(['science', 'no-latex'])
-        fig, ax = plt.subplots(figsize=(190/25.4, 190/25.4 * 0.3))
+DRY_TOLERANCE = 1e-3
 
-        ax.axhline(0, color='black', lw=0.5)
+# ========================================= #
+# Fixed grids (fgmax, fgout)                #
+# ========================================= #
+def fixed_grid_number(name):
+    return list(FIXED_GRIDS).index(name) + 1
 
-        for level, style in amr_styles.items():
-            mask = (levels == level)
-            if np.any(mask):
-                ax.plot(np.where(mask, times, np.nan),
-                        np.where(mask, eta, np.nan),
-                        color=style['color'],
-                        linewidth=style['lw'],
-                        alpha=style['alpha'],
-                        zorder=level)
+def read_fgmax(output_dir, name="domain"):
 
-        ax.text(0.98, 0.85, f"{gid} - {gname}",
-                transform=ax.transAxes,
-                fontsize=11,
-                fontweight='bold',
-                fontstyle='italic',
-                verticalalignment='top',
-                horizontalalignment='right')
+    # fgmax000N.txt is written once at the end of the run (text)
+    from clawpack.geoclaw import fgmax_tools
 
-        ax.set_xlabel('Time (min)', fontsize=10)
-        ax.set_ylabel('$\zeta$ (m)', fontsize=10)
-        ax.set_xlim(0, times.max())
-        ax.tick_params(direction='in', top=True, right=True)
-        ax.grid(False)
-
-        plt.savefig(plots_path / f"marigram_{gid}.pdf", bbox_inches='tight', dpi=600)
-        plt.close()
-
-def maximum_wave_height(output_dir, plots_dir):
+    output_path = Path(output_dir)
+    fgno = fixed_grid_number(name)
+    if not (output_path / "fgmax_grids.data").is_file() or not (output_path / f"fgmax{fgno:04d}.txt").is_file():
+        return None
+
+    fg = fgmax_tools.FGmaxGrid()
+    fg.read_fgmax_grids_data(fgno, data_file=str(output_path / "fgmax_grids.data"))
+    fg.read_output(fgno, str(output_path), verbose=False, indexing='xy')
+    return fg
+
+def fgmax_maxima(fg):
+
+    # (ny, nx) arrays; eta as the old map: 0 where never wet
+    h = np.ma.filled(fg.h, 0.0)
+    wet = h > DRY_TOLERANCE
+    result = {
+        "lon": fg.x, "lat": fg.y,
+        "max_eta": np.where(wet, np.maximum(h + np.ma.filled(fg.B, 0.0), 0.0), 0.0),
+        "max_depth": h,
+        "B": np.ma.filled(fg.B, np.nan),
+        "level": fg.level,
+        "time_max_depth": np.ma.filled(fg.h_time, np.nan),
+        "arrival_time": np.ma.filled(fg.arrival_time, np.nan),
+    }
+    if getattr(fg, "s", None) is not None:
+        result["max_speed"] = np.ma.filled(fg.s, 0.0)
+        result["time_max_speed"] = np.ma.filled(fg.s_time, np.nan)
+    return result
+
+class FGoutSeries:
+    def __init__(self, output_dir, name="domain"):
+
+        # Frames of one fgout grid: fgout000N.tKKKK (time, components) and
+        # fgout000N.bKKKK (raw binary, (components, nx, ny) in Fortran
+        # order, no ghost cells)
+        from clawpack.geoclaw import fgout_tools
+
+        self.name = name
+        self.fgno = fixed_grid_number(name)
+        self.path = Path(output_dir)
+        grid = fgout_tools.FGoutGrid(self.fgno, str(self.path))
+        grid.read_fgout_grids_data(self.fgno)
+
+        if grid.output_format not in ("binary32", "binary"):
+            raise ValueError(f"fgout grid {self.fgno} is {grid.output_format}, binary32 or binary expected")
+        self.dtype = np.float32 if grid.output_format == "binary32" else np.float64
+        self.nx, self.ny = grid.nx, grid.ny
+        self.q_out_vars = grid.q_out_vars
+        self.qmap = grid.qmap
+
+        dx, dy = (grid.x2 - grid.x1) / grid.nx, (grid.y2 - grid.y1) / grid.ny
+        self.lon = grid.x1 + (np.arange(grid.nx) + 0.5) * dx
+        self.lat = grid.y1 + (np.arange(grid.ny) + 0.5) * dy
+
+        self.files = sorted(self.path.glob(f"fgout{self.fgno:04d}.b*"))
+        self.times = np.array([self._time(f) for f in self.files])
+
+    def _time(self, b_file):
+        with open(b_file.with_name(b_file.name.replace(".b", ".t", 1))) as f:
+            return float(f.readline().split()[0])
+
+    def __len__(self):
+        return len(self.files)
+
+    def frame(self, k):
+
+        # (components, ny, nx) view of the file, nothing read until used
+        n = len(self.q_out_vars)
+        q = np.memmap(self.files[k], dtype=self.dtype, mode="r", shape=(n, self.nx, self.ny), order="F")
+        return q.transpose(0, 2, 1)
+
+    def field(self, k, name):
+        return self.frame(k)[self.q_out_vars.index(self.qmap[name])]
+
+    def series(self, name="eta"):
+
+        # (time, ny, nx) array of one component
+        out = np.empty((len(self), self.ny, self.nx), dtype=self.dtype)
+        for k in range(len(self)):
+            out[k] = self.field(k, name)
+        return out
+
+def fixed_grid_results(output_dir, out_dir, fgout=False, tracer=NULL_TRACER):
+
+    # fgmax_<name>.npz for every fgmax grid of the run, and with fgout the
+    # eta series fgout_<name>.npz (t, lon, lat, eta)
+    out_path = Path(out_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+    written = []
+    for name in FIXED_GRIDS:
+        with tracer.stage("fgmax"):
+            fg = read_fgmax(output_dir, name)
+        if fg is not None:
+            np.savez_compressed(out_path / f"fgmax_{name}.npz", **fgmax_maxima(fg))
+            written.append(out_path / f"fgmax_{name}.npz")
+
+        fgno = fixed_grid_number(name)
+        if fgout and any(Path(output_dir).glob(f"fgout{fgno:04d}.b*")):
+            series = FGoutSeries(output_dir, name)
+            if len(series):
+                with tracer.stage("fgout", bytes_read=sum(f.stat().st_size for f in series.files)):
+                    eta = series.series("eta")
+                np.savez_compressed(out_path / f"fgout_{name}.npz", t=series.times, lon=series.lon,
+                                    lat=series.lat, eta=eta)
+                written.append(out_path / f"fgout_{name}.npz")
+    return written
+
+def compute_maximum_wave_height(output_dir, lon_range=(-12.0, -6.0), lat_range=(36.0, 40.0), resolution=1000,
+                                tracer=NULL_TRACER):
 
     output_path = Path(output_dir)
-    plots_path = Path(plots_dir)
-    plots_path.mkdir(parents=True, exist_ok=True)
 
     fort_files = sorted([f for f in output_path.glob("fort.q*") if any(c.isdigit() for c in f.name)])
 
     if not fort_files:
         print("No fort.q files found.")
-        return
+        return None
 
-    lon_min, lon_max = -12.0, -6.0
-    lat_min, lat_max = 36.0, 40.0
-
-    resolution = 1000
+    lon_min, lon_max = lon_range
+    lat_min, lat_max = lat_range
 
     lon_fixed = np.linspace(lon_min, lon_max, resolution)
     lat_fixed = np.linspace(lat_min, lat_max, resolution)
@@ -129,87 +166,107 @@ def maximum_wave_height(output_dir, plots_dir):
             continue
         frame_num = int(frame_num_str)
 
-        try:
-            sol = Solution(frame_num, path=str(output_path), file_format='ascii')
-        except Exception as e:
-            print(f"Skipping frame {frame_num}: {e}")
-            continue
-
-        for state in sol.states:
-            h = state.q[0, :, :]
-
+        with tracer.frame(frame_num):
             try:
-                eta = state.q[3, :, :]
-            except IndexError:
-                print("Error in eta Index: {e}")
+                with tracer.stage("read", bytes_read=fort_file.stat().st_size) as rec:
+                    sol = Solution(frame_num, path=str(output_path), file_format='ascii')
+                    rec["cells"] = sum(state.q[0].size for state in sol.states)
+            except Exception as e:
+                print(f"Skipping frame {frame_num}: {e}")
                 continue
 
-            eta_masked = np.where(h > tolerance, eta, -9999).T
+            for state in sol.states:
+                h = state.q[0, :, :]
 
-            x_patch = state.grid.x.centers
-            y_patch = state.grid.y.centers
+                try:
+                    eta = state.q[3, :, :]
+                except IndexError:
+                    print("Error in eta Index: {e}")
+                    continue
 
-            # Just fail-safe for other simulations (NOT NECCESSARY ON THIS SETTINGS)
-            if (x_patch.max() < lon_min or x_patch.min() > lon_max or
-                y_patch.max() < lat_min or y_patch.min() > lat_max):
-                continue
+                eta_masked = np.where(h > tolerance, eta, -9999).T
 
-            try:
-                interp_func = RegularGridInterpolator(
-                    (y_patch, x_patch),
-                    eta_masked,
-                    bounds_error=False,
-                    fill_value=-9999
-                )
-            except ValueError as e:
-                print(f"Interpolation error in frame {frame_num}: {e}")
-                continue
+                x_patch = state.grid.x.centers
+                y_patch = state.grid.y.centers
 
-            pts = np.array([LAT.ravel(), LON.ravel()]).T
-            interpolated_values = interp_func(pts).reshape(LON.shape)
+                # Just fail-safe for other simulations (NOT NECCESSARY ON THIS SETTINGS)
+                if (x_patch.max() < lon_min or x_patch.min() > lon_max or
+                    y_patch.max() < lat_min or y_patch.min() > lat_max):
+                    continue
 
-            valid_mask = interpolated_values > -9000
-            max_eta_global[valid_mask] = np.maximum(
-                max_eta_global[valid_mask],
-                interpolated_values[valid_mask]
-            )
+                with tracer.stage("interpolation", cells=h.size):
+                    try:
+                        interp_func = RegularGridInterpolator(
+                            (y_patch, x_patch),
+                            eta_masked,
+                            bounds_error=False,
+                            fill_value=-9999
+                        )
+                    except ValueError as e:
+                        print(f"Interpolation error in frame {frame_num}: {e}")
+                        continue
 
-    plt.style.use(['science', 'no-latex'])
-    fig, ax = plt.subplots(figsize=(width_inch, height_inch))
+                    pts = np.array([LAT.ravel(), LON.ravel()]).T
+                    interpolated_values = interp_func(pts).reshape(LON.shape)
 
-    from matplotlib.colors import PowerNorm
-    cmap = plt.get_cmap('turbo')
-    cmap.set_under('white', alpha=0)
+                    valid_mask = interpolated_values > -9000
+                    max_eta_global[valid_mask] = np.maximum(
+                        max_eta_global[valid_mask],
+                        interpolated_values[valid_mask]
+                    )
 
-    norm = PowerNorm(gamma=0.6, vmin=0.1, vmax=7.0)
+    return lon_fixed, lat_fixed, max_eta_global
 
-    im = ax.pcolormesh(LON, LAT, max_eta_global,
-                       cmap=cmap,
-                       norm=norm,
-                       shading='auto')
+def maximum_wave_height(output_dir, plots_dir, plots=True, tracer=NULL_TRACER):
 
-    cbar = fig.colorbar(im, ax=ax, extend='max', aspect=20, pad=0.02)
-    cbar.set_label('$\zeta_{max}$ (m)')
+    plots_path = Path(plots_dir)
+    plots_path.mkdir(parents=True, exist_ok=True)
 
-    tick_values = [0, 1, 2, 3, 4, 5, 6, 7]
-    cbar.set_ticks(tick_values)
-    cbar.outline.set_linewidth(0.8)
-    for val in tick_values:
-        cbar.ax.axhline(val, color='black', linewidth=0.8)
+    # Exact maxima from the domain fgmax grid, else from the output frames
+    with tracer.stage("fgmax"):
+        fg = read_fgmax(output_dir, "domain")
+    if fg is not None:
+        maxima = fgmax_maxima(fg)
+        result = maxima["lon"], maxima["lat"], maxima["max_eta"]
+    else:
+        result = compute_maximum_wave_height(output_dir, tracer=tracer)
+    if result is None:
+        return
 
-    ax.set_xlabel('Longitude ($^\circ$)')
-    ax.set_ylabel('Latitude ($^\circ$)')
-    ax.set_aspect('equal')
+    lon_fixed, lat_fixed, max_eta_global = result
+    with tracer.stage("write") as rec:
+        np.savez_compressed(plots_path / "maximum_wave_height.npz",
+                            lon=lon_fixed, lat=lat_fixed, max_eta=max_eta_global)
+        rec["bytes_written"] = (plots_path / "maximum_wave_height.npz").stat().st_size
 
-    plt.savefig(plots_path / "maximum_wave_height_map.pdf", bbox_inches='tight')
-    plt.close()
+    if plots:
+        from plotting import plotting_maximum_wave_height
+        plotting_maximum_wave_height(lon_fixed, lat_fixed, max_eta_global, plots_dir)
 
 def velocity_heatmap(): pass
 
 if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Extract results of the 1755 Lisbon Tsunami run")
+    parser.add_argument("--output-dir", default="_output")
+    parser.add_argument("--plots-dir", default="../plots")
+    parser.add_argument("--no-plots", action="store_true",
+                        help="only write maximum_wave_height.npz, skip marigrams and maps")
+    parser.add_argument("--fgout", action="store_true", help="also write the fgout eta series (fgout_<grid>.npz)")
+    parser.add_argument("--trace", default=None, help="per-frame, per-stage JSON lines (time, bytes, cells, memory)")
+    parser.add_argument("--profile", default=None, help="cProfile output of the whole extraction")
+    args = parser.parse_args()
+
+    tracer = Tracer(args.trace, args.profile) if (args.trace or args.profile) else NULL_TRACER
+
     print("Starting to plot results for 1755 Lisbon Tsunami")
-    output_dir = "_output"
-    plots_dir = "../plots"
 
-    marigrams_gauges(output_dir, f"{plots_dir}/marigrams/")
-    maximum_wave_height(output_dir,f"{plots_dir}/maximum_wave_height/")
+    if not args.no_plots:
+        from plotting import marigrams_gauges
+        marigrams_gauges(args.output_dir, f"{args.plots_dir}/marigrams/")
+
+    maximum_wave_height(args.output_dir, f"{args.plots_dir}/maximum_wave_height/", plots=not args.no_plots,
+                        tracer=tracer)
+    fixed_grid_results(args.output_dir, f"{args.plots_dir}/fixed_grids/", fgout=args.fgout, tracer=tracer)
+    tracer.summary()
+    tracer.close()
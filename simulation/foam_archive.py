@@ -0,0 +1,340 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2026 Diogo Silva, Frederico Afonso, Tomás Pereira
+
+# ============ Compact archive of an OpenFOAM time series ================= #
+# ==== Authors: Diogo Silva, Frederico Afonso, Tomás Pereira ============== #
+# ======================================================================== #
+
+# Packs a finished case into one chunked, compressed netCDF4 file:
+#   - every time directory becomes one slice of a (time, cell, component)
+#     array per field, chunked one snapshot per chunk (zlib + shuffle)
+#   - non-uniform boundary values are stored the same way per patch, the
+#     rest of each boundaryField (types, uniform values) once as JSON
+#   - constant/ (mesh), system/, 0/ and the scripts are stored once as
+#     compressed raw files
+#   - the old-time fields (U_0, phi_0) are dropped unless --keep-old
+#
+# Unpacking writes valid OpenFOAM directories back (all or selected times).
+#
+#   python foam_archive.py pack openfoam/case_S case_S.nc --float32
+#   python foam_archive.py unpack case_S.nc restored_case_S --times 10 20
+#   python foam_archive.py list case_S.nc
+
+import argparse
+import json
+import os
+import re
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+import openfoam_reader as foam
+
+OLD_TIME = re.compile(r".*_0+$")
+
+# ========================================= #
+# Helpers                                   #
+# ========================================= #
+def _static_files(case_dir):
+
+    # Everything that is not an output time directory (0/ is kept as is)
+    skip = {foam.CACHE_DIR}
+    times = {name for value, name in foam.list_times(case_dir) if value > 0}
+
+    files = []
+    for root, dirs, names in os.walk(case_dir):
+        rel_root = os.path.relpath(root, case_dir)
+        if rel_root == ".":
+            dirs[:] = sorted(d for d in dirs if d not in skip and d not in times and not d.startswith("processor"))
+        for name in sorted(names):
+            files.append(os.path.normpath(os.path.join(rel_root, name)))
+
+    return files
+
+def _boundary_spec(boundary):
+
+    # boundaryField without the non-uniform arrays, which are stored separately
+    spec, arrays = {}, {}
+    for patch, entries in boundary.items():
+        spec[patch] = {}
+        for key, value in entries.items():
+            if isinstance(value, dict) and value.get("uniform") is False:
+                spec[patch][key] = {"nonuniform": value["kind"]}
+                arrays[(patch, key)] = value["value"]
+            elif isinstance(value, dict) and value.get("uniform") is True:
+                spec[patch][key] = {"uniform": np.atleast_1d(value["value"]).tolist()}
+            else:
+                spec[patch][key] = value
+
+    return spec, arrays
+
+def _boundary_from_spec(spec, arrays):
+
+    boundary = {}
+    for patch, entries in spec.items():
+        boundary[patch] = {}
+        for key, value in entries.items():
+            if isinstance(value, dict) and "nonuniform" in value:
+                boundary[patch][key] = {"uniform": False, "value": arrays[(patch, key)]}
+            elif isinstance(value, dict) and "uniform" in value:
+                v = value["uniform"]
+                boundary[patch][key] = {"uniform": True, "value": v[0] if len(v) == 1 else np.array(v)}
+            else:
+                boundary[patch][key] = value
+
+    return boundary
+
+def _read_time(case_dir, name, fields):
+
+    tdir = os.path.join(case_dir, name)
+    parsed = {f: foam.read_field(os.path.join(tdir, f)) for f in fields if os.path.exists(os.path.join(tdir, f))}
+
+    uniform_time = {}
+    time_file = os.path.join(tdir, "uniform", "time")
+    if os.path.exists(time_file):
+        with open(time_file, "rb") as f:
+            buf = f.read()
+        pos = foam.parse_header(buf)[1]
+        for key in ("value", "index", "deltaT", "deltaT0"):
+            m = re.search(rb"\n" + key.encode() + rb"\s+([^;]+);", buf[pos:])
+            if m:
+                uniform_time[key] = float(m.group(1))
+
+    return parsed, uniform_time
+
+def _dimension(ds, size, name):
+
+    if name not in ds.dimensions:
+        ds.createDimension(name, size)
+    return name
+
+# ========================================= #
+# Pack                                      #
+# ========================================= #
+def pack(case_dir, archive, fields=None, float32=False, keep_old=False, complevel=4, workers=4):
+
+    from netCDF4 import Dataset
+
+    index = [entry for entry in foam.time_index(case_dir, refresh=True) if entry["time"] > 0]
+    if not index:
+        raise ValueError(f"No output time directories in {case_dir}")
+
+    if fields is None:
+        names = sorted({f for entry in index for f in entry["fields"]})
+        fields = [f for f in names if keep_old or not OLD_TIME.match(f)]
+
+    mesh = foam.read_label_header(os.path.join(case_dir, "constant", "polyMesh", "owner"))
+    dtype = "f4" if float32 else "f8"
+
+    with Dataset(archive, "w", format="NETCDF4") as ds:
+        ds.case = os.path.basename(os.path.normpath(case_dir))
+        ds.float32 = int(float32)
+        ds.fields = json.dumps(fields)
+        ds.mesh = json.dumps(mesh)
+
+        # Times and uniform/time entries
+        ds.createDimension("time", len(index))
+        ds.createVariable("time", "f8", ("time",))[:] = [e["time"] for e in index]
+        names = ds.createVariable("time_name", str, ("time",))
+        for i, e in enumerate(index):
+            names[i] = e["name"]
+        for key in ("value", "index", "deltaT", "deltaT0"):
+            ds.createVariable("uniform_" + key, "f8", ("time",), fill_value=np.nan)
+
+        # Static files, stored once
+        files = ds.createGroup("files")
+        for i, rel in enumerate(_static_files(case_dir)):
+            with open(os.path.join(case_dir, rel), "rb") as f:
+                data = np.frombuffer(f.read(), dtype=np.uint8)
+            dim = _dimension(files, max(len(data), 1), f"n{i}")
+            var = files.createVariable(f"file{i}", "u1", (dim,), zlib=True, complevel=complevel)
+            var.file_path = rel
+            var.file_size = len(data)
+            if len(data):
+                var[:] = data
+
+        created = {}
+
+        def variable(name, values, attrs=None):
+            if name not in created:
+                dims = ["time", _dimension(ds, values.shape[0], f"{name}_n")]
+                if values.ndim == 2:
+                    dims.append(_dimension(ds, values.shape[1], f"component{values.shape[1]}"))
+                chunks = [1] + [ds.dimensions[d].size for d in dims[1:]]
+                var = ds.createVariable(name, dtype, dims, zlib=True, complevel=complevel,
+                                        shuffle=True, chunksizes=chunks, fill_value=np.nan)
+                for key, value in (attrs or {}).items():
+                    setattr(var, key, value)
+                created[name] = var
+            return created[name]
+
+        # Parse in background threads, write in order
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            jobs = pool.map(lambda e: _read_time(case_dir, e["name"], fields), index)
+
+            for i, (parsed, uniform_time) in enumerate(jobs):
+                for key, value in uniform_time.items():
+                    ds.variables["uniform_" + key][i] = value
+
+                for field, data in parsed.items():
+                    spec, arrays = _boundary_spec(data["boundary"])
+                    attrs = {"foam_class": data["class"], "dimensions_foam": data["dimensions"],
+                             "boundary": json.dumps(spec)}
+
+                    internal = data["internal"]
+                    if data["internal_uniform"]:
+                        internal = np.broadcast_to(internal, (mesh["nCells"],) + np.shape(internal))
+
+                    var = variable(field, internal, attrs)
+
+                    # The boundary layout must not change along the series
+                    if var.boundary != attrs["boundary"]:
+                        raise ValueError(f"boundaryField of {field} changes at t = {index[i]['name']}")
+
+                    var[i] = internal
+
+                    for (patch, key), values in arrays.items():
+                        variable(f"{field}__{patch}__{key}", values)[i] = values
+
+    return archive
+
+# ========================================= #
+# Unpack                                    #
+# ========================================= #
+def list_archive(archive):
+
+    from netCDF4 import Dataset
+
+    with Dataset(archive) as ds:
+        names = [str(n) for n in ds.variables["time_name"][:]]
+        fields = json.loads(ds.fields)
+        files = [ds["files"].variables[v].file_path for v in ds["files"].variables]
+
+    return names, fields, files
+
+def unpack(archive, out_dir, times=None, fields=None, precision=None):
+
+    # Writes the static files and the requested times (all by default, or the
+    # nearest stored time to each value in times) as a valid OpenFOAM case
+    from netCDF4 import Dataset
+
+    with Dataset(archive) as ds:
+        ds.set_auto_mask(False)
+
+        for name in ds["files"].variables:
+            var = ds["files"].variables[name]
+            path = os.path.join(out_dir, var.file_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(var[:var.file_size].tobytes() if var.file_size else b"")
+
+        if precision is None:
+            precision = _write_precision(out_dir)
+
+        values = ds.variables["time"][:]
+        names = [str(n) for n in ds.variables["time_name"][:]]
+        selected = range(len(names)) if times is None else sorted({int(np.argmin(np.abs(values - t))) for t in times})
+        fields = json.loads(ds.fields) if fields is None else fields
+
+        for i in selected:
+            tdir = os.path.join(out_dir, names[i])
+
+            for field in fields:
+                var = ds.variables[field]
+                internal = var[i]
+                if np.isnan(internal).all():
+                    continue
+
+                spec = json.loads(var.boundary)
+                arrays = {(patch, key): ds.variables[f"{field}__{patch}__{key}"][i]
+                          for patch, entries in spec.items() for key, value in entries.items()
+                          if isinstance(value, dict) and "nonuniform" in value}
+
+                foam.write_field(os.path.join(tdir, field), {
+                    "class": var.foam_class, "object": field, "dimensions": var.dimensions_foam,
+                    "internal_uniform": False, "internal": internal,
+                    "boundary": _boundary_from_spec(spec, arrays)}, names[i], precision)
+
+            _write_uniform_time(tdir, names[i], {key: ds.variables["uniform_" + key][i]
+                                                for key in ("value", "index", "deltaT", "deltaT0")})
+
+    return [names[i] for i in selected]
+
+def _write_precision(case_dir):
+
+    control = os.path.join(case_dir, "system", "controlDict")
+    if os.path.exists(control):
+        with open(control) as f:
+            m = re.search(r"\nwritePrecision\s+(\d+);", f.read())
+        if m:
+            return int(m.group(1))
+    return 6
+
+def _write_uniform_time(tdir, name, entries):
+
+    if np.isnan(entries["value"]):
+        return
+
+    path = os.path.join(tdir, "uniform", "time")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(foam.format_header("dictionary", f"{name}/uniform", "time")
+                + "beginTime       0;\n\n"
+                + f"value           {entries['value']:.18g};\n\n"
+                + f"name            \"{name}\";\n\n"
+                + f"index           {int(entries['index'])};\n\n"
+                + f"deltaT          {entries['deltaT']:.6g};\n\n"
+                + f"deltaT0         {entries['deltaT0']:.6g};" + foam.FOOTER)
+
+def _tree_size(path):
+
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Pack/unpack an OpenFOAM case to a compressed netCDF4 archive")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("pack")
+    p.add_argument("case_dir")
+    p.add_argument("archive")
+    p.add_argument("--fields", nargs="+", default=None)
+    p.add_argument("--float32", action="store_true", help="store fields in single precision")
+    p.add_argument("--keep-old", action="store_true", help="keep the old-time fields (U_0, phi_0)")
+    p.add_argument("--complevel", type=int, default=4)
+    p.add_argument("--workers", type=int, default=4)
+
+    u = sub.add_parser("unpack")
+    u.add_argument("archive")
+    u.add_argument("out_dir")
+    u.add_argument("--times", nargs="+", type=float, default=None)
+    u.add_argument("--fields", nargs="+", default=None)
+
+    l = sub.add_parser("list")
+    l.add_argument("archive")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "pack":
+        t0 = time.perf_counter()
+        pack(args.case_dir, args.archive, args.fields, args.float32, args.keep_old, args.complevel, args.workers)
+        size_in, size_out = _tree_size(args.case_dir), os.path.getsize(args.archive)
+        print(f"Packed {args.case_dir} ({size_in / 1e6:.1f} MB) -> {args.archive} ({size_out / 1e6:.1f} MB) "
+              f"in {time.perf_counter() - t0:.1f} s")
+
+    elif args.command == "unpack":
+        if os.path.exists(args.out_dir) and os.listdir(args.out_dir):
+            raise SystemExit(f"{args.out_dir} is not empty")
+        t0 = time.perf_counter()
+        names = unpack(args.archive, args.out_dir, args.times, args.fields)
+        print(f"Restored {len(names)} time directories into {args.out_dir} in {time.perf_counter() - t0:.1f} s")
+
+    else:
+        names, fields, files = list_archive(args.archive)
+        print(f"{len(names)} times ({names[0]} .. {names[-1]}), fields: {', '.join(fields)}")
+        print(f"{len(files)} static files")
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
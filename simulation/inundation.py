@@ -0,0 +1,204 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2026 Diogo Silva, Frederico Afonso, Tomás Pereira
+
+# ============ Inundation over the whole run ============================== #
+# ==== Authors: Diogo Silva, Frederico Afonso, Tomás Pereira ============== #
+# ======================================================================== #
+
+# Maximum inundation depth, first-wet time and inundation duration of every
+# land cell reached by the water, accumulated frame by frame. Only coastal
+# cells are ever looked at: per patch geometry the land cells (b > 0) below
+# max_elevation are found once (bathymetry is static after dtopo) and kept
+# as flat indices, so a frame costs the number of coastal cells, not the
+# patch size. Per AMR level the cells that were ever wet are kept sparse
+# (sorted global cell ids and their records) with the current wet/dry state
+# as a packed bitset, so regridding does not lose a cell's history.
+#
+#   python inundation.py _output --out _stats/inundation.npz
+
+import argparse
+import numpy as np
+
+DRY_TOLERANCE = 1e-3
+
+# Global cell id: (j + BIAS) << 32 | (i + BIAS), (i, j) on the level grid
+BIAS = 2**30
+
+# Land above this (m) is never reached by the 1755 waves (run-up ~15 m)
+MAX_ELEVATION = 50.0
+
+class LevelRecord:
+
+    # Cells of one AMR level that were ever wet (land), sorted by global id
+    def __init__(self, dx, dy):
+        self.dx, self.dy = dx, dy
+        self.ids = np.empty(0, dtype=np.int64)
+        self.max_depth = np.empty(0)
+        self.first_wet = np.empty(0)
+        self.duration = np.empty(0)
+        self.wet = np.packbits(np.empty(0, dtype=bool))
+        self.time = None
+
+    def wet_now(self):
+        return np.unpackbits(self.wet, count=self.ids.size).astype(bool)
+
+    def update(self, wet_ids, depth, observed, t):
+
+        # wet_ids / depth: wet coastal cells of the frame; observed: every
+        # coastal cell of the frame at this level (cells outside keep their
+        # state and gain no duration)
+        previous = self.wet_now()
+        new = np.setdiff1d(wet_ids, self.ids)
+        if new.size:
+            ids = np.union1d(self.ids, new)
+            old = np.searchsorted(ids, self.ids)
+            self.max_depth, self.first_wet, self.duration, previous = (
+                self._grow(a, ids.size, old, fill) for a, fill in
+                ((self.max_depth, 0.0), (self.first_wet, t), (self.duration, 0.0), (previous, False)))
+            self.ids = ids
+
+        k = np.searchsorted(self.ids, wet_ids)
+        np.maximum.at(self.max_depth, k, depth)
+        now = np.zeros(self.ids.size, dtype=bool)
+        now[k] = True
+
+        seen = np.isin(self.ids, observed)
+        if self.time is not None:
+            # Trapezoid over the frame interval: half of it at a wet/dry change
+            self.duration += np.where(seen, 0.5 * (previous.astype(float) + now) * (t - self.time), 0.0)
+        now = np.where(seen, now, previous)
+
+        self.wet = np.packbits(now)
+        self.time = t
+
+    @staticmethod
+    def _grow(values, size, old, fill):
+        out = np.full(size, fill, dtype=values.dtype)
+        out[old] = values
+        return out
+
+class InundationTracker:
+    def __init__(self, dry_tolerance=DRY_TOLERANCE, max_elevation=MAX_ELEVATION):
+
+        self.dry_tolerance = dry_tolerance
+        self.max_elevation = max_elevation
+        self.levels = {}
+        self.origin = None
+        self._coast = {}
+        self._seen = set()
+        self._pending = {}
+
+    def _cells(self, grid, static):
+
+        # Coastal cells of the patch: flat indices into its (mx, my) arrays,
+        # global ids on its level grid and their bathymetry
+        x, y, dx, dy = grid["x"], grid["y"], grid["dx"], grid["dy"]
+        key = (grid["level"], len(x), len(y), float(x[0]), float(y[0]), dx, dy)
+        self._seen.add(key)
+        if not static:
+            self._coast.pop(key, None)
+        elif key in self._coast:
+            return self._coast[key]
+
+        if self.origin is None:
+            self.origin = (float(x[0] - 0.5 * dx), float(y[0] - 0.5 * dy))
+        b = grid["b"]
+        land = b > 0
+        if self.max_elevation is not None:
+            land &= b <= self.max_elevation
+        flat = np.flatnonzero(land)
+
+        i0 = int(round((x[0] - 0.5 * dx - self.origin[0]) / dx))
+        j0 = int(round((y[0] - 0.5 * dy - self.origin[1]) / dy))
+        i, j = np.divmod(flat, len(y))
+        ids = (j0 + j + BIAS).astype(np.int64) << 32 | (i0 + i + BIAS)
+
+        cells = (flat, ids, b.ravel()[flat])
+        if static:
+            self._coast[key] = cells
+        return cells
+
+    def add(self, grid, static=True):
+
+        # One patch of the current frame; static=False when its bathymetry
+        # may still be changing (dtopo), so its coastal cells are not cached.
+        # Returns depth and b of its tracked cells that are wet now
+        h = grid["h"]
+        flat, ids, b = self._cells(grid, static)
+        depth = h.ravel()[flat]
+        wet = depth > self.dry_tolerance
+
+        pending = self._pending.setdefault(grid["level"], {"ids": [], "depth": [], "observed": [], "dx": grid["dx"],
+                                                           "dy": grid["dy"]})
+        pending["ids"].append(ids[wet])
+        pending["depth"].append(depth[wet])
+        pending["observed"].append(ids)
+        return {"depth": depth[wet], "b": b[wet]}
+
+    def end_frame(self, t):
+
+        # Levels with no patch in this frame are left as they were
+        for level, p in self._pending.items():
+            record = self.levels.setdefault(level, LevelRecord(p["dx"], p["dy"]))
+            record.update(np.concatenate(p["ids"]), np.concatenate(p["depth"]), np.concatenate(p["observed"]), t)
+        self._pending = {}
+
+        self._coast = {k: v for k, v in self._coast.items() if k in self._seen}
+        self._seen = set()
+
+    def results(self):
+
+        # Every cell ever inundated, all levels: centre, level and records
+        parts = {name: [] for name in ("x", "y", "level", "max_depth", "first_wet", "duration")}
+        for level, r in sorted(self.levels.items()):
+            i, j = (r.ids & 0xFFFFFFFF) - BIAS, (r.ids >> 32) - BIAS
+            parts["x"].append(self.origin[0] + (i + 0.5) * r.dx)
+            parts["y"].append(self.origin[1] + (j + 0.5) * r.dy)
+            parts["level"].append(np.full(r.ids.size, level))
+            parts["max_depth"].append(r.max_depth)
+            parts["first_wet"].append(r.first_wet)
+            parts["duration"].append(r.duration)
+        return {name: np.concatenate(v) if v else np.empty(0) for name, v in parts.items()}
+
+    def write(self, path):
+        np.savez_compressed(path, **self.results())
+        return path
+
+def track_inundation(output_dir="_output", max_elevation=MAX_ELEVATION):
+
+    # One patch in memory at a time
+    from parse_to_VTK import iter_geoclaw_amr, fort_q_files, frame_time
+
+    tracker = InundationTracker(max_elevation=max_elevation)
+    for step, fort_file in enumerate(fort_q_files(output_dir)):
+        for grid in iter_geoclaw_amr(fort_file):
+            tracker.add(grid)
+        tracker.end_frame(frame_time(fort_file, step))
+    return tracker
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Maximum inundation depth, first-wet time and duration")
+    parser.add_argument("output_dir", nargs="?", default="_output")
+    parser.add_argument("--out", default="inundation.npz")
+    parser.add_argument("--max-elevation", type=float, default=MAX_ELEVATION,
+                        help="land above this (m) is not tracked")
+    args = parser.parse_args(argv)
+
+    from parse_to_VTK import fort_q_files
+    if not fort_q_files(args.output_dir):
+        print(f"No fort.q files in {args.output_dir}")
+        return 1
+
+    tracker = track_inundation(args.output_dir, args.max_elevation)
+    cells = tracker.results()
+    tracker.write(args.out)
+    if cells["max_depth"].size:
+        print(f"{cells['max_depth'].size} cells inundated, max depth {cells['max_depth'].max():.2f} m, "
+              f"longest {cells['duration'].max() / 60:.1f} min -> {args.out}")
+    else:
+        print(f"No land cell inundated -> {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,333 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2026 Diogo Silva, Frederico Afonso, Tomás Pereira
+
+# ============ Streaming POD / DMD of the OpenFOAM snapshots ============== #
+# ==== Authors: Diogo Silva, Frederico Afonso, Tomás Pereira ============== #
+# ======================================================================== #
+
+# Snapshots are streamed one by one from the case directory (through the
+# openfoam_reader .npy cache), so the (cells x snapshots) matrix is never
+# built. Passes over the series:
+#   1. mean field and fluctuation energy
+#   2. POD modes, by incremental SVD (blocks of snapshots, rank-truncated
+#      Brand update) or randomized SVD (streamed range finder)
+#   3. projection onto the modes -> temporal coefficients
+# DMD is then computed on the POD coefficients (projected DMD), resampled on
+# a uniform time step since the solver uses adjustTimeStep.
+#
+# Results are saved as modes.npz and written as an OpenFOAM case for
+# ParaView: 0/ holds the mean, k/ holds POD mode k and DMD mode k (real and
+# imaginary parts, sustained DMD modes first, by RMS amplitude over the series).
+#
+#   python modal_analysis.py openfoam/case_S --field U --components 0 1 --start 5
+#   python modal_analysis.py openfoam/case_S --field vorticity --components 2 --method randomized
+
+import argparse
+import json
+import os
+import shutil
+import time
+import numpy as np
+
+import openfoam_reader as foam
+
+# Patch types that must keep their type in a written field
+CONSTRAINED = ("symmetryPlane", "symmetry", "empty", "wedge", "cyclic", "cyclicAMI", "processor")
+
+# ========================================= #
+# Snapshot stream                           #
+# ========================================= #
+def snapshot_times(case_dir, field, start=None, end=None):
+
+    # Same selection as openfoam_reader.iter_snapshots, without loading the fields
+    return [e["time"] for e in foam.time_index(case_dir)
+            if field in e["fields"] and e["time"] > 0
+            and (start is None or e["time"] >= start) and (end is None or e["time"] <= end)]
+
+def stream(case_dir, field, components=None, start=None, end=None):
+
+    # Snapshot vectors (cells * components,), selected components only
+    for t, values in foam.iter_snapshots(case_dir, field, start, end):
+        if components is not None and values.ndim == 2:
+            values = values[:, components]
+        yield t, np.asarray(values, dtype=float).ravel()
+
+def blocks(snapshots, size):
+
+    block = []
+    for _, x in snapshots:
+        block.append(x)
+        if len(block) == size:
+            yield np.column_stack(block)
+            block = []
+    if block:
+        yield np.column_stack(block)
+
+# ========================================= #
+# Pass 1: mean                              #
+# ========================================= #
+def mean_field(snapshots):
+
+    total, squares, count = None, 0.0, 0
+    for _, x in snapshots:
+        total = x.copy() if total is None else total + x
+        squares += x @ x
+        count += 1
+
+    if count == 0:
+        raise ValueError("No snapshots selected")
+
+    mean = total / count
+    return mean, count, squares - count * (mean @ mean)
+
+# ========================================= #
+# Pass 2: POD                               #
+# ========================================= #
+def incremental_svd(snapshots, mean, rank, block_size=20):
+
+    # Rank-truncated SVD updated block by block (Brand 2002):
+    # [U S | X] = [U Q] K, K = [[S, U^T X], [0, R]] with X - U U^T X = Q R
+    U, S = None, None
+
+    for X in blocks(snapshots, block_size):
+        X = X - mean[:, None]
+
+        if U is None:
+            Q, R = np.linalg.qr(X)
+            u, S, _ = np.linalg.svd(R, full_matrices=False)
+            U = Q @ u
+        else:
+            M = U.T @ X
+            Q, R = np.linalg.qr(X - U @ M)
+            K = np.block([[np.diag(S), M], [np.zeros((R.shape[0], len(S))), R]])
+            u, S, _ = np.linalg.svd(K, full_matrices=False)
+            U = np.hstack([U, Q]) @ u
+
+        U, S = U[:, :rank], S[:rank]
+
+    return U, S
+
+def randomized_svd(make_stream, mean, n_snapshots, rank, oversample=10, power_iters=1, seed=0):
+
+    # Halko et al. (2011) with every product against the snapshot matrix done
+    # as one streamed pass: X @ W accumulates x_j W[j], X^T Q stacks Q^T x_j
+    rng = np.random.default_rng(seed)
+    size = min(rank + oversample, n_snapshots)
+
+    def times_matrix(W):
+        Y = 0.0
+        for j, (_, x) in enumerate(make_stream()):
+            Y = Y + np.outer(x - mean, W[j])
+        return Y
+
+    def transpose_times(Q):
+        return np.array([(x - mean) @ Q for _, x in make_stream()])
+
+    Y = times_matrix(rng.standard_normal((n_snapshots, size)))
+    for _ in range(power_iters):
+        Q = np.linalg.qr(Y)[0]
+        Z = np.linalg.qr(transpose_times(Q))[0]
+        Y = times_matrix(Z)
+
+    Q = np.linalg.qr(Y)[0]
+    B = transpose_times(Q).T
+    u, S, _ = np.linalg.svd(B, full_matrices=False)
+
+    return (Q @ u)[:, :rank], S[:rank]
+
+# ========================================= #
+# Pass 3: coefficients and DMD              #
+# ========================================= #
+def project(snapshots, mean, modes):
+
+    return np.array([modes.T @ (x - mean) for _, x in snapshots]).T
+
+def dmd(times, coefficients, rank=None):
+
+    # Projected DMD of the POD coefficients on a uniform time step (mean dt)
+    times = np.asarray(times)
+    dt = float(np.mean(np.diff(times)))
+    uniform = times[0] + dt * np.arange(len(times))
+    a = np.array([np.interp(uniform, times, c) for c in coefficients])
+
+    if rank is not None:
+        a = a[:rank]
+
+    X1, X2 = a[:, :-1], a[:, 1:]
+    A = X2 @ np.linalg.pinv(X1)
+    eigvals, W = np.linalg.eig(A)
+
+    # Amplitudes fitted to the whole series (Jovanovic et al. 2014), not only
+    # to the first snapshot, which favours spurious fast-decaying modes
+    V = np.vander(eigvals, a.shape[1], increasing=True)
+    P = (W.conj().T @ W) * (V @ V.conj().T).conj()
+    q = np.diag(V @ a.T @ W.conj()).conj()
+    amplitudes = np.linalg.solve(P, q)
+
+    # Leading modes: those sustained over the series first (decaying by less
+    # than a factor e and with at least one period in it; slow drifts and
+    # the start-up transient come out as damped or unresolved modes), each
+    # group by RMS amplitude over the series, |b| scaled by the mean of
+    # |lambda|^2k
+    duration = dt * (a.shape[1] - 1)
+    growth = np.log(np.abs(eigvals)) / dt
+    frequency = np.angle(eigvals) / (2 * np.pi * dt)
+    sustained = (growth * duration > -1) & (np.abs(frequency) * duration >= 1)
+    rms = np.abs(amplitudes) * np.sqrt(np.mean(np.abs(V)**2, axis=1))
+    order = np.lexsort((-rms, ~sustained))
+
+    return {
+        "dt": dt,
+        "eigenvalues": eigvals[order],
+        "vectors": W[:, order],
+        "frequency": frequency[order],
+        "growth_rate": growth[order],
+        "amplitude": np.abs(amplitudes[order]),
+        "rms_amplitude": rms[order],
+        "sustained": sustained[order],
+    }
+
+# ========================================= #
+# Output                                    #
+# ========================================= #
+def _mode_field(values, n_cells, components, template_class):
+
+    # Back to (cells,) or (cells, 3) with the unselected components at zero
+    values = values.reshape(n_cells, -1)
+    if template_class.startswith("volVector"):
+        full = np.zeros((n_cells, 3))
+        full[:, components if components is not None else slice(None)] = values
+        return full
+    return values[:, 0]
+
+def write_modes_case(case_dir, out_dir, field, components, result, n_modes):
+
+    # OpenFOAM case with constant/ and system/ from the source case:
+    # 0/<field>Mean, k/<field>Pod, k/<field>DmdRe, k/<field>DmdIm
+    for sub in ("constant", "system"):
+        target = os.path.join(out_dir, sub)
+        if not os.path.exists(target):
+            shutil.copytree(os.path.join(case_dir, sub), target)
+    open(os.path.join(out_dir, "case.foam"), "a").close()
+
+    n_cells = foam.n_cells(case_dir)
+    last = foam.time_index(case_dir)[-1]["name"]
+    template = foam.read_field(os.path.join(case_dir, last, field), boundary=False)
+
+    boundary = {}
+    for patch, entries in foam.read_boundary(case_dir).items():
+        kind = entries["type"] if entries["type"] in CONSTRAINED else "zeroGradient"
+        boundary[patch] = {"type": kind}
+
+    def write(time_name, name, values):
+        foam.write_field(os.path.join(out_dir, time_name, name), {
+            "class": template["class"], "object": name, "dimensions": template["dimensions"],
+            "internal_uniform": False, "internal": _mode_field(values, n_cells, components, template["class"]),
+            "boundary": boundary}, time_name)
+
+    write("0", field + "Mean", result["mean"])
+
+    dmd_modes = result["modes"][:, :result["dmd_vectors"].shape[0]] @ result["dmd_vectors"]
+    for k in range(n_modes):
+        name = str(k + 1)
+        write(name, field + "Pod", result["modes"][:, k])
+        if k < dmd_modes.shape[1]:
+            write(name, field + "DmdRe", dmd_modes[:, k].real)
+            write(name, field + "DmdIm", dmd_modes[:, k].imag)
+
+    return out_dir
+
+# ========================================= #
+# Driver                                    #
+# ========================================= #
+def modal_analysis(case_dir, field="U", components=(0, 1), rank=10, method="incremental",
+                   start=None, end=None, block_size=20, dmd_rank=None):
+
+    components = list(components) if components is not None else None
+    make_stream = lambda: stream(case_dir, field, components, start, end)
+    timings = {}
+
+    t0 = time.perf_counter()
+    mean, count, energy = mean_field(make_stream())
+    timings["mean"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    if method == "incremental":
+        modes, singular = incremental_svd(make_stream(), mean, rank, block_size)
+    elif method == "randomized":
+        modes, singular = randomized_svd(make_stream, mean, count, rank)
+    else:
+        raise ValueError(f"Unknown method '{method}', expected incremental or randomized")
+    timings["pod"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    times = snapshot_times(case_dir, field, start, end)
+    coefficients = project(make_stream(), mean, modes)
+    decomposition = dmd(times, coefficients, dmd_rank)
+    timings["projection_dmd"] = time.perf_counter() - t0
+
+    return {
+        "field": field, "components": components, "times": np.array(times),
+        "mean": mean, "modes": modes, "singular_values": singular,
+        "energy_fraction": singular**2 / energy, "coefficients": coefficients,
+        "dmd_frequency": decomposition["frequency"], "dmd_growth_rate": decomposition["growth_rate"],
+        "dmd_amplitude": decomposition["amplitude"], "dmd_rms_amplitude": decomposition["rms_amplitude"],
+        "dmd_sustained": decomposition["sustained"],
+        "dmd_eigenvalues": decomposition["eigenvalues"],
+        "dmd_vectors": decomposition["vectors"], "dmd_dt": decomposition["dt"],
+        "timings": timings,
+    }
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Streaming POD/DMD of an OpenFOAM case")
+    parser.add_argument("case_dir")
+    parser.add_argument("--field", default="U")
+    parser.add_argument("--components", nargs="+", type=int, default=[0, 1])
+    parser.add_argument("--rank", type=int, default=10)
+    parser.add_argument("--dmd-rank", type=int, default=None)
+    parser.add_argument("--method", choices=["incremental", "randomized"], default="incremental")
+    parser.add_argument("--block-size", type=int, default=20)
+    parser.add_argument("--start", type=float, default=None, help="skip the start-up transient")
+    parser.add_argument("--end", type=float, default=None)
+    parser.add_argument("--out", default=None, help="output directory (default <case>_modes)")
+    parser.add_argument("--write-modes", type=int, default=6, help="modes written as OpenFOAM fields")
+    args = parser.parse_args(argv)
+
+    out_dir = args.out or os.path.normpath(args.case_dir) + "_modes"
+    os.makedirs(out_dir, exist_ok=True)
+
+    result = modal_analysis(args.case_dir, args.field, args.components, args.rank, args.method,
+                            args.start, args.end, args.block_size, args.dmd_rank)
+
+    np.savez(os.path.join(out_dir, "modes.npz"), **{k: v for k, v in result.items() if k != "timings"})
+    write_modes_case(args.case_dir, out_dir, args.field, result["components"], result,
+                     min(args.write_modes, args.rank))
+
+    with open(os.path.join(out_dir, "summary.json"), "w") as f:
+        json.dump({"snapshots": len(result["times"]), "method": args.method, "timings": result["timings"],
+                   "energy_fraction": result["energy_fraction"].tolist(),
+                   "dmd_frequency": result["dmd_frequency"].tolist(),
+                   "dmd_amplitude": result["dmd_amplitude"].tolist(),
+                   "dmd_rms_amplitude": result["dmd_rms_amplitude"].tolist(),
+                   "dmd_sustained": result["dmd_sustained"].tolist()}, f, indent=2)
+
+    print(f"{len(result['times'])} snapshots of {args.field}, {args.method} POD "
+          f"(mean {result['timings']['mean']:.2f} s, POD {result['timings']['pod']:.2f} s, "
+          f"projection+DMD {result['timings']['projection_dmd']:.2f} s)")
+    print(f"{'mode':>4s} {'energy (%)':>10s} {'DMD f (Hz)':>10s} {'growth (1/s)':>12s} {'amplitude':>10s} "
+          f"{'RMS ampl.':>10s}  sustained")
+    for k in range(min(args.rank, 8)):
+        line = f"{k + 1:4d} {100 * result['energy_fraction'][k]:10.2f}"
+        # --dmd-rank may keep fewer DMD modes than POD modes
+        if k < len(result["dmd_frequency"]):
+            line += (f" {result['dmd_frequency'][k]:10.4f} {result['dmd_growth_rate'][k]:12.4f} "
+                     f"{result['dmd_amplitude'][k]:10.3g} {result['dmd_rms_amplitude'][k]:10.3g}  "
+                     f"{'yes' if result['dmd_sustained'][k] else 'no'}")
+        print(line)
+    print(f"Modes written to {out_dir}")
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,503 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2026 Diogo Silva, Frederico Afonso, Tomás Pereira
+
+# ============ Native reader for OpenFOAM ASCII time directories ========== #
+# ==== Authors: Diogo Silva, Frederico Afonso, Tomás Pereira ============== #
+# ======================================================================== #
+
+# Reads the fields written by the cylinder cases (U, p, phi, vorticity, ...)
+# without ParaView. Lists are parsed in bulk: the whole "( ... )" block is
+# split once and converted by numpy instead of going line by line.
+#
+# Internal fields are cached as <case>/.foam_cache/<time>/<field>.npy and
+# loaded memory-mapped, with <case>/.foam_cache/time_index.json listing the
+# time directories, so repeated analyses only parse each file once.
+#
+#   python openfoam_reader.py openfoam/case_S --fields U p vorticity
+
+import argparse
+import json
+import os
+import re
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+CACHE_DIR = ".foam_cache"
+
+# Components per value for each OpenFOAM list type
+COMPONENTS = {"scalar": 1, "vector": 3, "symmTensor": 6, "tensor": 9, "label": 1}
+
+_number = re.compile(rb"-?\d+(\.\d*)?([eE][-+]?\d+)?$")
+
+# ========================================= #
+# Low level parsing                         #
+# ========================================= #
+def _skip(buf, pos):
+
+    # Skip whitespace and C/C++ comments
+    n = len(buf)
+    while pos < n:
+        if buf[pos:pos + 1].isspace():
+            pos += 1
+        elif buf.startswith(b"//", pos):
+            pos = buf.find(b"\n", pos)
+            pos = n if pos < 0 else pos
+        elif buf.startswith(b"/*", pos):
+            pos = buf.find(b"*/", pos) + 2
+        else:
+            break
+    return pos
+
+def _word(buf, pos):
+
+    end = pos
+    while end < len(buf) and not buf[end:end + 1].isspace() and buf[end:end + 1] not in b";{}":
+        end += 1
+    return buf[pos:end].decode(), end
+
+def _values(chunk, components):
+
+    # "1 2 3" or "(1 2 3)\n(4 5 6)" -> float array of shape (n,) or (n, components)
+    data = np.array(chunk.translate(None, b"()").split(), dtype=float)
+    return data if components == 1 else data.reshape(-1, components)
+
+def parse_list(buf, pos, components):
+
+    # Parses "<n>\n(...)", "<n>(...)" or "<n>{value}" starting at pos, returns
+    # (array, position after the list)
+    pos = _skip(buf, pos)
+    count, pos = _word_until(buf, pos, b"({")
+    count = int(count)
+    pos = _skip(buf, pos)
+
+    if buf[pos:pos + 1] == b"{":
+        end = buf.index(b"}", pos)
+        value = _values(buf[pos + 1:end], components)
+        return np.repeat(value.reshape(1, -1), count, axis=0).squeeze(), end + 1
+
+    if count == 0:
+        end = buf.index(b")", pos)
+        shape = (0,) if components == 1 else (0, components)
+        return np.zeros(shape), end + 1
+
+    # The closing bracket of the list is the first ")" at the start of a line
+    end = buf.index(b"\n)", pos)
+    values = _values(buf[pos + 1:end], components)
+
+    if len(values) != count:
+        raise ValueError(f"Expected {count} values, found {len(values)}")
+
+    return values, end + 2
+
+def _word_until(buf, pos, stops):
+
+    end = pos
+    while end < len(buf) and buf[end:end + 1] not in stops and not buf[end:end + 1].isspace():
+        end += 1
+    return buf[pos:end], end
+
+def _entry_value(buf, pos):
+
+    # Value of a dictionary entry up to its ";" (or a sub-dictionary in braces)
+    pos = _skip(buf, pos)
+
+    if buf[pos:pos + 1] == b"{":
+        return parse_dictionary(buf, pos)
+
+    if buf.startswith(b"nonuniform", pos):
+        pos = _skip(buf, pos + len(b"nonuniform"))
+        list_type, pos = _word_until(buf, pos, b"\n ")
+        kind = list_type.decode()[5:-1] if list_type.startswith(b"List<") else "scalar"
+        values, pos = parse_list(buf, pos, COMPONENTS.get(kind, 1))
+        end = buf.index(b";", pos)
+        return {"uniform": False, "kind": kind, "value": values}, end + 1
+
+    end = buf.index(b";", pos)
+    raw = buf[pos:end].decode().strip()
+
+    if raw.startswith("uniform"):
+        value = _values(raw[len("uniform"):].encode(), 1)
+        value = value[0] if value.size == 1 else value
+        return {"uniform": True, "value": value}, end + 1
+
+    return raw, end + 1
+
+def parse_dictionary(buf, pos):
+
+    # Entries of "{ key value; ... }" starting at the opening brace
+    pos = buf.index(b"{", pos) + 1
+    entries = {}
+
+    while True:
+        pos = _skip(buf, pos)
+        if buf[pos:pos + 1] == b"}":
+            return entries, pos + 1
+
+        if buf[pos:pos + 1] == b'"':
+            # Quoted patch names / regular expressions may contain spaces
+            end = buf.index(b'"', pos + 1) + 1
+            key, pos = buf[pos:end].decode(), end
+        else:
+            key, pos = _word(buf, pos)
+
+        value, pos = _entry_value(buf, pos)
+        entries[key] = value
+
+def parse_header(buf):
+
+    start = buf.find(b"FoamFile")
+    if start < 0:
+        return {}, 0
+
+    header, end = parse_dictionary(buf, start)
+    return header, end
+
+# ========================================= #
+# Fields                                    #
+# ========================================= #
+def read_field(path, boundary=True):
+
+    with open(path, "rb") as f:
+        buf = f.read()
+
+    header, pos = parse_header(buf)
+    field = {"class": header.get("class", ""), "object": header.get("object", os.path.basename(path))}
+
+    pos = buf.index(b"dimensions", pos)
+    end = buf.index(b";", pos)
+    field["dimensions"] = buf[pos + len(b"dimensions"):end].decode().strip()
+
+    pos = buf.index(b"internalField", end) + len(b"internalField")
+    internal, pos = _entry_value(buf, pos)
+    field["internal_uniform"] = internal["uniform"]
+    field["internal"] = internal["value"]
+
+    if boundary:
+        bpos = buf.find(b"boundaryField", pos)
+        field["boundary"] = parse_dictionary(buf, bpos)[0] if bpos >= 0 else {}
+
+    return field
+
+# ========================================= #
+# Writing                                   #
+# ========================================= #
+BANNER = """/*--------------------------------*- C++ -*----------------------------------*\\
+  =========                 |
+  \\\\      /  F ield         | OpenFOAM: The Open Source CFD Toolbox
+   \\\\    /   O peration     | Website:  https://openfoam.org
+    \\\\  /    A nd           | Version:  11
+     \\\\/     M anipulation  |
+\\*---------------------------------------------------------------------------*/
+"""
+
+SEPARATOR = "// * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * //\n\n"
+FOOTER = "\n\n\n// ************************************************************************* //\n"
+
+def format_header(cls, location, obj):
+
+    return (BANNER + "FoamFile\n{\n    format      ascii;\n"
+            f"    class       {cls};\n    location    \"{location}\";\n    object      {obj};\n}}\n" + SEPARATOR)
+
+def format_list(values, precision=6):
+
+    # "nonuniform List<T>" body: count, then one value (or one "(x y z)") per line
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    kind = "scalar" if values.ndim == 1 else {v: k for k, v in COMPONENTS.items() if k != "label"}[values.shape[1]]
+
+    g = f"%.{precision}g"
+    row = g + "\n" if values.ndim == 1 else "(" + " ".join([g] * values.shape[1]) + ")\n"
+    body = (row * n) % tuple(values.ravel().tolist()) if n else ""
+
+    return f"nonuniform List<{kind}> \n{n}\n(\n{body})\n"
+
+def format_value(value, precision=6):
+
+    # Entry value as written by read_field: raw string, {"uniform", "value"} or a sub-dictionary
+    if isinstance(value, str):
+        return value
+
+    if "uniform" in value:
+        if not value["uniform"]:
+            return format_list(value["value"], precision)
+        v = np.atleast_1d(value["value"]).tolist()
+        g = f"%.{precision}g"
+        return "uniform " + (g % v[0] if len(v) == 1 else "(" + " ".join(g % x for x in v) + ")")
+
+    return format_dictionary(value, precision, indent=4)
+
+def format_dictionary(entries, precision=6, indent=0):
+
+    pad = " " * indent
+    lines = [pad + "{"]
+    for key, value in entries.items():
+        if isinstance(value, dict) and "uniform" not in value:
+            lines.append(f"{pad}    {key}")
+            lines.append(format_dictionary(value, precision, indent + 4))
+        else:
+            lines.append(f"{pad}    {key:<15s} {format_value(value, precision)};")
+    lines.append(pad + "}")
+
+    return "\n".join(lines)
+
+def write_field(path, field, location, precision=6):
+
+    # Inverse of read_field (with boundary=True)
+    internal = {"uniform": field["internal_uniform"], "value": field["internal"]}
+    text = (format_header(field["class"], location, field["object"])
+            + f"dimensions      {field['dimensions']};\n\n"
+            + f"internalField   {format_value(internal, precision)};\n\n"
+            + "boundaryField\n" + format_dictionary(field.get("boundary", {}), precision) + FOOTER)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+# ========================================= #
+# Mesh                                      #
+# ========================================= #
+def read_label_header(path):
+
+    # nCells etc. from the "note" of constant/polyMesh/owner
+    with open(path, "rb") as f:
+        head = f.read(4096)
+
+    note = re.search(rb'note\s+"([^"]*)"', head)
+    if not note:
+        return {}
+
+    return {k: int(v) for k, v in re.findall(r"(\w+):(\d+)", note.group(1).decode())}
+
+def read_boundary(case_dir):
+
+    # Patches of constant/polyMesh/boundary: {name: {"type", "nFaces", "startFace", ...}}
+    with open(os.path.join(case_dir, "constant", "polyMesh", "boundary"), "rb") as f:
+        buf = f.read()
+
+    pos = buf.index(b"(", _skip(buf, parse_header(buf)[1])) + 1
+    patches = {}
+
+    while True:
+        pos = _skip(buf, pos)
+        if buf[pos:pos + 1] == b")":
+            break
+        name, pos = _word(buf, pos)
+        entries, pos = parse_dictionary(buf, pos)
+        patches[name] = {k: int(v) if k in ("nFaces", "startFace") else v for k, v in entries.items()}
+
+    return patches
+
+def n_cells(case_dir):
+
+    return read_label_header(os.path.join(case_dir, "constant", "polyMesh", "owner")).get("nCells")
+
+def _mesh_file(case_dir, name):
+
+    with open(os.path.join(case_dir, "constant", "polyMesh", name), "rb") as f:
+        buf = f.read()
+    return buf, parse_header(buf)[1]
+
+def read_points(case_dir):
+
+    buf, pos = _mesh_file(case_dir, "points")
+    return parse_list(buf, pos, 3)[0]
+
+def read_labels(case_dir, name):
+
+    # owner / neighbour
+    buf, pos = _mesh_file(case_dir, name)
+    return parse_list(buf, pos, 1)[0].astype(np.int64)
+
+def read_faces(case_dir):
+
+    # Faces in CSR form: point labels of face i are indices[offsets[i]:offsets[i + 1]]
+    buf, pos = _mesh_file(case_dir, "faces")
+    pos = _skip(buf, pos)
+    count, pos = _word_until(buf, pos, b"(")
+    start = buf.index(b"(", pos) + 1
+    end = buf.index(b"\n)", start)
+
+    tokens = np.array(buf[start:end].replace(b"(", b" ").replace(b")", b" ").split(), dtype=np.int64)
+
+    # Every face is "n(p1 ... pn)": walk the sizes, or reshape if all faces are quads
+    if tokens.size % 5 == 0 and np.all(tokens[::5] == 4):
+        heads = np.arange(0, tokens.size, 5)
+    else:
+        heads = np.empty(int(count), dtype=np.int64)
+        p = 0
+        for i in range(len(heads)):
+            heads[i] = p
+            p += tokens[p] + 1
+
+    sizes = tokens[heads]
+    mask = np.ones(tokens.size, dtype=bool)
+    mask[heads] = False
+
+    offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+
+    return offsets, tokens[mask]
+
+def face_geometry(points, offsets, indices):
+
+    # Face centres and area vectors (triangle fan around the vertex average),
+    # area vectors point out of the owner cell as in OpenFOAM
+    sizes = np.diff(offsets)
+    starts = offsets[:-1]
+    vertex = points[indices]
+
+    centre = np.add.reduceat(vertex, starts, axis=0) / sizes[:, None]
+
+    nxt = np.arange(1, len(indices) + 1)
+    nxt[offsets[1:] - 1] = starts
+    face_of = np.repeat(np.arange(len(sizes)), sizes)
+
+    a = vertex - centre[face_of]
+    b = points[indices[nxt]] - centre[face_of]
+    area = 0.5 * np.add.reduceat(np.cross(a, b), starts, axis=0)
+
+    return centre, area
+
+def cell_centres(case_dir):
+
+    # Average of the face centres of each cell, good enough for probing
+    offsets, indices = read_faces(case_dir)
+    centre, _ = face_geometry(read_points(case_dir), offsets, indices)
+    owner = read_labels(case_dir, "owner")
+    neighbour = read_labels(case_dir, "neighbour")
+    cells = n_cells(case_dir) or int(owner.max()) + 1
+
+    total = np.zeros((cells, 3))
+    count = np.zeros(cells)
+    np.add.at(total, owner, centre)
+    np.add.at(count, owner, 1)
+    np.add.at(total, neighbour, centre[:len(neighbour)])
+    np.add.at(count, neighbour, 1)
+
+    return total / count[:, None]
+
+# ========================================= #
+# Time directories                          #
+# ========================================= #
+def list_times(case_dir):
+
+    times = []
+    for name in os.listdir(case_dir):
+        path = os.path.join(case_dir, name)
+        if os.path.isdir(path) and _number.match(name.encode()):
+            times.append((float(name), name))
+
+    return sorted(times)
+
+def time_index(case_dir, refresh=False):
+
+    # [{"time": 0.048, "name": "0.0484167", "fields": ["U", "p", ...]}, ...]
+    cache = os.path.join(case_dir, CACHE_DIR)
+    index_path = os.path.join(cache, "time_index.json")
+
+    names = [name for _, name in list_times(case_dir)]
+
+    if not refresh and os.path.exists(index_path):
+        with open(index_path) as f:
+            index = json.load(f)
+        if [entry["name"] for entry in index] == names:
+            return index
+
+    index = []
+    for value, name in list_times(case_dir):
+        tdir = os.path.join(case_dir, name)
+        fields = sorted(f for f in os.listdir(tdir) if os.path.isfile(os.path.join(tdir, f)))
+        index.append({"time": value, "name": name, "fields": fields})
+
+    os.makedirs(cache, exist_ok=True)
+    with open(index_path, "w") as f:
+        json.dump(index, f, indent=1)
+
+    return index
+
+def _time_name(case_dir, time):
+
+    # Accepts the directory name or a float time value
+    if isinstance(time, str):
+        return time
+
+    times = list_times(case_dir)
+    values = np.array([t for t, _ in times])
+    return times[int(np.argmin(np.abs(values - time)))][1]
+
+def load_field(case_dir, time, field, cache=True, mmap=True):
+
+    # Internal field of one time directory, from the .npy cache when valid
+    name = _time_name(case_dir, time)
+    source = os.path.join(case_dir, name, field)
+    cached = os.path.join(case_dir, CACHE_DIR, name, field + ".npy")
+
+    if cache and os.path.exists(cached) and os.path.getmtime(cached) >= os.path.getmtime(source):
+        return np.load(cached, mmap_mode="r" if mmap else None)
+
+    parsed = read_field(source, boundary=False)
+    values = parsed["internal"]
+
+    if parsed["internal_uniform"]:
+        cells = n_cells(case_dir)
+        values = np.broadcast_to(values, (cells,) + np.shape(values)).copy() if cells else np.asarray(values)
+
+    if cache:
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        np.save(cached, values)
+        if mmap:
+            return np.load(cached, mmap_mode="r")
+
+    return values
+
+def build_cache(case_dir, fields=("U", "p", "vorticity"), workers=4):
+
+    # Parses every (time, field) pair once; file reads and numpy conversions
+    # release the GIL, so threads overlap well
+    index = time_index(case_dir, refresh=True)
+    jobs = [(entry["name"], field) for entry in index for field in fields if field in entry["fields"]]
+
+    def work(job):
+        load_field(case_dir, job[0], job[1], cache=True, mmap=True)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(work, jobs))
+
+    return len(jobs)
+
+def iter_snapshots(case_dir, field, start=None, end=None, skip_initial=True):
+
+    # (time, values) for every time directory holding the field
+    for entry in time_index(case_dir):
+        if field not in entry["fields"]:
+            continue
+        if skip_initial and entry["time"] == 0.0:
+            continue
+        if (start is not None and entry["time"] < start) or (end is not None and entry["time"] > end):
+            continue
+        yield entry["time"], load_field(case_dir, entry["name"], field)
+
+if __name__ == "__main__":
+
+    import time as timer
+
+    parser = argparse.ArgumentParser(description="Parse OpenFOAM time directories into a memory-mapped .npy cache")
+    parser.add_argument("case_dir")
+    parser.add_argument("--fields", nargs="+", default=["U", "p", "vorticity"])
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    t0 = timer.perf_counter()
+    count = build_cache(args.case_dir, args.fields, args.workers)
+    t_build = timer.perf_counter() - t0
+
+    index = time_index(args.case_dir)
+    last = index[-1]["name"]
+
+    t0 = timer.perf_counter()
+    for field in args.fields:
+        load_field(args.case_dir, last, field)
+    t_load = timer.perf_counter() - t0
+
+    print(f"Cached {count} fields from {len(index)} time directories in {t_build:.2f} s")
+    print(f"Loading one snapshot ({', '.join(args.fields)}) from the cache: {t_load * 1000:.2f} ms")
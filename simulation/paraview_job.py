@@ -1,5 +1,8 @@
 from paraview.simple import *
+import argparse
+import json
 import os
+import sys
 
 # ==========================================
 # ⚙️ CONFIGURAÇÕES (Ajusta aqui se precisares)
@@ -7,13 +10,91 @@ import os
 PVD_PATH = "_vtk/tsunami_1755.pvd"
 
 # Exagero Vertical: Aumenta para veres a onda a subir paredes
+# (x/y estão em graus, a elevação em metros: o warp usa
+# WARP_SCALE / METERS_PER_DEGREE, ou seja 1500x em relação ao plano;
+# antes o fator 1500 era aplicado diretamente aos metros, ~1.7e8x)
 WARP_SCALE = 1500.0
+METERS_PER_DEGREE = 111320.0
 
 # Cores da Onda (Em metros)
 MIN_WAVE = -2.0   # Cava da onda (Azul escuro)
 MAX_WAVE = 10.0   # Crista da onda (Vermelho vivo)
 
-def create_viz():
+# Água: ignoramos zonas muito rasas para limpar o visual
+MIN_DEPTH = 0.1
+
+# amr_cover_level das células sem patch mais fino por cima (parse_to_VTK.py)
+UNCOVERED = 99
+
+def _has_point_array(source, name):
+    info = source.GetPointDataInformation()
+    return bool(info and info.GetArray(name))
+
+def _threshold(source, array, lower, upper):
+    # Threshold aplicado bloco a bloco (sem MergeBlocks), compatível com as
+    # versões antigas (ThresholdRange) e novas (Lower/UpperThreshold) do ParaView
+    thresh = Threshold(Input=source)
+    thresh.Scalars = ['POINTS', array]
+    if hasattr(thresh, 'LowerThreshold'):
+        thresh.LowerThreshold = lower
+        thresh.UpperThreshold = upper
+        if hasattr(thresh, 'ThresholdMethod'):
+            thresh.ThresholdMethod = 'Between'
+    else:
+        thresh.ThresholdRange = [lower, upper]
+    return thresh
+
+# ==========================================
+# 🔍 NÍVEL DE DETALHE (LOD)
+# ==========================================
+def load_index(pvd_path):
+    # Nível e bbox de cada patch, escrito pelo parse_to_VTK.py ao lado do .pvd
+    path = os.path.splitext(pvd_path)[0] + "_index.json"
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def domain_extent(index):
+    # Extensão [x0, x1, y0, y1] dos patches do nível mais grosso
+    coarsest = min(int(l) for l in index["levels"])
+    boxes = [p["bbox"] for fr in index["frames"] for p in fr["patches"] if p["level"] == coarsest]
+    return [min(b[0] for b in boxes), max(b[1] for b in boxes),
+            min(b[2] for b in boxes), max(b[3] for b in boxes)]
+
+def select_level(index, extent, pixels):
+    # Nível mais fino cuja célula ainda ocupa pelo menos um píxel: os
+    # seguintes são sub-píxel e não mudam a imagem
+    pixel = (extent[1] - extent[0]) / pixels
+    levels = sorted(int(l) for l in index["levels"])
+    visible = [l for l in levels if index["levels"][str(l)]["dx"] >= pixel]
+    return visible[-1] if visible else levels[0]
+
+def write_lod_pvd(pvd_path, index, max_level, extent):
+    # .pvd só com os patches de nível <= max_level que intersectam a extensão
+    lod_path = os.path.splitext(pvd_path)[0] + f"_lod{max_level}.pvd"
+    x0, x1, y0, y1 = extent
+    loaded = total = 0
+    with open(lod_path, "w") as f:
+        f.write('<?xml version="1.0"?>\n')
+        f.write('<VTKFile type="Collection" version="0.1">\n')
+        f.write('  <Collection>\n')
+        for frame in index["frames"]:
+            total += len(frame["patches"])
+            part = 0
+            for patch in frame["patches"]:
+                b = patch["bbox"]
+                if patch["level"] > max_level or b[1] < x0 or b[0] > x1 or b[3] < y0 or b[2] > y1:
+                    continue
+                f.write(f'    <DataSet timestep="{frame["time"]}" part="{part}" level="{patch["level"]}" '
+                        f'file="{patch["file"]}"/>\n')
+                part += 1
+            loaded += part
+        f.write('  </Collection>\n')
+        f.write('</VTKFile>\n')
+    return lod_path, loaded, total
+
+def create_viz(pvd_path=PVD_PATH, view_size=(1280, 720), extent=None, pixels=None, all_levels=False):
     # ----------------------------------------
     # 1. PREPARAR O AMBIENTE
     # ----------------------------------------
@@ -23,65 +104,91 @@ def create_viz():
         Delete(f)
 
     view = GetActiveViewOrCreate('RenderView')
-    view.ViewSize = [1280, 720]
+    view.ViewSize = list(view_size)
     view.OrientationAxesVisibility = 1
 
     # Fundo Gradiente "Cinemático"
-    view.BackgroundColorMode = 'Gradient'
+    if hasattr(view, 'BackgroundColorMode'):
+        view.BackgroundColorMode = 'Gradient'
+    elif hasattr(view, 'UseGradientBackground'):
+        view.UseGradientBackground = 1
     view.Background = [0.15, 0.15, 0.25]  # Azul acinzentado escuro
     view.Background2 = [0.05, 0.05, 0.05] # Quase preto no topo
 
-    if not os.path.exists(PVD_PATH):
-        print(f"❌ ERRO: Ficheiro não encontrado: {PVD_PATH}")
-        return
+    if not os.path.exists(pvd_path):
+        print(f"❌ ERRO: Ficheiro não encontrado: {pvd_path}")
+        return None
+
+    # Só os níveis que se veem: com extent x0..x1 em `pixels` píxeis, os
+    # níveis cuja célula é menor que um píxel não são lidos
+    index = load_index(pvd_path)
+    max_level = None
+    if index and not all_levels:
+        visible = extent or domain_extent(index)
+        max_level = select_level(index, visible, pixels or view_size[0])
+        pvd_path, loaded, total = write_lod_pvd(pvd_path, index, max_level, visible)
+        print(f"🔍 Níveis 1..{max_level}: {loaded} de {total} patches")
 
     print("🌊 A carregar dados...")
-    data_source = PVDReader(FileName=PVD_PATH)
+    data_source = PVDReader(FileName=pvd_path)
     data_source.UpdatePipeline()
-"""
-    # USAR MERGE BLOCKS (Mais robusto que CleanToGrid para GeoClaw)
-    # Isto funde as várias caixas do AMR numa só malha
-    merged = MergeBlocks(Input=data_source)
 
     # ----------------------------------------
-    # 2. CAMADA DA TERRA (Cinzenta e Sólida)
+    # 2. APENAS O NÍVEL AMR MAIS FINO
+    # ----------------------------------------
+    # Cada patch é um bloco; o Threshold corre bloco a bloco e remove as
+    # células cobertas por um patch mais fino já carregado
+    # (amr_cover_level <= max_level), por isso o nível mais fino carregado
+    # fica inteiro mesmo que haja níveis ainda mais finos por cima
+    finest = data_source
+    if _has_point_array(data_source, 'amr_cover_level'):
+        finest = _threshold(data_source, 'amr_cover_level', (max_level or UNCOVERED - 1) + 0.5, 99999.0)
+    elif _has_point_array(data_source, 'amr_covered') and max_level is None:
+        finest = _threshold(data_source, 'amr_covered', 0.0, 0.5)
+    else:
+        print("⚠️ amr_cover_level não existe (VTK antigo), a desenhar todos os níveis")
+
+    # Batimetria: se não foi escrita, b = eta - h
+    terrain = finest
+    if not _has_point_array(data_source, 'bathymetry'):
+        terrain = Calculator(Input=finest)
+        terrain.ResultArrayName = 'bathymetry'
+        terrain.Function = 'surface_elevation - water_depth'
+
+    warp_factor = WARP_SCALE / METERS_PER_DEGREE
+
+    # ----------------------------------------
+    # 3. CAMADA DA TERRA (Cinzenta e Sólida)
     # ----------------------------------------
     print("🌍 A construir Portugal...")
 
     # Filtro: Apenas Terra (Batimetria > 0)
-    thresh_terra = Threshold(Input=merged)
-    thresh_terra.Scalars = ['POINTS', 'bathymetry']
-    thresh_terra.LowerThreshold = 0.0
-    thresh_terra.UpperThreshold = 99999.0
+    thresh_terra = _threshold(terrain, 'bathymetry', 0.0, 99999.0)
 
     # Dar volume (Exagero vertical)
     warp_terra = WarpByScalar(Input=thresh_terra)
     warp_terra.Scalars = ['POINTS', 'bathymetry']
-    warp_terra.ScaleFactor = WARP_SCALE
+    warp_terra.ScaleFactor = warp_factor
 
     # Visualização
     disp_terra = Show(warp_terra, view)
     disp_terra.Representation = 'Surface'
-    disp_terra.MapScalars = 0  # Desligar cores automáticas
+    ColorBy(disp_terra, None)  # Desligar cores automáticas
     disp_terra.DiffuseColor = [0.6, 0.55, 0.5] # Cor de "Terra Seca" (Bege/Cinzento)
     disp_terra.Specular = 0.0  # Sem brilho (mate)
 
     # ----------------------------------------
-    # 3. CAMADA DA ÁGUA (Colorida e Brilhante)
+    # 4. CAMADA DA ÁGUA (Colorida e Brilhante)
     # ----------------------------------------
     print("🌊 A encher o oceano...")
 
-    # Filtro: Apenas Água (Profundidade > 0.1m)
-    # Ignoramos zonas muito rasas para limpar o visual
-    thresh_agua = Threshold(Input=merged)
-    thresh_agua.Scalars = ['POINTS', 'water_depth']
-    thresh_agua.LowerThreshold = 0.1
-    thresh_agua.UpperThreshold = 99999.0
+    # Filtro: Apenas Água (Profundidade > MIN_DEPTH)
+    thresh_agua = _threshold(finest, 'water_depth', MIN_DEPTH, 99999.0)
 
     # Dar volume (Atenção: Usamos surface_elevation para a água ficar por cima da terra)
     warp_agua = WarpByScalar(Input=thresh_agua)
     warp_agua.Scalars = ['POINTS', 'surface_elevation']
-    warp_agua.ScaleFactor = WARP_SCALE
+    warp_agua.ScaleFactor = warp_factor
 
     # Visualização
     disp_agua = Show(warp_agua, view)
@@ -96,6 +203,8 @@ def create_viz():
     # FIXAR O INTERVALO DE CORES (CRÍTICO!)
     # Isto garante que a água parada é branca/azul clara e o Tsunami é Vermelho
     lut.RescaleTransferFunction(MIN_WAVE, MAX_WAVE)
+    if hasattr(lut, 'AutomaticRescaleRangeMode'):
+        lut.AutomaticRescaleRangeMode = 'Never'
 
     # Estilo "Líquido"
     disp_agua.Opacity = 0.85      # Ligeira transparência
@@ -103,15 +212,19 @@ def create_viz():
     disp_agua.SpecularPower = 80.0
 
     # ----------------------------------------
-    # 4. FINALIZAR
+    # 5. FINALIZAR
     # ----------------------------------------
     # Barra de cores
+    disp_agua.SetScalarBarVisibility(view, True)
     bar = GetScalarBar(lut, view)
     bar.Title = "Altura da Onda (m)"
     bar.ComponentTitle = ""
-    bar.WindowLocation = 'LowerRightCorner'
+    bar.WindowLocation = 'Lower Right Corner'
 
-    view.ResetCamera()
+    if extent:
+        view.ResetCamera(extent[0], extent[1], extent[2], extent[3], 0.0, 0.0)
+    else:
+        view.ResetCamera()
     GetActiveCamera().Elevation(20) # Levantar a câmara um pouco
 
     # Atualizar animação
@@ -119,7 +232,40 @@ def create_viz():
 
     Render()
     print("✅ Visualização Pronta! Carrega no PLAY.")
-    """
+    return view
+
+def save_animation(view, output, frame_rate=10, stride=1):
+    # .avi/.ogv -> vídeo; .png/.jpg -> uma imagem por passo (nome_0000.png, ...)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    options = {'ImageResolution': view.ViewSize, 'FrameRate': frame_rate}
+    if stride > 1:
+        options['FrameStride'] = stride
+    SaveAnimation(output, view, **options)
+    print(f"🎬 Animação gravada: {output}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Renderização dos frames GeoClaw (pvpython/pvbatch)")
+    parser.add_argument("--pvd", default=PVD_PATH)
+    parser.add_argument("--animation", default=None, help="ex.: results/tsunami.avi ou results/frames/tsunami.png")
+    parser.add_argument("--size", type=int, nargs=2, default=[1280, 720])
+    parser.add_argument("--frame-rate", type=int, default=10)
+    parser.add_argument("--stride", type=int, default=1, help="renderizar um em cada n passos")
+    parser.add_argument("--extent", type=float, nargs=4, default=None, metavar=("X0", "X1", "Y0", "Y1"),
+                        help="região visível em graus (por omissão o domínio todo)")
+    parser.add_argument("--pixels", type=int, default=None, help="píxeis na largura da região (por omissão a largura da janela)")
+    parser.add_argument("--all-levels", action="store_true", help="carregar todos os níveis AMR")
+    args = parser.parse_args(argv)
+
+    view = create_viz(args.pvd, args.size, args.extent, args.pixels, args.all_levels)
+    if view is None:
+        return 1
+
+    if args.animation:
+        save_animation(view, args.animation, args.frame_rate, args.stride)
+    return 0
 
 if __name__ == "__main__":
-    create_viz()
+    # No Python Shell do ParaView não há argumentos: só constrói a visualização
+    status = main(sys.argv[1:])
+    if status:
+        sys.exit(status)
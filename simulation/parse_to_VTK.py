@@ -6,73 +6,230 @@
 # =============   Parse GeoClaw AMR output to VTK format   ================= #
 # ========================================================================= #
 
+import argparse
+import json
 import numpy as np
 import os
-import sys
 from pathlib import Path
 from pyevtk.hl import gridToVTK
+from amr_frame import AmrFrame, DerivedBuffers, GRAVITY
+from inundation import InundationTracker
+from tracing import Tracer, NULL_TRACER
+
+class FrameStatistics:
+
+    # Running reductions over the patches of a frame, so the statistics never
+    # need the concatenated arrays of the whole frame
+    def __init__(self, dry_tolerance=1e-3, sea_level=0.0):
+        self.dry_tolerance = dry_tolerance
+        self.sea_level = sea_level
+        self.max_eta = self.min_eta = self.max_crest = None
+        self.max_inundation_depth = self.max_runup_height = None
+        self.max_vel = self.max_flux = self.max_froude = None
+        self.sum_eta_pos, self.n_eta_pos = 0.0, 0
+        self.sum_u, self.sum_v, self.n_wet = 0.0, 0.0, 0
+        self.n_inundated = 0
+
+    @staticmethod
+    def _max(current, values):
+        if values.size == 0:
+            return current
+        m = np.max(values)
+        return m if current is None else max(current, m)
+
+    @staticmethod
+    def _min(current, values):
+        if values.size == 0:
+            return current
+        m = np.min(values)
+        return m if current is None else min(current, m)
+
+    def add(self, h, b, eta, vel_mag, u, v, derived=None):
+
+        # derived: the velocity_fields arrays of the patch (wet, flux,
+        # froude), computed here from h and vel_mag if not given
+        if derived is None:
+            wet = h > self.dry_tolerance
+            froude = np.zeros_like(h)
+            np.divide(vel_mag, np.sqrt(GRAVITY * h), out=froude, where=wet)
+            derived = {"wet": wet, "flux": h * (vel_mag**2), "froude": froude}
+        wet = derived["wet"]
+
+        land = b > 0
+        ocean_wet = wet & ~land
+        positive = wet & (eta > self.sea_level)
+
+        eta_wet = eta[wet]
+        self.max_eta = self._max(self.max_eta, eta_wet)
+        self.min_eta = self._min(self.min_eta, eta_wet)
+        self.max_crest = self._max(self.max_crest, eta[ocean_wet] - self.sea_level)
+
+        self.sum_eta_pos += np.sum(eta[positive])
+        self.n_eta_pos += np.count_nonzero(positive)
+
+        # Every wet land cell, at any elevation (the inundation tracker only
+        # keeps the history of those below its max_elevation)
+        inundated = wet & land
+        self.max_inundation_depth = self._max(self.max_inundation_depth, h[inundated])
+        self.max_runup_height = self._max(self.max_runup_height, b[inundated])
+        self.n_inundated += np.count_nonzero(inundated)
+
+        self.max_vel = self._max(self.max_vel, vel_mag[wet])
+        self.max_flux = self._max(self.max_flux, derived["flux"][wet])
+        self.max_froude = self._max(self.max_froude, derived["froude"][wet])
+
+        self.sum_u += np.sum(u[wet])
+        self.sum_v += np.sum(v[wet])
+        self.n_wet += np.count_nonzero(wet)
+
+    def write(self, stats_dir, dx, dy, step, sim_time):
+
+        stat_path = os.path.join(stats_dir, f"stats_step_{step:04d}.txt")
+        value = lambda x: x if x is not None else 0.0
+
+        max_eta = value(self.max_eta)
+        min_eta = value(self.min_eta)
+        max_crest = value(self.max_crest)
+        mean_eta_pos = self.sum_eta_pos / self.n_eta_pos if self.n_eta_pos else 0.0
+
+        max_inundation_depth = value(self.max_inundation_depth)
+        max_runup_height = value(self.max_runup_height)
+
+        # Cell area of the patch given (the last one of the frame)
+        area_per_cell = dx * dy
+        total_area_inundated = self.n_inundated * area_per_cell
+
+        max_vel = value(self.max_vel)
+        max_flux = value(self.max_flux)
+        max_froude = value(self.max_froude)
+
+        mean_u = self.sum_u / self.n_wet if self.n_wet else 0.0
+        mean_v = self.sum_v / self.n_wet if self.n_wet else 0.0
+
+        with open(stat_path, "w") as f:
+            f.write("# ================================================= #\n")
+            f.write(f"#           Statistics for 1755 - Step {step:04d}         #\n")
+            f.write(f"#           Sim Time: {sim_time/60:10.2f} min             #\n")
+            f.write("# ================================================= #\n\n")
+            f.write(f"--- ELEVATION & WAVES ---\n")
+            f.write(f"Absolute Max Eta (Wet):   {max_eta:10.4f} m\n")
+            f.write(f"Max Wave Crest (Ocean):   {max_crest:10.4f} m\n")
+            f.write(f"Max Wave Trough (Eta):    {min_eta:10.4f} m\n")
+            f.write(f"Mean Positive Elevation:  {mean_eta_pos:10.4f} m\n\n")
+            f.write(f"--- INUNDATION (Land) ---\n")
+            f.write(f"Max Flow Depth (h):       {max_inundation_depth:10.4f} m\n")
+            f.write(f"Max Run-up Elevation (B): {max_runup_height:10.4f} m\n")
+            f.write(f"Total Area Inundated:     {total_area_inundated:10.4e} m^2\n\n")
+            f.write(f"--- DYNAMICS ---\n")
+            f.write(f"Max Velocity:             {max_vel:10.4f} m/s\n")
+            f.write(f"Max Momentum Flux:        {max_flux:10.4f} m^3/s^2\n")
+            f.write(f"Max Froude Number:        {max_froude:10.4f}\n")
+            f.write(f"Mean Direction (U, V):    {mean_u:.3f}, {mean_v:.3f}\n")
+
+        return stat_path
 
 def write_statistics(stats_dir, h, b, eta, vel_mag, u, v, dx, dy, step, sim_time):
-    stat_path = os.path.join(stats_dir, f"stats_step_{step:04d}.txt")
-    dry_tolerance = 1e-3
-    sea_level = 0.0
-
-    wet = h > dry_tolerance
-    land = b > 0
-    inundated = wet & land
-    ocean_wet = wet & ~land
-    max_eta = np.max(eta[wet]) if np.any(wet) else 0.0
-    min_eta = np.min(eta[wet]) if np.any(wet) else 0.0
-    max_crest = np.max(eta[ocean_wet] - sea_level) if np.any(ocean_wet) else 0.0
-
-    mean_eta_pos = np.mean(eta[wet & (eta > sea_level)]) if np.any(wet & (eta > sea_level)) else 0.0
-
-    max_inundation_depth = np.max(h[inundated]) if np.any(inundated) else 0.0
-    max_runup_height = np.max(b[inundated]) if np.any(inundated) else 0.0
-
-    area_per_cell = dx * dy
-    total_area_inundated = np.sum(inundated) * area_per_cell
-
-    max_vel = np.max(vel_mag[wet]) if np.any(wet) else 0.0
-
-    momentum_flux = h * (vel_mag**2)
-    max_flux = np.max(momentum_flux[wet]) if np.any(wet) else 0.0
-
-    mean_u = np.mean(u[wet]) if np.any(wet) else 0.0
-    mean_v = np.mean(v[wet]) if np.any(wet) else 0.0
-
-    with open(stat_path, "w") as f:
-        f.write("# ================================================= #\n")
-        f.write(f"#           Statistics for 1755 - Step {step:04d}         #\n")
-        f.write(f"#           Sim Time: {sim_time/60:10.2f} min             #\n")
-        f.write("# ================================================= #\n\n")
-        f.write(f"--- ELEVATION & WAVES ---\n")
-        f.write(f"Absolute Max Eta (Wet):   {max_eta:10.4f} m\n")
-        f.write(f"Max Wave Crest (Ocean):   {max_crest:10.4f} m\n")
-        f.write(f"Max Wave Trough (Eta):    {min_eta:10.4f} m\n")
-        f.write(f"Mean Positive Elevation:  {mean_eta_pos:10.4f} m\n\n")
-        f.write(f"--- INUNDATION (Land) ---\n")
-        f.write(f"Max Flow Depth (h):       {max_inundation_depth:10.4f} m\n")
-        f.write(f"Max Run-up Elevation (B): {max_runup_height:10.4f} m\n")
-        f.write(f"Total Area Inundated:     {total_area_inundated:10.4e} m^2\n\n")
-        f.write(f"--- DYNAMICS ---\n")
-        f.write(f"Max Velocity:             {max_vel:10.4f} m/s\n")
-        f.write(f"Max Momentum Flux:        {max_flux:10.4f} m^3/s^2\n")
-        f.write(f"Mean Direction (U, V):    {mean_u:.3f}, {mean_v:.3f}\n")
-
-def write_pvd(vtk_dir, timesteps_dict):
-    pvd_path = os.path.join(vtk_dir, "tsunami_1755.pvd")
+    stats = FrameStatistics()
+    stats.add(h, b, eta, vel_mag, u, v)
+    return stats.write(stats_dir, dx, dy, step, sim_time)
+
+# amr_cover_level of cells that no finer patch covers
+UNCOVERED = 99
+
+def write_pvd(vtk_dir, timesteps_dict, name="tsunami_1755.pvd"):
+    pvd_path = os.path.join(vtk_dir, name)
     with open(pvd_path, "w") as f:
         f.write('<?xml version="1.0"?>\n')
         f.write('<VTKFile type="Collection" version="0.1">\n')
         f.write('  <Collection>\n')
         for t in sorted(timesteps_dict.keys()):
-            for vtr_file in timesteps_dict[t]:
-                f.write(f'    <DataSet timestep="{t}" file="{vtr_file}"/>\n')
+            # One part per patch, so the PVD reader loads every patch of a
+            # time step as a block of one multiblock dataset
+            for part, patch in enumerate(timesteps_dict[t]):
+                f.write(f'    <DataSet timestep="{t}" part="{part}" level="{patch["level"]}" '
+                        f'file="{patch["file"]}"/>\n')
         f.write('  </Collection>\n')
         f.write('</VTKFile>\n')
 
-def geoclaw_to_vtk(stats_dir="_stats", output_dir="_output", vtk_dir="_vtk"):
+def write_index(vtk_dir, timesteps_dict, name="tsunami_1755_index.json"):
+
+    # Level and bounding box of every patch, for level-of-detail loading
+    levels = {}
+    frames = []
+    for t in sorted(timesteps_dict.keys()):
+        frames.append({"time": t, "patches": timesteps_dict[t]})
+        for patch in timesteps_dict[t]:
+            levels.setdefault(str(patch["level"]), {"dx": patch["dx"], "dy": patch["dy"]})
+
+    with open(os.path.join(vtk_dir, name), "w") as f:
+        json.dump({"levels": levels, "frames": frames}, f)
+
+# Largest change of b (m) still taken as the same bathymetry; eta - h
+# differs from frame to frame by rounding only
+BATHYMETRY_TOLERANCE = 1e-6
+
+class StaticBathymetry:
+
+    # Whether the bathymetry of each patch geometry (level, size, origin,
+    # spacing) is the same as in the last frame; a patch whose b moved (dtopo
+    # still deforming the seafloor) is not static until it settles. Only a
+    # fingerprint of b is kept per geometry (min, max, mean, RMS), not the
+    # array, so memory stays at one patch
+    def __init__(self, tolerance=BATHYMETRY_TOLERANCE):
+        self.tolerance = tolerance
+        self._geometries = {}
+        self._seen = set()
+
+    @staticmethod
+    def fingerprint(b):
+        return np.array([b.min(), b.max(), b.mean(), np.sqrt(np.mean(b * b))]) if b.size else np.zeros(4)
+
+    def is_static(self, grid, b):
+
+        key = (grid["level"], grid["mx"], grid["my"], float(grid["x"][0]), float(grid["y"][0]),
+               grid["dx"], grid["dy"])
+        self._seen.add(key)
+        previous = self._geometries.get(key)
+        current = self._geometries[key] = self.fingerprint(b)
+
+        # New geometry: taken as static (regrid, not a moving seafloor)
+        return previous is None or np.max(np.abs(current - previous)) <= self.tolerance
+
+    def end_frame(self):
+
+        # Geometries gone after a regrid are dropped
+        self._geometries = {k: v for k, v in self._geometries.items() if k in self._seen}
+        self._seen = set()
+
+def patch_coverage(g, grids):
+
+    # Level of the coarsest finer patch lying over each cell of g (points in
+    # the VTK files), UNCOVERED if none. The renderer keeps cover level > L to
+    # show only the finest level at each location when levels <= L are loaded.
+    # Only the patch headers (level, x, y, dx, dy) of grids are used
+    cover = np.full((len(g["x"]), len(g["y"])), UNCOVERED, dtype=np.uint8)
+    for f in grids:
+        if f["level"] <= g["level"]:
+            continue
+
+        x0, x1 = f["x"][0] - 0.5 * f["dx"], f["x"][-1] + 0.5 * f["dx"]
+        y0, y1 = f["y"][0] - 0.5 * f["dy"], f["y"][-1] + 0.5 * f["dy"]
+        i0, i1 = np.searchsorted(g["x"], [x0, x1])
+        j0, j1 = np.searchsorted(g["y"], [y0, y1])
+        region = cover[i0:i1, j0:j1]
+        np.minimum(region, f["level"], out=region)
+
+    return cover
+
+def amr_coverage(grids):
+    return [patch_coverage(g, grids) for g in grids]
+
+def geoclaw_to_vtk(stats_dir="_stats", output_dir="_output", vtk_dir="_vtk", tracer=NULL_TRACER,
+                   inline_bathymetry=True):
+
+    # Bathymetry is written into every .vtr (the saved ParaView states in
+    # _vtk_states read it); inline_bathymetry=False leaves it out, b = eta - h
+    # being rebuilt by paraview_job
 
     os.makedirs(stats_dir, exist_ok=True)
     os.makedirs(vtk_dir, exist_ok=True)
@@ -84,163 +241,375 @@ def geoclaw_to_vtk(stats_dir="_stats", output_dir="_output", vtk_dir="_vtk"):
         return
 
     timesteps_collection = {}
+    bathymetry = StaticBathymetry()
+    inundation = InundationTracker()
 
     for step, fort_file in enumerate(fort_files):
-        t_file = fort_file.with_name(fort_file.name.replace('.q', '.t'))
-        sim_time = step * 300.0  # Default ~5 min
-
-        if t_file.exists():
-            try:
-                with open(t_file, 'r') as f:
-                    sim_time = float(f.readline().split()[0])
-            except:
-                pass
+        sim_time = frame_time(fort_file, step)
 
         print(f"[{step+1:3d}/{len(fort_files)}] t={sim_time/60:6.1f} min ... ", end='')
 
-        grids = read_geoclaw_amr(fort_file)
-
-        if not grids:
-            print("Skipped")
-            continue
-
-        timesteps_collection[sim_time] = []
-
-        step_h, step_b, step_eta, step_vel, step_u, step_v = [], [], [], [], [], []
-        last_dx, last_dy = 0.0, 0.0
-
-        for gidx, grid in enumerate(grids):
-            x = grid["x"]
-            y = grid["y"]
-            z = np.array([0.0, 1.0])
-
-            h = grid["h"]
-            hu = grid["hu"]
-            hv = grid["hv"]
-            eta = grid["eta"]
-            b = grid["b"]
-            last_dx, last_dy = grid["dx"], grid["dy"]
-
-            u = np.zeros_like(h)
-            v = np.zeros_like(h)
-            wet = h > 1.0e-3
-            u[wet] = hu[wet] / h[wet]
-            v[wet] = hv[wet] / h[wet]
-
-            vel_mag = np.sqrt(u**2 + v**2)
-
-            step_h.append(h.flatten())
-            step_b.append(b.flatten())
-            step_eta.append(eta.flatten())
-            step_vel.append(vel_mag.flatten())
-            step_u.append(u.flatten())
-            step_v.append(v.flatten())
-
-            h_3d = np.repeat(h[:, :, np.newaxis], 2, axis=2)
-            eta_3d = np.repeat(eta[:, :, np.newaxis], 2, axis=2)
-            b_3d = np.repeat(b[:, :, np.newaxis], 2, axis=2)
-            u_3d = np.repeat(u[:, :, np.newaxis], 2, axis=2)
-            v_3d = np.repeat(v[:, :, np.newaxis], 2, axis=2)
-            vel_3d = np.repeat(vel_mag[:, :, np.newaxis], 2, axis=2)
-
-            vtr_filename = f"tsunami_step{step:04d}_grid{grid['grid_number']:02d}_level{grid['level']}"
-            vtr_path = os.path.join(vtk_dir, vtr_filename)
-
-            gridToVTK(
-                vtr_path,
-                x, y, z,
-                pointData={
-                    "surface_elevation": eta_3d,
-                    "water_depth": h_3d,
-                    "bathymetry": b_3d,
-                    "velocity_x": u_3d,
-                    "velocity_y": v_3d,
-                    "velocity_magnitude": vel_3d,
+        with tracer.frame(step, time=sim_time):
+            # Headers first (for the coverage), then one patch in memory at a time
+            with tracer.stage("scan", bytes_read=os.path.getsize(fort_file)):
+                headers = list(iter_geoclaw_amr(fort_file, data=False))
+
+            if not headers:
+                print("Skipped")
+                continue
+
+            timesteps_collection[sim_time] = []
+
+            stats = FrameStatistics()
+            derived = DerivedBuffers()
+            last_dx, last_dy = 0.0, 0.0
+
+            for grid in iter_geoclaw_amr(fort_file, tracer=tracer):
+                x = grid["x"]
+                y = grid["y"]
+                z = np.array([0.0, 1.0])
+
+                h = grid["h"]
+                hu = grid["hu"]
+                hv = grid["hv"]
+                eta = grid["eta"]
+                b = grid["b"]
+                last_dx, last_dy = grid["dx"], grid["dy"]
+
+                # u, v, speed, Froude number, momentum flux in one pass, into
+                # buffers shared with the next patches
+                with tracer.stage("derived", cells=h.size):
+                    fields = derived.compute(h, hu, hv)
+                    u, v, vel_mag = fields["u"], fields["v"], fields["speed"]
+
+                # Coastal cells only; their land mask is kept while the
+                # bathymetry is static
+                with tracer.stage("inundation") as rec:
+                    flooded = inundation.add(grid, static=bathymetry.is_static(grid, b))
+                    rec["cells"] = flooded["depth"].size
+
+                with tracer.stage("statistics", cells=h.size):
+                    stats.add(h, b, eta, vel_mag, u, v, fields)
+
+                with tracer.stage("coverage"):
+                    coverage = patch_coverage(grid, headers)
+
+                with tracer.stage("vtk", cells=h.size) as rec:
+                    h_3d = np.repeat(h[:, :, np.newaxis], 2, axis=2)
+                    eta_3d = np.repeat(eta[:, :, np.newaxis], 2, axis=2)
+                    u_3d = np.repeat(u[:, :, np.newaxis], 2, axis=2)
+                    v_3d = np.repeat(v[:, :, np.newaxis], 2, axis=2)
+                    vel_3d = np.repeat(vel_mag[:, :, np.newaxis], 2, axis=2)
+                    cover_3d = np.repeat(coverage[:, :, np.newaxis], 2, axis=2)
+                    covered_3d = (cover_3d < UNCOVERED).astype(np.uint8)
+
+                    vtr_filename = f"tsunami_step{step:04d}_grid{grid['grid_number']:02d}_level{grid['level']}"
+                    vtr_path = os.path.join(vtk_dir, vtr_filename)
+
+                    point_data = {
+                        "surface_elevation": eta_3d,
+                        "water_depth": h_3d,
+                        "bathymetry": np.repeat(b[:, :, np.newaxis], 2, axis=2) if inline_bathymetry else None,
+                        "velocity_x": u_3d,
+                        "velocity_y": v_3d,
+                        "velocity_magnitude": vel_3d,
+                        "amr_covered": covered_3d,
+                        "amr_cover_level": cover_3d,
+                    }
+                    written = gridToVTK(
+                        vtr_path,
+                        x, y, z,
+                        pointData={name: a for name, a in point_data.items() if a is not None}
+                    )
+                    rec["bytes_written"] = os.path.getsize(written)
+
+                patch = {
+                    "file": vtr_filename + ".vtr",
+                    "level": int(grid["level"]),
+                    "bbox": [float(x[0] - 0.5 * grid["dx"]), float(x[-1] + 0.5 * grid["dx"]),
+                             float(y[0] - 0.5 * grid["dy"]), float(y[-1] + 0.5 * grid["dy"])],
+                    "dx": float(grid["dx"]), "dy": float(grid["dy"]),
                 }
-            )
+                timesteps_collection[sim_time].append(patch)
+
+            bathymetry.end_frame()
+            inundation.end_frame(sim_time)
 
-            timesteps_collection[sim_time].append(vtr_filename + ".vtr")
+            with tracer.stage("statistics") as rec:
+                stat_path = stats.write(stats_dir, last_dx, last_dy, step, sim_time)
+                rec["bytes_written"] = os.path.getsize(stat_path)
+            print("Done")
 
-        write_statistics(stats_dir,
-                         np.concatenate(step_h), np.concatenate(step_b),
-                         np.concatenate(step_eta), np.concatenate(step_vel),
-                         np.concatenate(step_u), np.concatenate(step_v),
-                         last_dx, last_dy, step, sim_time)
-        print("Done")
+    with tracer.stage("pvd"):
+        write_pvd(vtk_dir, timesteps_collection)
+        write_index(vtk_dir, timesteps_collection)
 
-    write_pvd(vtk_dir, timesteps_collection)
+    # Max depth, first-wet time and duration of every inundated cell
+    with tracer.stage("inundation") as rec:
+        inundation_path = inundation.write(os.path.join(stats_dir, "inundation.npz"))
+        rec["bytes_written"] = os.path.getsize(inundation_path)
 
-def read_geoclaw_amr(filename):
+def read_geoclaw_amr(filename, tracer=NULL_TRACER, dtype=np.float64, entries=None):
 
-    grids = []
+    # Every patch of the frame (or the indexed entries given) in one AmrFrame
+    # buffer; dtype=np.float32 halves the memory. See iter_geoclaw_amr to
+    # stream the patches instead
+    if entries is None:
+        try:
+            with tracer.stage("scan", bytes_read=os.path.getsize(filename)):
+                entries = index_geoclaw_amr(filename)
+        except Exception as e:
+            print(f"Error reading file")
+            return AmrFrame([], dtype=dtype)
+
+    entries = sorted(entries, key=lambda e: e["offset"])
+    frame = AmrFrame(entries, dtype=dtype)
+    with open(filename, "rb") as f:
+        for k, entry in enumerate(entries):
+            with tracer.stage("parse", bytes_read=entry["end"] - entry["offset"], cells=entry["mx"] * entry["my"]):
+                f.seek(entry["data"])
+                text = f.read(entry["end"] - entry["data"]).decode("ascii")
+                frame.fill(k, _parse_values(text, entry["mx"], entry["my"]))
+
+    return frame
+
+def _patch_header(header):
+
+    # The 8 header lines of a patch (str or bytes)
+    return {"grid_number": int(header[0].split()[0]),
+            "level": int(header[1].split()[0]),
+            "mx": int(header[2].split()[0]),
+            "my": int(header[3].split()[0]),
+            "xlow": float(header[4].split()[0]),
+            "ylow": float(header[5].split()[0]),
+            "dx": float(header[6].split()[0]),
+            "dy": float(header[7].split()[0])}
+
+def _header_grid(header):
+
+    # Header-only patch: the header values and the cell centres
+    mx, my, dx, dy = header["mx"], header["my"], header["dx"], header["dy"]
+    return {"grid_number": header["grid_number"], "level": header["level"],
+            "x": header["xlow"] + (np.arange(mx) + 0.5) * dx,
+            "y": header["ylow"] + (np.arange(my) + 0.5) * dy,
+            "dx": dx, "dy": dy, "mx": mx, "my": my}
+
+def _parse_values(text, mx, my):
+
+    # h, hu, hv, eta of the mx * my data lines of a patch, as (my, mx, 4)
+    values = np.fromstring(text, sep=" ")
+    if values.size == 4 * mx * my:
+        return values.reshape(my, mx, 4)
+
+    # Short or extra columns: first 4 values of each line, lines with fewer
+    # stay zero
+    values = np.zeros((mx * my, 4))
+    rows = [line for line in text.splitlines() if line.strip()]
+    for k, line in enumerate(rows[:mx * my]):
+        fields = line.split()
+        if len(fields) >= 4:
+            values[k] = [float(v) for v in fields[:4]]
+    return values.reshape(my, mx, 4)
+
+def _single_patch(header, text, dtype=np.float64):
+
+    # One patch in its own one-patch AmrFrame
+    frame = AmrFrame([header], dtype=dtype)
+    frame.fill(0, _parse_values(text, header["mx"], header["my"]))
+    return frame[0]
+
+def iter_geoclaw_amr(filename, data=True, tracer=NULL_TRACER, dtype=np.float64):
+
+    # Patches of a fort.q file one at a time (PatchView of a one-patch
+    # AmrFrame), read line by line, so only the current patch is in memory.
+    # data=False yields the headers only (dicts with grid_number, level, x,
+    # y, dx, dy, mx, my) and skips the cell values
     try:
-        with open(filename, "r") as f:
-            lines = f.readlines()
+        f = open(filename, "r")
     except Exception as e:
         print(f"Error reading file")
-        return grids
+        return
 
-    idx = 0
-    while idx < len(lines):
-        while idx < len(lines) and not lines[idx].strip():
-            idx += 1
-        if idx >= len(lines):
-            break
+    with f:
+        while True:
+            with tracer.stage("parse") as rec:
+                try:
+                    header = []
+                    for line in f:
+                        rec["bytes_read"] += len(line)
+                        if line.strip():
+                            header.append(line)
+                            if len(header) == 8:
+                                break
+                    if not header:
+                        break
 
-        try:
-            grid_number = int(lines[idx].split()[0]); idx += 1
-            level = int(lines[idx].split()[0]); idx += 1
-            mx = int(lines[idx].split()[0]); idx += 1
-            my = int(lines[idx].split()[0]); idx += 1
-            xlow = float(lines[idx].split()[0]); idx += 1
-            ylow = float(lines[idx].split()[0]); idx += 1
-            dx = float(lines[idx].split()[0]); idx += 1
-            dy = float(lines[idx].split()[0]); idx += 1
-
-            while idx < len(lines) and not lines[idx].strip():
-                idx += 1
-
-            x = xlow + (np.arange(mx) + 0.5) * dx
-            y = ylow + (np.arange(my) + 0.5) * dy
-
-            h = np.zeros((mx, my))
-            hu = np.zeros((mx, my))
-            hv = np.zeros((mx, my))
-            eta = np.zeros((mx, my))
-
-            for j in range(my):
-                for i in range(mx):
-                    while idx < len(lines) and not lines[idx].strip():
-                        idx += 1
-                    if idx >= len(lines):
+                    header = _patch_header(header)
+                    mx, my = header["mx"], header["my"]
+
+                    # mx * my non-blank lines, x fastest, blank line after each row
+                    rows, count = [], 0
+                    for line in f:
+                        rec["bytes_read"] += len(line)
+                        if line.strip():
+                            if data:
+                                rows.append(line)
+                            count += 1
+                            if count == mx * my:
+                                break
+
+                    if data:
+                        grid = _single_patch(header, "".join(rows), dtype)
+                        rows = None
+                        rec["cells"] = mx * my
+                    else:
+                        grid = _header_grid(header)
+
+                except Exception as e:
+                    print(f"Error processing grid")
+                    break
+
+            yield grid
+
+def frame_time(fort_file, step):
+
+    # Time from fort.tNNNN, step * 300 s (~5 min) if it cannot be read
+    t_file = Path(fort_file).with_name(Path(fort_file).name.replace('.q', '.t'))
+    try:
+        with open(t_file, 'r') as f:
+            return float(f.readline().split()[0])
+    except Exception:
+        return step * 300.0
+
+# ========================================= #
+# Byte-offset patch index                   #
+# ========================================= #
+INDEX_NAME = "fort_index.json"
+INDEX_VERSION = 2
+
+def index_geoclaw_amr(filename):
+
+    # One pass over a fort.q file: header values, bounding box and byte
+    # offsets (header start, data start, end) of every patch
+    patches = []
+    with open(filename, "rb") as f:
+        pos = 0
+        while True:
+            header, start = [], None
+            for line in f:
+                if line.strip():
+                    if start is None:
+                        start = pos
+                    header.append(line)
+                pos += len(line)
+                if len(header) == 8:
+                    break
+            if len(header) < 8:
+                break
+
+            try:
+                entry = _patch_header(header)
+            except (ValueError, IndexError):
+                break
+            mx, my, dx, dy = entry["mx"], entry["my"], entry["dx"], entry["dy"]
+            xlow, ylow = entry["xlow"], entry["ylow"]
+
+            data, count = pos, 0
+            for line in f:
+                pos += len(line)
+                if line.strip():
+                    count += 1
+                    if count == mx * my:
                         break
-                    vals = lines[idx].split()
-                    if len(vals) >= 4:
-                        h[i, j] = float(vals[0])
-                        hu[i, j] = float(vals[1])
-                        hv[i, j] = float(vals[2])
-                        eta[i, j] = float(vals[3])
-                    idx += 1
-
-            b = eta - h
-
-            # Append patch
-            grids.append({
-                "grid_number": grid_number,
-                "level": level,
-                "x": x, "y": y,
-                "h": h, "hu": hu, "hv": hv, "eta": eta, "b": b,
-                "dx": dx, "dy": dy
-            })
 
-        except Exception as e:
-            print(f"Error processing grid")
-            break
-    return grids
+            entry.update({"bbox": [xlow, xlow + mx * dx, ylow, ylow + my * dy],
+                          "offset": start, "data": data, "end": pos})
+            patches.append(entry)
+
+    return patches
+
+def fort_q_files(output_dir):
+    return sorted(f for f in Path(output_dir).glob("fort.q*") if f.name[6:].isdigit())
+
+def load_output_index(output_dir, refresh=False):
+
+    # Index of every frame in <output_dir>/fort_index.json, rebuilt only for
+    # files whose size or modification time changed
+    output_dir = Path(output_dir)
+    path = output_dir / INDEX_NAME
+    cached = {}
+    if path.exists() and not refresh:
+        with open(path) as f:
+            cached = {frame["file"]: frame for frame in json.load(f)}
+
+    frames, changed = [], False
+    for step, fort_file in enumerate(fort_q_files(output_dir)):
+        stat = fort_file.stat()
+        frame = cached.get(fort_file.name)
+        if (frame is None or frame.get("version") != INDEX_VERSION or frame["size"] != stat.st_size
+                or frame["mtime_ns"] != stat.st_mtime_ns):
+            frame = {"file": fort_file.name, "version": INDEX_VERSION, "size": stat.st_size,
+                     "mtime_ns": stat.st_mtime_ns, "time": frame_time(fort_file, step),
+                     "patches": index_geoclaw_amr(fort_file)}
+            changed = True
+        frames.append(frame)
+
+    if changed or len(frames) != len(cached):
+        try:
+            with open(path, "w") as f:
+                json.dump(frames, f)
+        except OSError:
+            pass
 
-if __name__ == "__main__":
-    stats_dir = sys.argv[1] if len(sys.argv) > 1 else "_stats"
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else "_output"
-    vtk_dir = sys.argv[3] if len(sys.argv) > 3 else "_vtk"
+    return frames
 
-    geoclaw_to_vtk(stats_dir, output_dir, vtk_dir)
+def select_patches(patches, bbox=None, levels=None, grid_numbers=None):
+
+    # Index entries intersecting bbox [x0, x1, y0, y1], on the given levels
+    selected = []
+    for p in patches:
+        if levels is not None and p["level"] not in levels:
+            continue
+        if grid_numbers is not None and p["grid_number"] not in grid_numbers:
+            continue
+        if bbox is not None:
+            b = p["bbox"]
+            if b[1] < bbox[0] or b[0] > bbox[1] or b[3] < bbox[2] or b[2] > bbox[3]:
+                continue
+        selected.append(p)
+    return selected
+
+def read_patches(filename, entries, tracer=NULL_TRACER, dtype=np.float64):
+
+    # Seeks straight to each indexed patch and parses only that one, one
+    # patch in memory at a time (read_geoclaw_amr(entries=...) for a frame)
+    with open(filename, "rb") as f:
+        for entry in sorted(entries, key=lambda e: e["offset"]):
+            with tracer.stage("parse", bytes_read=entry["end"] - entry["offset"], cells=entry["mx"] * entry["my"]):
+                f.seek(entry["data"])
+                grid = _single_patch(entry, f.read(entry["end"] - entry["data"]).decode("ascii"), dtype)
+            yield grid
+
+def query_patches(output_dir, bbox=None, levels=None, grid_numbers=None, tracer=NULL_TRACER, dtype=np.float64):
+
+    # (time, patch) for the matching patches of every frame, via the index
+    for frame in load_output_index(output_dir):
+        entries = select_patches(frame["patches"], bbox, levels, grid_numbers)
+        for grid in read_patches(Path(output_dir) / frame["file"], entries, tracer, dtype):
+            yield frame["time"], grid
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert GeoClaw AMR output to VTK")
+    parser.add_argument("stats_dir", nargs="?", default="_stats")
+    parser.add_argument("output_dir", nargs="?", default="_output")
+    parser.add_argument("vtk_dir", nargs="?", default="_vtk")
+    parser.add_argument("--trace", default=None, help="per-frame, per-stage JSON lines (time, bytes, cells, memory)")
+    parser.add_argument("--profile", default=None, help="cProfile output of the whole conversion")
+    parser.add_argument("--no-bathymetry", action="store_true",
+                        help="leave bathymetry out of the .vtr files (b = eta - h; not for the _vtk_states)")
+    args = parser.parse_args()
+
+    tracer = Tracer(args.trace, args.profile) if (args.trace or args.profile) else NULL_TRACER
+    geoclaw_to_vtk(args.stats_dir, args.output_dir, args.vtk_dir, tracer, not args.no_bathymetry)
+    tracer.summary()
+    tracer.close()
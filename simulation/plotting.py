@@ -0,0 +1,507 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2026 Diogo Silva, Frederico Afonso, Tomás Pereira
+
+# ============ Plotting stage (report figures) =========================== #
+# ==== Authors: Diogo Silva, Frederico Afonso, Tomás Pereira ============== #
+# ======================================================================== #
+
+# Every figure of the report lives here so the data scripts
+# (build_sea_topology, parse_NETCDF4, extract_results) never pay for
+# matplotlib, scienceplots, cartopy or cmocean unless plots are requested.
+# They import this module lazily; cartopy and cmocean are only imported by
+# the bathymetry maps.
+
+import time
+from pathlib import Path
+import numpy as np
+import matplotlib.pyplot as plt
+import matplotlib.patches as mpatches
+from matplotlib.colors import LightSource, PowerNorm
+import scienceplots
+
+# ====================================== #
+#  Elsevier plotting configurations      #
+# ====================================== #
+
+width_inch = 190 / 25.4
+height_inch = width_inch * 0.5
+results_height_inch = width_inch * 0.45
+
+# Faults and bathymetry
+report_rc = {
+    "figure.figsize": (width_inch, height_inch),
+    "font.size": 10,
+    "axes.labelsize": 11,
+    "xtick.labelsize": 8,
+    "ytick.labelsize": 8,
+    "legend.fontsize": 10,
+    "savefig.dpi": 600,
+    "figure.autolayout": True
+}
+
+# Marigrams and maximum wave height
+results_rc = {
+    "figure.figsize": (width_inch, results_height_inch),
+    "font.size": 10,
+    "axes.labelsize": 11,
+    "xtick.labelsize": 9,
+    "ytick.labelsize": 9,
+    "legend.fontsize": 8,
+    "savefig.dpi": 600,
+    "figure.autolayout": True,
+    "lines.linewidth": 1.2
+}
+
+# Report figures go under plots/ of the repository, wherever the scripts
+# are run from
+PLOTS_DIR = Path(__file__).resolve().parent.parent / "plots"
+
+def plot_file(subdir, name):
+    path = PLOTS_DIR / subdir
+    path.mkdir(parents=True, exist_ok=True)
+    return path / name
+
+def use_style(rc):
+    plt.rcParams.update(rc)
+    plt.style.use(['science', 'no-latex'])
+
+# ========================================= #
+# All of this pictures are used on the report
+# ========================================= #
+def plotting_topological(fault, dtopo, x, y, fault_name, fault_params):
+
+    use_style(report_rc)
+
+    # 1. Plot - Deformation Contour lines (2D)
+    fig, ax = plt.subplots(figsize=(width_inch, height_inch))
+
+    dz = dtopo.dZ[-1,:,:]
+
+    # Levels
+    v_max = np.max(dz)
+    v_min = np.min(dz)
+    v_limit = max(abs(v_max), abs(v_min))
+    v_limit = np.ceil(v_limit) if v_limit > 0 else 1
+    levels = np.linspace(-v_limit, v_limit, 21)
+
+    im = ax.contourf(x, y, dz, levels=levels, cmap='RdBu_r', extend='both')
+
+    ax.contour(x, y, dz, levels=np.linspace(0.1, v_limit, 10), colors='black', linestyles='dashed',  linewidths=0.4, alpha=0.8)
+
+    ax.contour(x, y, dz, levels=np.linspace(-v_limit, -0.05, 5), colors='blue', linestyles='dashed', linewidths=0.4, alpha=0.8)
+
+    ax.set_facecolor('#fdfdfd')
+
+    cbar = fig.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
+    cbar.set_label('Deformation (m)')
+    cbar.set_ticks([-v_limit, -v_limit/2, 0, v_limit/2, v_limit])
+
+    ax.set_xlabel(r'Longitude ($^\circ$)')
+    ax.set_ylabel(r'Latitude ($^\circ$)')
+
+    ax.grid(True, linestyle=':', alpha=0.4)
+    ax.set_aspect('equal')
+
+    plot_name = "fault_deformation_" + fault_name + ".pdf"
+    plt.savefig(plot_file("fault_deformation", plot_name), bbox_inches='tight')
+    plt.close()
+
+    # 2. Plot the contours on a 3D surface
+    X, Y = np.meshgrid(x, y)
+
+    fig = plt.figure(figsize=(width_inch, height_inch))
+    ax = fig.add_subplot(111, projection='3d')
+
+    levels_pos = np.linspace(0.1, v_limit, 10)
+    levels_neg = np.linspace(-v_limit, -0.05, 5)
+
+    for level in levels_pos:
+        ax.contour(X, Y, dz, levels=[level], colors='red', linewidths=1.5, alpha=0.8)
+
+    for level in levels_neg:
+        ax.contour(X, Y, dz, levels=[level], colors='blue', linewidths=1.5, alpha=0.8)
+
+    ax.contour(X, Y, dz, levels=[0], colors='black', linewidths=2.5)
+    ax.plot_surface(X, Y, np.zeros_like(dz), alpha=0.1, color='gray')
+
+    ax.set_xlabel('Longitude (°)', fontsize = 9)
+    ax.set_ylabel('Latitude (°)', fontsize = 9)
+    ax.set_zlabel('Deformation (m)', fontsize =9)
+    ax.zaxis.label.set_rotation(90)
+    ax.set_box_aspect(None, zoom=0.7)
+    ax.grid(True, linestyle=':', alpha=0.4)
+
+    red_patch = mpatches.Patch(color='red', alpha=0.6,   label='Uplift')
+    blue_patch = mpatches.Patch(color='blue', alpha=0.6, label='Subsidence')
+    black_patch = mpatches.Patch(color='black', alpha=0.6, label='Zero deformation')
+
+    ax.legend(handles=[red_patch, blue_patch, black_patch], loc='upper right', fontsize = 8)
+    ax.view_init(elev=25, azim=135)
+
+    plot_name = "fault_deformation_3D_" + fault_name + ".pdf"
+    plt.savefig(plot_file("fault_deformation", plot_name), bbox_inches='tight')
+    plt.close()
+
+    # 3. Validation plots
+    plotting_validation(dz, x, y, fault_name)
+
+# ========================================= #
+# Validation plots                          #
+# ========================================= #
+def plotting_validation(dz, x, y, fault_name):
+
+    use_style(report_rc)
+
+    # 1. Histogram
+    fig, ax = plt.subplots(figsize=(width_inch, height_inch))
+
+    n, bins, patches_hist = ax.hist(dz.flatten(), bins=50,
+                                      color='blue',
+                                      edgecolor='black',
+                                      linewidth=0.8,
+                                      alpha=0.2)
+
+
+    ax.set_xlabel('Deformation (m)')
+    ax.set_ylabel('Frequency')
+    ax.set_title('Deformation Distribution')
+    ax.grid(True, linestyle=':', alpha=0.3, axis='y')
+
+    plt.savefig(plot_file("validation", f"histogram_{fault_name}.pdf"), bbox_inches='tight')
+    plt.close()
+
+    # 2. E-W Profile
+    fig, ax = plt.subplots(figsize=(width_inch, height_inch))
+
+    mid_lat = dz.shape[0] // 2
+    ax.plot(x, dz[mid_lat, :], 'b-', linewidth=1.5, label='E-W Profile')
+    ax.axhline(0, color='k', linestyle='--', linewidth=0.8, alpha=0.5)
+    ax.fill_between(x, 0, dz[mid_lat, :], where=(dz[mid_lat, :] > 0),
+                     color='red', alpha=0.2, label='Uplift')
+    ax.fill_between(x, 0, dz[mid_lat, :], where=(dz[mid_lat, :] < 0),
+                     color='blue', alpha=0.2, label='Subsidence')
+
+    ax.set_xlabel(r'Longitude ($^\circ$)')
+    ax.set_ylabel('Deformation (m)')
+    ax.set_title('East-West Profile')
+    ax.grid(True, linestyle=':', alpha=0.3)
+    ax.legend(loc='best', framealpha=0.9)
+
+    plt.savefig(plot_file("validation", f"profile_ew_{fault_name}.pdf"), bbox_inches='tight')
+    plt.close()
+
+    # 3. N-S Profile
+    fig, ax = plt.subplots(figsize=(width_inch, height_inch))
+
+    mid_lon = dz.shape[1] // 2
+    ax.plot(y, dz[:, mid_lon], 'r-', linewidth=1.5, label='N-S Profile')
+    ax.axhline(0, color='k', linestyle='--', linewidth=0.8, alpha=0.5)
+    ax.fill_between(y, 0, dz[:, mid_lon], where=(dz[:, mid_lon] > 0),
+                     color='red', alpha=0.2, label='Uplift')
+    ax.fill_between(y, 0, dz[:, mid_lon], where=(dz[:, mid_lon] < 0),
+                     color='blue', alpha=0.2, label='Subsidence')
+
+    ax.set_xlabel(r'Latitude ($^\circ$)')
+    ax.set_ylabel('Deformation (m)')
+    ax.set_title('North-South Profile')
+    ax.grid(True, linestyle=':', alpha=0.3)
+    ax.legend(loc='best', framealpha=0.9)
+
+    plt.savefig(plot_file("validation", f"profile_ns_{fault_name}.pdf"), bbox_inches='tight')
+    plt.close()
+
+# ========================================= #
+# GeoClaw results                           #
+# ========================================= #
+
+gauge_names = {
+    "00001": "Lisbon (Terreiro do Paço)",
+    "00002": "Lisbon (Cascais Harbor)",
+    "00003": "Tagus River (Cacilhas)",
+    "00004": "Offshore",
+    "00005": "Fault (Horsehoe - HSF)",
+    "00006": "Lisbon (Forte do Bugio)"
+}
+
+# Style copied from paper in report
+def marigrams_gauges(output_dir, plots_dir):
+
+    output_path = Path(output_dir)
+    plots_path = Path(plots_dir)
+    plots_path.mkdir(parents=True, exist_ok=True)
+
+    gauge_files = sorted(output_path.glob("gauge*.txt"))
+
+    amr_styles = {
+        1: {'color': '#bdc3c7', 'lw': 0.7, 'alpha': 0.6, 'label': 'L1'},
+        2: {'color': '#7f8c8d', 'lw': 0.8, 'alpha': 0.8, 'label': 'L2'},
+        3: {'color': '#2c3e50', 'lw': 1.0, 'alpha': 0.9, 'label': 'L3'},
+        4: {'color': '#000000', 'lw': 1.2, 'alpha': 1.0, 'label': 'L4'}
+    }
+
+    for gauge_file in gauge_files:
+
+        gid = gauge_file.stem.replace('gauge', '')
+        gname = gauge_names.get(gid, f"Gauge {gid}")
+
+        try:
+            data = np.loadtxt(gauge_file)
+            if data.size == 0: continue
+            levels, times, eta = data[:, 0].astype(int), data[:, 1] / 60.0, data[:, 5]
+        except: continue
+
+        use_style(results_rc)
+        fig, ax = plt.subplots(figsize=(190/25.4, 190/25.4 * 0.3))
+
+        ax.axhline(0, color='black', lw=0.5)
+
+        for level, style in amr_styles.items():
+            mask = (levels == level)
+            if np.any(mask):
+                ax.plot(np.where(mask, times, np.nan),
+                        np.where(mask, eta, np.nan),
+                        color=style['color'],
+                        linewidth=style['lw'],
+                        alpha=style['alpha'],
+                        zorder=level)
+
+        ax.text(0.98, 0.85, f"{gid} - {gname}",
+                transform=ax.transAxes,
+                fontsize=11,
+                fontweight='bold',
+                fontstyle='italic',
+                verticalalignment='top',
+                horizontalalignment='right')
+
+        ax.set_xlabel('Time (min)', fontsize=10)
+        ax.set_ylabel('$\zeta$ (m)', fontsize=10)
+        ax.set_xlim(0, times.max())
+        ax.tick_params(direction='in', top=True, right=True)
+        ax.grid(False)
+
+        plt.savefig(plots_path / f"marigram_{gid}.pdf", bbox_inches='tight', dpi=600)
+        plt.close()
+
+def plotting_maximum_wave_height(lon_fixed, lat_fixed, max_eta_global, plots_dir):
+
+    plots_path = Path(plots_dir)
+    plots_path.mkdir(parents=True, exist_ok=True)
+
+    use_style(results_rc)
+    fig, ax = plt.subplots(figsize=(width_inch, results_height_inch))
+
+    cmap = plt.get_cmap('turbo')
+    cmap.set_under('white', alpha=0)
+
+    norm = PowerNorm(gamma=0.6, vmin=0.1, vmax=7.0)
+
+    im = ax.pcolormesh(lon_fixed, lat_fixed, max_eta_global,
+                       cmap=cmap,
+                       norm=norm,
+                       shading='auto')
+
+    cbar = fig.colorbar(im, ax=ax, extend='max', aspect=20, pad=0.02)
+    cbar.set_label('$\zeta_{max}$ (m)')
+
+    tick_values = [0, 1, 2, 3, 4, 5, 6, 7]
+    cbar.set_ticks(tick_values)
+    cbar.outline.set_linewidth(0.8)
+    for val in tick_values:
+        cbar.ax.axhline(val, color='black', linewidth=0.8)
+
+    ax.set_xlabel('Longitude ($^\circ$)')
+    ax.set_ylabel('Latitude ($^\circ$)')
+    ax.set_aspect('equal')
+
+    plt.savefig(plots_path / "maximum_wave_height_map.pdf", bbox_inches='tight')
+    plt.close()
+
+# ========================================= #
+# Fast rendering helpers                    #
+# ========================================= #
+# A preview can never show more cells than the map axes have pixels, so
+# in fast mode the grid is block-averaged down to the axes' pixel extent at
+# PREVIEW_DPI before shading and contouring.
+
+PREVIEW_DPI = 150
+
+def decimate_grid(lons, lats, elevation, max_nx, max_ny):
+
+    step_x = max(1, int(np.ceil(len(lons) / max_nx)))
+    step_y = max(1, int(np.ceil(len(lats) / max_ny)))
+
+    if step_x == 1 and step_y == 1:
+        return lons, lats, elevation
+
+    nx = len(lons) // step_x
+    ny = len(lats) // step_y
+
+    lons_dec = lons[:nx * step_x].reshape(nx, step_x).mean(axis=1)
+    lats_dec = lats[:ny * step_y].reshape(ny, step_y).mean(axis=1)
+    elv_dec = elevation[:ny * step_y, :nx * step_x].reshape(ny, step_y, nx, step_x).mean(axis=(1, 3))
+
+    return lons_dec, lats_dec, elv_dec
+
+# Land, coastline and border geometries clipped to a map extent, so that
+# several maps over the same region only pay for the shapefile query once
+_basemap_cache = {}
+
+def basemap_geometries(extent, resolution='10m'):
+
+    key = (tuple(round(float(v), 6) for v in extent), resolution)
+
+    if key not in _basemap_cache:
+        import cartopy.feature as cfeature
+
+        land = cfeature.NaturalEarthFeature('physical', 'land', resolution)
+        coast = cfeature.NaturalEarthFeature('physical', 'coastline', resolution)
+        borders = cfeature.NaturalEarthFeature('cultural', 'admin_0_boundary_lines_land', resolution)
+
+        _basemap_cache[key] = {
+            "land": list(land.intersecting_geometries(key[0])),
+            "coast": list(coast.intersecting_geometries(key[0])),
+            "borders": list(borders.intersecting_geometries(key[0])),
+        }
+
+    return _basemap_cache[key]
+
+def axes_pixels(ax, dpi):
+
+    # Pixel size of the axes box at dpi (the map itself may be narrower
+    # once its aspect is applied, so this is an upper bound)
+    bbox = ax.get_window_extent()
+    scale = dpi / ax.figure.dpi
+    return max(1, int(bbox.width * scale)), max(1, int(bbox.height * scale))
+
+def plotting_map_bathymetry(lons, lats, elevation, plot_name, fast=False, dpi=600, preview_dpi=PREVIEW_DPI):
+
+    import cartopy.crs as ccrs
+    import cartopy.feature as cfeature
+    import cmocean
+
+    use_style(report_rc)
+
+    fig = plt.figure(figsize=(width_inch, height_inch))
+    ax = plt.axes(projection=ccrs.PlateCarree())
+
+    if fast:
+        lons, lats, elevation = decimate_grid(lons, lats, elevation, *axes_pixels(ax, preview_dpi))
+        x_grid, y_grid = lons, lats
+    else:
+        x_grid, y_grid = np.meshgrid(lons, lats)
+
+    # From the grid actually drawn (decimation drops the trailing cells)
+    extent = [lons.min(), lons.max(), lats.min(), lats.max()]
+
+    ls = LightSource(azdeg=315, altdeg=45)
+    rgb = ls.shade(
+        elevation,
+        cmap=cmocean.cm.deep,
+        vert_exag=0.5,
+        blend_mode='soft'
+    )
+
+    ax.set_extent(extent, crs=ccrs.PlateCarree())
+
+    ax.imshow(
+        rgb,
+        extent=extent,
+        origin='lower',
+        transform=ccrs.PlateCarree(),
+        zorder=1
+    )
+
+    levels = np.concatenate([
+        np.arange(-6000, -1000, 500),
+        np.arange(-1000, -100, 100),
+        np.arange(-100, 1, 20)
+    ])
+
+    cf = ax.contourf(
+        x_grid, y_grid, elevation,
+        levels=levels,
+        cmap=cmocean.cm.deep,
+        alpha=0.75,
+        transform=ccrs.PlateCarree(),
+        extend='both',
+        zorder=2
+    )
+
+    isobath_levels = [-5000, -4000, -3000, -2000, -1000, -500, -200, -100]
+    cs = ax.contour(
+        x_grid, y_grid, elevation,
+        levels=isobath_levels,
+        colors='black',
+        linewidths=0.5,
+        alpha=0.6,
+        transform=ccrs.PlateCarree(),
+        zorder=3
+    )
+
+    ax.clabel(cs, inline=True, fmt='%d', fontsize=6.5, inline_spacing=3)
+
+    if fast:
+        # Filled contours are stored as an image instead of thousands of PDF paths
+        cf.set_rasterized(True)
+
+        basemap = basemap_geometries(extent)
+        ax.add_geometries(basemap["land"], ccrs.PlateCarree(),
+                          facecolor='#e8e8e8', edgecolor='none', zorder=10)
+        ax.add_geometries(basemap["coast"], ccrs.PlateCarree(),
+                          facecolor='none', edgecolor='black', linewidth=0.7, zorder=11)
+        ax.add_geometries(basemap["borders"], ccrs.PlateCarree(),
+                          facecolor='none', edgecolor='gray', linewidth=0.4, alpha=0.5, zorder=12)
+    else:
+        ax.add_feature(cfeature.LAND, facecolor='#e8e8e8', edgecolor='none', zorder=10)
+        ax.coastlines(resolution='10m', linewidth=0.7, color='black', zorder=11)
+
+        ax.add_feature(cfeature.BORDERS, linewidth=0.4, edgecolor='gray', alpha=0.5, zorder=12)
+
+    gl = ax.gridlines(
+        draw_labels=True,
+        linestyle=':',
+        linewidth=0.5,
+        alpha=0.6,
+        color='gray',
+        zorder=13
+    )
+    gl.top_labels = False
+    gl.right_labels = False
+    gl.xlabel_style = {'size': 8}
+    gl.ylabel_style = {'size': 8}
+
+    cbar = plt.colorbar(
+        cf,
+        ax=ax,
+        pad=0.02,
+        shrink=0.9,
+        aspect=20,
+        format='%d'
+    )
+    cbar.set_label("Elevation (m)", fontsize=10)
+    cbar.ax.tick_params(labelsize=7)
+
+    plt.savefig(plot_file("bathymetry", plot_name), bbox_inches="tight", dpi=dpi)
+    plt.close()
+
+# ========================================= #
+# Timing comparison (full vs fast render)   #
+# ========================================= #
+def compare_rendering_times(lons, lats, elevation, plot_name, repeats=2):
+
+    timings = {}
+    for mode, fast in (("full", False), ("fast", True)):
+        name = plot_name.replace(".pdf", f"_{mode}.pdf")
+        runs = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            plotting_map_bathymetry(lons, lats, elevation, name, fast=fast)
+            runs.append(time.perf_counter() - t0)
+        timings[mode] = runs
+
+    print(f"Rendering times for {plot_name} ({len(lons)}x{len(lats)} cells)")
+    for mode, runs in timings.items():
+        print(f"  {mode:5s} first: {runs[0]:7.2f} s   best: {min(runs):7.2f} s")
+    print(f"  speed-up (best): {min(timings['full']) / min(timings['fast']):.1f}x")
+
+    return timings
@@ -0,0 +1,250 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2026 Diogo Silva, Frederico Afonso, Tomás Pereira
+
+# ============ Parallel driver for the OpenFOAM cases ===================== #
+# ==== Authors: Diogo Silva, Frederico Afonso, Tomás Pereira ============== #
+# ======================================================================== #
+
+# Runs a set of cases concurrently (same steps as each case's Allrun):
+#   blockMesh -> snappyHexMesh -overwrite -> [decomposePar] -> pimpleFoam
+#   -> [reconstructPar]
+# The available cores are shared between the cases in proportion to their
+# cell count, and each case gets numberOfSubdomains = min(its share,
+# cells / --min-cells) written into system/decomposeParDict. Small cases
+# (case_S) run serially. Cases are queued so that no more than --cores
+# processes run at once (with more cases than cores each gets one core and
+# they run a few at a time). Wall time per step and cell updates per second
+# of the solver are appended to openfoam/run_timings.json, failed cases
+# with their error.
+#
+#   python run_cases.py S M L                 # concurrently
+#   python run_cases.py S M L --dry-run       # print the decomposition only
+#   python run_cases.py S_2cyl 3D --cores 16
+
+import argparse
+import json
+import math
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import openfoam_reader as foam
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "openfoam")
+
+# ========================================= #
+# Decomposition                             #
+# ========================================= #
+def estimate_cells(case_dir):
+
+    # Mesh cell count, or the blockMesh count before the mesh exists
+    owner = os.path.join(case_dir, "constant", "polyMesh", "owner")
+    if os.path.exists(owner):
+        cells = foam.read_label_header(owner).get("nCells")
+        if cells:
+            return cells, "mesh"
+
+    with open(os.path.join(case_dir, "system", "blockMeshDict")) as f:
+        blocks = re.findall(r"hex\s*\([\d\s]+\)\s*\((\d+)\s+(\d+)\s+(\d+)\)", f.read())
+
+    return sum(int(a) * int(b) * int(c) for a, b, c in blocks), "blockMeshDict"
+
+def available_cores():
+
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def allocate(cells, cores, min_cells=20000):
+
+    # Cores per case: proportional to cells, at most cells / min_cells, at least 1
+    total = sum(cells)
+    shares = [max(1, int(cores * c / total)) for c in cells]
+    return [max(1, min(share, c // min_cells)) for share, c in zip(shares, cells)]
+
+def split_2d(n):
+
+    # n = a * b with a >= b as close as possible, for simple/hierarchical (a b 1)
+    b = int(math.sqrt(n))
+    while n % b:
+        b -= 1
+    return n // b, b
+
+def write_decomposition(case_dir, n):
+
+    path = os.path.join(case_dir, "system", "decomposeParDict")
+    with open(path) as f:
+        text = f.read()
+
+    a, b = split_2d(n)
+    text = re.sub(r"numberOfSubdomains\s+\d+;", f"numberOfSubdomains {n};", text)
+    text = re.sub(r"\bn\s+\(\s*\d+\s+\d+\s+\d+\s*\);", f"n ({a} {b} 1);", text)
+
+    with open(path, "w") as f:
+        f.write(text)
+
+# ========================================= #
+# Running                                   #
+# ========================================= #
+class CoreBudget:
+
+    # Cores handed out in queue order: a case starts once every case before
+    # it has started and its processes fit in the free cores
+    def __init__(self, cores):
+        self.free = cores
+        self._turn = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def hold(self, ticket, n):
+        with self._cond:
+            self._cond.wait_for(lambda: self._turn == ticket and self.free >= n)
+            self.free -= n
+            self._turn += 1
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.free += n
+                self._cond.notify_all()
+
+def run_step(case_dir, app, args=(), np_=1, log_name=None):
+
+    # One OpenFOAM application with its log in <case>/log.<app>, like Allrun
+    cmd = [app, "-case", case_dir, *args]
+    if np_ > 1:
+        cmd = ["mpirun", "-np", str(np_), *cmd, "-parallel"]
+
+    log_path = os.path.join(case_dir, "log." + (log_name or app))
+    t0 = time.perf_counter()
+    with open(log_path, "w") as log:
+        proc = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT)
+    elapsed = time.perf_counter() - t0
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd)} failed, see {log_path}")
+
+    return elapsed
+
+def solver_steps(case_dir):
+
+    with open(os.path.join(case_dir, "log.pimpleFoam")) as f:
+        return len(re.findall(r"^Time = ", f.read(), flags=re.M))
+
+def prepare_initial(case_dir):
+
+    # Same as Allrun: 0.orig/U and 0.orig/p seed 0/ if missing
+    for field in ("U", "p"):
+        src, dst = os.path.join(case_dir, "0.orig", field), os.path.join(case_dir, "0", field)
+        if os.path.exists(src) and not os.path.exists(dst):
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copy(src, dst)
+
+def run_case(case_dir, n_proc, remesh=False):
+
+    name = os.path.basename(case_dir)
+    record = {"case": name, "subdomains": n_proc, "steps": {}}
+    t_start = time.perf_counter()
+
+    prepare_initial(case_dir)
+
+    if remesh or not os.path.exists(os.path.join(case_dir, "constant", "polyMesh", "owner")):
+        record["steps"]["blockMesh"] = run_step(case_dir, "blockMesh")
+        record["steps"]["snappyHexMesh"] = run_step(case_dir, "snappyHexMesh", ["-overwrite"])
+
+    record["cells"] = estimate_cells(case_dir)[0]
+
+    if n_proc > 1:
+        write_decomposition(case_dir, n_proc)
+        record["steps"]["decomposePar"] = run_step(case_dir, "decomposePar", ["-force"])
+
+    record["steps"]["pimpleFoam"] = run_step(case_dir, "pimpleFoam", np_=n_proc)
+
+    if n_proc > 1:
+        record["steps"]["reconstructPar"] = run_step(case_dir, "reconstructPar")
+
+    open(os.path.join(case_dir, "case.foam"), "a").close()
+
+    record["time_steps"] = solver_steps(case_dir)
+    record["wall_time"] = time.perf_counter() - t_start
+    record["cells_per_second"] = record["cells"] * record["time_steps"] / record["steps"]["pimpleFoam"]
+    record["cells_per_second_per_core"] = record["cells_per_second"] / n_proc
+
+    return record
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Run OpenFOAM cases concurrently with automatic decomposition")
+    parser.add_argument("cases", nargs="+", help="S, M, L, S_2cyl, 3D (or case directory names)")
+    parser.add_argument("--root", default=ROOT)
+    parser.add_argument("--cores", type=int, default=available_cores())
+    parser.add_argument("--min-cells", type=int, default=20000, help="minimum cells per subdomain")
+    parser.add_argument("--remesh", action="store_true", help="run blockMesh/snappyHexMesh even if a mesh exists")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--out", default=None, help="timings file (default <root>/run_timings.json)")
+    args = parser.parse_args(argv)
+
+    case_dirs = []
+    for case in args.cases:
+        name = case if case.startswith("case_") else "case_" + case
+        case_dir = os.path.join(args.root, name)
+        if not os.path.isfile(os.path.join(case_dir, "system", "controlDict")):
+            print(f"OpenFOAM case not found: {case_dir}")
+            return 1
+        case_dirs.append(case_dir)
+
+    estimates = [estimate_cells(c) for c in case_dirs]
+    subdomains = allocate([cells for cells, _ in estimates], args.cores, args.min_cells)
+
+    print(f"{'case':12s} {'cells':>9s} {'from':>14s} {'subdomains':>10s}   ({args.cores} cores)")
+    for case_dir, (cells, source), n in zip(case_dirs, estimates, subdomains):
+        print(f"{os.path.basename(case_dir):12s} {cells:9d} {source:>14s} {n:10d}")
+
+    if args.dry_run:
+        return 0
+
+    if shutil.which("blockMesh") is None:
+        print("OpenFOAM not in PATH. Source your OpenFOAM bashrc first.")
+        return 1
+
+    budget = CoreBudget(args.cores)
+
+    def job(ticket):
+        case_dir, n_proc = case_dirs[ticket], subdomains[ticket]
+        with budget.hold(ticket, n_proc):
+            try:
+                return run_case(case_dir, n_proc, args.remesh)
+            except Exception as e:
+                return {"case": os.path.basename(case_dir), "subdomains": n_proc, "error": str(e)}
+
+    with ThreadPoolExecutor(max_workers=len(case_dirs)) as pool:
+        records = list(pool.map(job, range(len(case_dirs))))
+
+    print(f"{'case':12s} {'cells':>9s} {'procs':>5s} {'steps':>6s} {'wall (s)':>9s} {'cells/s':>10s} {'cells/s/core':>12s}")
+    for r in records:
+        if "error" in r:
+            print(f"{r['case']:12s} failed: {r['error']}")
+            continue
+        print(f"{r['case']:12s} {r['cells']:9d} {r['subdomains']:5d} {r['time_steps']:6d} {r['wall_time']:9.1f} "
+              f"{r['cells_per_second']:10.3g} {r['cells_per_second_per_core']:12.3g}")
+
+    out = args.out or os.path.join(args.root, "run_timings.json")
+    history = []
+    if os.path.exists(out):
+        with open(out) as f:
+            history = json.load(f)
+    history.append({"date": time.strftime("%Y-%m-%d %H:%M:%S"), "cores": args.cores, "runs": records})
+    with open(out, "w") as f:
+        json.dump(history, f, indent=2)
+
+    return 1 if any("error" in r for r in records) else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -10,53 +10,21 @@
 from __future__ import absolute_import
 from __future__ import print_function
 
+import argparse
 import sys
-from clawpack.geoclaw import dtopotools
-import numpy as np
-import matplotlib.pyplot as plt
-import scienceplots
-
-# ================================ #
-# =========== Faults ============= #
-# ================================ #
-
- hsf_fault = {
-    "longitude": -9.91,
-    "latitude": 35.74,
-    "rake": 90,
-    "length": 165000.0,
-    "width": 70000.0,
-    "dip": 35,
-    "slip": 10.7,
-    "strike": 42.1,
-    "depth": 4000.0,
-    "subfaults": [
-        {"slip": 8.5, "offset": -55000.0},
-        {"slip": 10.7, "offset": 0.0},
-        {"slip": 9.2, "offset": 55000.0}
-    ]
- }
-
-mpf_fault = {
-    "longitude": -9.89,
-    "latitude": 36.57,
-    "rake": 90,
-    "length": 129000.0,
-    "width": 70000.0,
-    "dip": 35,
-    "slip": 8.0,
-    "strike": 20.0,
-    "depth": 4000.0,
-    "subfaults": [
-        {"slip": 6.5, "offset": -43000.0},
-        {"slip": 8.0, "offset": 0.0},
-        {"slip": 7.0, "offset": 43000.0}
-    ]
- }
-
-faults = [(hsf_fault, "hsf"), (mpf_fault, "mpf")]
 
+# Faults (hsf_fault, mpf_fault) are defined in fault_model
+from fault_model import load_fault
 
+# Fixed grids, fgmax and fgout, numbered from 1 in this order (read back by
+# extract_results). Points are cell centres of dx cells over the box;
+# name: lon0, lon1, lat0, lat1, dx (deg), min AMR level checked, fgout interval (s)
+FIXED_GRIDS = {
+    "domain":  (-12.00, -6.00, 36.00, 40.00, 0.01,    1, 300.0),
+    "lisbon":  (-9.25,  -9.05, 38.68, 38.76, 1 / 450, 4, 30.0),
+    "cascais": (-9.45,  -9.38, 38.68, 38.73, 1 / 450, 4, 30.0),
+    "tagus":   (-9.32,  -9.10, 38.70, 38.78, 1 / 450, 4, 30.0),
+}
 
 # =========================== #
 #       Set run simulator     #
@@ -266,37 +234,91 @@ def setgeo(rundata, fault_params, fault_name):
 
     rundata.dtopo_data.dt_max_dtopo = 1.0
 
+    # ============================================================================ #
+    # FIXED GRIDS - maxima and outputs at every solver step
+    # ============================================================================ #
+
+    setfixedgrids(rundata)
+
+    return rundata
+
+# ------------------ #
+# Fgmax and fgout -- #
+# ------------------ #
+def setfixedgrids(rundata):
+
+    from clawpack.geoclaw import fgmax_tools, fgout_tools
+
+    tfinal = rundata.clawdata.tfinal
+
+    # Maximum depth and speed (+ their times, arrival time) on every check
+    rundata.fgmax_data.num_fgmax_val = 2
+    rundata.fgmax_data.fgmax_grids = []
+    rundata.fgout_data.fgout_grids = []
+
+    for fgno, (lon0, lon1, lat0, lat1, dx, min_level, interval) in enumerate(FIXED_GRIDS.values(), start=1):
+        nx = int(round((lon1 - lon0) / dx))
+        ny = int(round((lat1 - lat0) / dx))
+
+        fg = fgmax_tools.FGmaxGrid()
+        fg.fgno = fgno
+        fg.point_style = 2
+        fg.x1, fg.x2 = lon0 + 0.5 * dx, lon0 + (nx - 0.5) * dx
+        fg.y1, fg.y2 = lat0 + 0.5 * dx, lat0 + (ny - 0.5) * dx
+        fg.dx = dx
+        fg.tstart_max = 0.0
+        fg.tend_max = 1e10
+        fg.dt_check = 0.0           # every time step
+        fg.min_level_check = min_level
+        fg.arrival_tol = 1.e-2
+        fg.interp_method = 0        # value of the cell holding the point
+        rundata.fgmax_data.fgmax_grids.append(fg)
+
+        # Same points; h, hu, hv, eta in single precision binary
+        fgout = fgout_tools.FGoutGrid()
+        fgout.fgno = fgno
+        fgout.point_style = 2
+        fgout.output_format = 'binary32'
+        fgout.nx, fgout.ny = nx, ny
+        fgout.x1, fgout.x2 = lon0, lon0 + nx * dx
+        fgout.y1, fgout.y2 = lat0, lat0 + ny * dx
+        fgout.tstart = 0.0
+        fgout.tend = tfinal
+        fgout.nout = int(round(tfinal / interval)) + 1
+        fgout.q_out_vars = [1, 2, 3, 4]
+        rundata.fgout_data.fgout_grids.append(fgout)
+
     return rundata
 
 
 # ============================= #
-# Menu - Run simulation         #
+# Command line                  #
 # ============================= #
-# 1. Horshe-Shoe Fault          #
-# reports of magnitude          #
-# 2. MPF - Marques de Pombal    #
+# hsf - Horse-Shoe Fault        #
+# mpf - Marques de Pombal Fault #
+# or a fault .json file         #
 # ============================= #
+# The Clawpack Makefile runs "python setrun.py geoclaw", so the
+# package name is still accepted as an optional first argument.
 
-if __name__ == '__main__':
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Write the GeoClaw .data files for the 1755 simulation")
+    parser.add_argument("claw_pkg", nargs="?", default="geoclaw")
+    parser.add_argument("--fault", default="hsf", help="hsf, mpf or a fault .json file")
+    parser.add_argument("--out-dir", default="", help="directory for the .data files (default: current)")
+    args = parser.parse_args(argv)
 
-    # Menu Header
-    print("============================================\n")
-    print("                                            \n")
-    print("               Run Simulation               \n")
-    print("                                            \n")
-    print("             1. Horse-Shoe Fault            \n")
-    print("             2. Marques de Pombal Fault     \n")
-    print("                                            \n")
-    print("============================================\n")
-
-    # Menu question
     try:
-        user_input = input("Insert topology you want: ")
-        topo = int(user_input)
-    except ValueError:
-        print("Insert a valid number, considering the options available\n")
-
-    if 1 <= topo <= len(faults):
-        fault_params, fault_name = faults[topo - 1]
-        rundata = setrun(fault_params=fault_params, fault_name=fault_name)
-        rundata.write()
+        fault_params, fault_name = load_fault(args.fault)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    rundata = setrun(args.claw_pkg, fault_params=fault_params, fault_name=fault_name)
+    rundata.write(out_dir=args.out_dir)
+
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
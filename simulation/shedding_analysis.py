@@ -0,0 +1,270 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2026 Diogo Silva, Frederico Afonso, Tomás Pereira
+
+# ============ Strouhal number and force coefficients ===================== #
+# ==== Authors: Diogo Silva, Frederico Afonso, Tomás Pereira ============== #
+# ======================================================================== #
+
+# Validation of the vortex shedding without ParaView. In one pass over all
+# time directories (parallel reads through the openfoam_reader cache):
+#   - pressure on every wall patch is gathered as a (time, face) matrix and
+#     integrated against the face area vectors in one product -> forces,
+#     pressure drag and lift coefficients
+#   - velocity is sampled at probe cells in the wake (nearest cell centre)
+# The shedding frequency is taken from the lift coefficient (FFT peak and
+# Welch), giving St = f D / U and Re = U D / nu.
+#
+# Per case, <case>/postProcessing/shedding/ gets coefficients.dat and
+# summary.json, and all cases are collected in one summary table.
+#
+#   python shedding_analysis.py                        # all cases in openfoam/
+#   python shedding_analysis.py --cases case_S --start 10
+
+import argparse
+import json
+import os
+import re
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+import openfoam_reader as foam
+
+CASES = ["case_S", "case_M", "case_L", "case_S_2cyl", "case_3D"]
+
+# Probes behind the cylinder, in diameters from its centre
+PROBES = [(2.0, 0.0), (4.0, 0.0), (6.0, 0.0), (2.0, 0.5)]
+
+# ========================================= #
+# Case geometry and parameters              #
+# ========================================= #
+def wall_patches(case_dir, points, offsets, indices, owner):
+
+    # Area vectors (out of the fluid, into the body) and owner cells of the
+    # faces of each wall patch, with the body diameter, span and centre
+    _, area = foam.face_geometry(points, offsets, indices)
+    patches = {}
+
+    for name, patch in foam.read_boundary(case_dir).items():
+        if patch["type"] != "wall":
+            continue
+
+        faces = slice(patch["startFace"], patch["startFace"] + patch["nFaces"])
+        labels = np.unique(indices[offsets[faces.start]:offsets[faces.stop]])
+        lo, hi = points[labels].min(axis=0), points[labels].max(axis=0)
+
+        patches[name] = {
+            "area": area[faces], "cells": owner[faces],
+            "diameter": float(hi[1] - lo[1]), "span": float(hi[2] - lo[2]),
+            "centre": 0.5 * (lo + hi),
+        }
+
+    return patches
+
+def flow_parameters(case_dir):
+
+    # Inlet velocity from 0/U and kinematic viscosity from transportProperties
+    U_inf = 1.0
+    U0 = os.path.join(case_dir, "0", "U")
+    if os.path.exists(U0):
+        for entries in foam.read_field(U0)["boundary"].values():
+            value = entries.get("value")
+            if entries.get("type") == "fixedValue" and isinstance(value, dict) and value.get("uniform"):
+                speed = float(np.linalg.norm(np.atleast_1d(value["value"])))
+                if speed > 0:
+                    U_inf = speed
+                    break
+
+    nu = None
+    transport = os.path.join(case_dir, "constant", "transportProperties")
+    if os.path.exists(transport):
+        with open(transport) as f:
+            m = re.search(r"\nnu\s+(?:\[[^\]]*\]\s*)?([-+.\deE]+)\s*;", f.read())
+        if m:
+            nu = float(m.group(1))
+
+    return U_inf, nu
+
+def probe_cells(centres, probes):
+
+    # Nearest cell centre to each probe point
+    return np.array([int(np.argmin(np.sum((centres - p) ** 2, axis=1))) for p in probes])
+
+# ========================================= #
+# Time series                               #
+# ========================================= #
+def time_series(case_dir, patches, probes, workers=4):
+
+    # One parallel pass: wall pressure (time, face) per patch and probe velocities
+    index = [e for e in foam.time_index(case_dir) if e["time"] > 0 and "p" in e["fields"] and "U" in e["fields"]]
+    wall_cells = {name: patch["cells"] for name, patch in patches.items()}
+
+    def read(entry):
+        p = foam.load_field(case_dir, entry["name"], "p")
+        U = foam.load_field(case_dir, entry["name"], "U")
+        # Walls are zeroGradient for p, so the face value is the owner cell value
+        return {name: p[cells] for name, cells in wall_cells.items()}, U[probes]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        samples = list(pool.map(read, index))
+
+    times = np.array([e["time"] for e in index])
+    pressure = {name: np.array([s[0][name] for s in samples]) for name in patches}
+    velocity = np.array([s[1] for s in samples])
+
+    return times, pressure, velocity
+
+def force_coefficients(pressure, patches, U_inf):
+
+    # F = sum_f p_f S_f for all times at once (kinematic pressure, rho = 1)
+    coefficients = {}
+    for name, patch in patches.items():
+        force = pressure[name] @ patch["area"]
+        reference = 0.5 * U_inf**2 * patch["diameter"] * patch["span"]
+        coefficients[name] = {"Cd": force[:, 0] / reference, "Cl": force[:, 1] / reference}
+
+    return coefficients
+
+# ========================================= #
+# Spectra                                   #
+# ========================================= #
+def dominant_frequency(times, signal, start=None, padding=4):
+
+    # Resampled on the mean time step (adjustTimeStep), mean removed.
+    # FFT peak refined by a parabola through the three highest bins, and the
+    # peak of the Welch estimate as a cross-check
+    from scipy.signal import welch
+
+    keep = times >= (start if start is not None else times[0])
+    t, x = times[keep], signal[keep]
+    if len(t) < 8:
+        return {"fft": float("nan"), "welch": float("nan"), "dt": float("nan"), "samples": len(t)}
+
+    dt = float(np.mean(np.diff(t)))
+    uniform = t[0] + dt * np.arange(len(t))
+    x = np.interp(uniform, t, x)
+    x = (x - x.mean()) * np.hanning(len(x))
+
+    n = padding * len(x)
+    spectrum = np.abs(np.fft.rfft(x, n))
+    frequencies = np.fft.rfftfreq(n, dt)
+
+    k = int(np.argmax(spectrum[1:])) + 1
+    shift = 0.0
+    if 0 < k < len(spectrum) - 1:
+        a, b, c = np.log(spectrum[k - 1:k + 2] + 1e-300)
+        shift = 0.5 * (a - c) / (a - 2 * b + c)
+    f_fft = (k + shift) * frequencies[1]
+
+    f_w, power = welch(np.interp(uniform, t, signal[keep]), fs=1.0 / dt, nperseg=max(8, len(t) // 2))
+    f_welch = float(f_w[int(np.argmax(power[1:])) + 1])
+
+    return {"fft": float(f_fft), "welch": f_welch, "dt": dt, "samples": int(len(t))}
+
+# ========================================= #
+# Per case                                  #
+# ========================================= #
+def analyse_case(case_dir, start=None, probes=PROBES, workers=4, write=True):
+
+    t0 = time.perf_counter()
+
+    points = foam.read_points(case_dir)
+    offsets, indices = foam.read_faces(case_dir)
+    owner = foam.read_labels(case_dir, "owner")
+    patches = wall_patches(case_dir, points, offsets, indices, owner)
+    if not patches:
+        raise ValueError(f"No wall patch in {case_dir}")
+
+    U_inf, nu = flow_parameters(case_dir)
+    main = next(iter(patches.values()))
+    D = main["diameter"]
+
+    probe_points = np.array([main["centre"] + [dx * D, dy * D, 0.0] for dx, dy in probes])
+    cells = probe_cells(foam.cell_centres(case_dir), probe_points)
+    t_mesh = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    times, pressure, velocity = time_series(case_dir, patches, cells, workers)
+    coefficients = force_coefficients(pressure, patches, U_inf)
+    t_series = time.perf_counter() - t0
+
+    # By default the first half of the run is treated as start-up transient
+    if start is None:
+        start = times[0] + 0.5 * (times[-1] - times[0])
+    steady = times >= start
+
+    summary = {"case": os.path.basename(os.path.normpath(case_dir)), "snapshots": int(len(times)),
+               "start": float(start), "U_inf": U_inf, "nu": nu, "diameter": D,
+               "Re": U_inf * D / nu if nu else None, "patches": {}, "probes": [],
+               "timings": {"mesh": t_mesh, "series": t_series}}
+
+    for name, coeff in coefficients.items():
+        f = dominant_frequency(times, coeff["Cl"], start)
+        d = patches[name]["diameter"]
+        summary["patches"][name] = {
+            "diameter": d, "frequency_fft": f["fft"], "frequency_welch": f["welch"],
+            "St": f["fft"] * d / U_inf, "St_welch": f["welch"] * d / U_inf,
+            "Cd_mean": float(coeff["Cd"][steady].mean()),
+            "Cl_rms": float(np.sqrt(np.mean((coeff["Cl"][steady] - coeff["Cl"][steady].mean()) ** 2))),
+            "Cl_amplitude": float(0.5 * (coeff["Cl"][steady].max() - coeff["Cl"][steady].min())),
+        }
+
+    for point, cell, series in zip(probe_points, cells, np.moveaxis(velocity, 1, 0)):
+        f = dominant_frequency(times, series[:, 1], start)
+        summary["probes"].append({"point": point.tolist(), "cell": int(cell),
+                                  "frequency_fft": f["fft"], "St": f["fft"] * D / U_inf})
+
+    primary = summary["patches"][next(iter(patches))]
+    summary["St"] = primary["St"]
+    summary["frequency"] = primary["frequency_fft"]
+
+    if write:
+        out_dir = os.path.join(case_dir, "postProcessing", "shedding")
+        os.makedirs(out_dir, exist_ok=True)
+
+        columns = ["time"] + [f"{c}_{name}" for name in coefficients for c in ("Cd", "Cl")]
+        data = np.column_stack([times] + [coefficients[name][c] for name in coefficients for c in ("Cd", "Cl")])
+        np.savetxt(os.path.join(out_dir, "coefficients.dat"), data, fmt="%.8g", header=" ".join(columns))
+
+        with open(os.path.join(out_dir, "summary.json"), "w") as f:
+            json.dump(summary, f, indent=2)
+
+    return summary
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Strouhal number and force coefficients of the cylinder cases")
+    parser.add_argument("--root", default="openfoam", help="directory holding the cases")
+    parser.add_argument("--cases", nargs="+", default=CASES)
+    parser.add_argument("--start", type=float, default=None, help="discard times before this (default: first half)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--out", default=None, help="combined summary (default <root>/shedding_summary.json)")
+    args = parser.parse_args(argv)
+
+    summaries = []
+    for case in args.cases:
+        case_dir = os.path.join(args.root, case)
+        if not os.path.isdir(os.path.join(case_dir, "constant", "polyMesh")):
+            print(f"{case}: no mesh, skipped")
+            continue
+        summaries.append(analyse_case(case_dir, args.start, PROBES, args.workers))
+
+    if not summaries:
+        return 1
+
+    print(f"{'case':12s} {'snaps':>5s} {'Re':>7s} {'f (Hz)':>8s} {'f Welch':>8s} {'St':>6s} {'Cd_p':>6s} {'Cl rms':>7s} {'time (s)':>8s}")
+    for s in summaries:
+        p = s["patches"][next(iter(s["patches"]))]
+        elapsed = sum(s["timings"].values())
+        re_number = f"{s['Re']:7.1f}" if s["Re"] else f"{'-':>7s}"
+        print(f"{s['case']:12s} {s['snapshots']:5d} {re_number} {p['frequency_fft']:8.4f} {p['frequency_welch']:8.4f} "
+              f"{p['St']:6.3f} {p['Cd_mean']:6.3f} {p['Cl_rms']:7.4f} {elapsed:8.2f}")
+
+    out = args.out or os.path.join(args.root, "shedding_summary.json")
+    with open(out, "w") as f:
+        json.dump(summaries, f, indent=2)
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,178 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2026 Diogo Silva, Frederico Afonso, Tomás Pereira
+
+# ============ Synthetic GeoClaw AMR output =============================== #
+# ==== Authors: Diogo Silva, Frederico Afonso, Tomás Pereira ============== #
+# ======================================================================== #
+
+# Writes fort.qNNNN / fort.tNNNN frames and gauge files in the GeoClaw ascii
+# format (the one setrun.py asks for), so the post-processing can be timed
+# without a full run. Same domain as setrun.py, a shelf and coastline
+# around Lisbon and a circular wave leaving the Horseshoe fault. Level 1
+# covers the domain; every finer level has a number of non-overlapping
+# patches nested in the level above, aligned with its cells, refined by the
+# given ratios (setrun.py uses 3 3 2) and gathered around Lisbon like the
+# setrun.py regions.
+#
+#   python synthetic_frames.py _synthetic --mx 150 --my 100 --ratios 3 3 2 --patches 4 4 3 --frames 5
+
+import argparse
+import numpy as np
+from pathlib import Path
+
+LOWER = (-12.0, 36.0)
+UPPER = (-6.0, 40.0)
+SOURCE = (-10.5, 36.2)
+LISBON = (-9.2, 38.7)
+GRAVITY = 9.81
+METERS_PER_DEGREE = 111320.0
+
+# Gauges of setrun.py
+GAUGES = {1: (-9.133, 38.708), 2: (-9.420, 38.697), 3: (-9.155, 38.685),
+          4: (-10.000, 37.500), 5: (-10.500, 36.000), 6: (-9.31, 38.65)}
+
+# ========================================= #
+# Fields                                    #
+# ========================================= #
+def bathymetry(x, y):
+
+    # Coast near -9.3 (wavy), 4 km deep ocean and a shelf ~1.5 deg wide
+    coast = -9.3 + 0.25 * np.sin(2.0 * (y - 38.0))
+    offshore = np.clip((coast - x) / 1.5, 0.0, 1.0)
+    return np.where(x > coast, 20.0 + 300.0 * (x - coast), -10.0 - 4000.0 * offshore**0.7)
+
+def solution(x, y, t):
+
+    # Ring wave travelling at the deep-water speed from the source
+    b = bathymetry(x, y)
+    r = np.hypot(x - SOURCE[0], y - SOURCE[1])
+    front = np.sqrt(GRAVITY * 4000.0) * t / METERS_PER_DEGREE
+    wave = 3.0 / np.sqrt(1.0 + r) * np.exp(-((r - front) / 0.15) ** 2) * np.cos(8.0 * (r - front))
+
+    h = np.maximum(wave - b, 0.0)
+    eta = np.where(h > 0.0, wave, b)
+    speed = np.where(h > 1e-3, wave * np.sqrt(GRAVITY / np.maximum(h, 1e-3)), 0.0)
+    r = np.maximum(r, 1e-9)
+    hu = h * speed * (x - SOURCE[0]) / r
+    hv = h * speed * (y - SOURCE[1]) / r
+    return h, hu, hv, eta
+
+# ========================================= #
+# AMR layout                                #
+# ========================================= #
+def patch_layout(mx, my, ratios, patches, patch_cells, seed=0):
+
+    # (level, xlow, ylow, mx, my, dx, dy) for every patch, coarse to fine
+    rng = np.random.default_rng(seed)
+    dx, dy = (UPPER[0] - LOWER[0]) / mx, (UPPER[1] - LOWER[1]) / my
+    layout = [(1, LOWER[0], LOWER[1], mx, my, dx, dy)]
+
+    for level, (ratio, count) in enumerate(zip(ratios, patches), start=2):
+        parents = [p for p in layout if p[0] == level - 1]
+        dx, dy = dx / ratio, dy / ratio
+        placed = []
+
+        for _ in range(50 * count):
+            if len(placed) == count:
+                break
+            _, px, py, pmx, pmy, pdx, pdy = parents[rng.integers(len(parents))]
+            # Size and offset in parent cells, so patch edges fall on parent edges
+            cx = min(pmx, max(1, int(rng.integers(patch_cells // 2, patch_cells + 1)) // ratio))
+            cy = min(pmy, max(1, int(rng.integers(patch_cells // 2, patch_cells + 1)) // ratio))
+            # Centred near Lisbon, spread over a few patch sizes
+            i0 = int(np.clip((LISBON[0] - px) / pdx - cx / 2 + rng.normal(0.0, 1.5 * cx), 0, pmx - cx))
+            j0 = int(np.clip((LISBON[1] - py) / pdy - cy / 2 + rng.normal(0.0, 1.5 * cy), 0, pmy - cy))
+            box = (px + i0 * pdx, py + j0 * pdy, cx * ratio, cy * ratio)
+
+            x0, y0 = box[0], box[1]
+            x1, y1 = x0 + box[2] * dx, y0 + box[3] * dy
+            if any(x0 < q[1] + q[3] * dx - 1e-12 and q[1] < x1 - 1e-12 and
+                   y0 < q[2] + q[4] * dy - 1e-12 and q[2] < y1 - 1e-12 for q in placed):
+                continue
+            placed.append((level, x0, y0, box[2], box[3], dx, dy))
+
+        layout += placed
+
+    return layout
+
+# ========================================= #
+# Writing                                   #
+# ========================================= #
+def write_frame(output_dir, frame, t, layout):
+
+    cells = 0
+    with open(output_dir / f"fort.q{frame:04d}", "w") as f:
+        for number, (level, xlow, ylow, mx, my, dx, dy) in enumerate(layout, start=1):
+            f.write(f"{number:6d}                 grid_number\n{level:6d}                 AMR_level\n"
+                    f"{mx:6d}                 mx\n{my:6d}                 my\n"
+                    f"{xlow:26.16E}    xlow\n{ylow:26.16E}    ylow\n"
+                    f"{dx:26.16E}    dx\n{dy:26.16E}    dy\n\n")
+
+            x = xlow + (np.arange(mx) + 0.5) * dx
+            y = ylow + (np.arange(my) + 0.5) * dy
+            X, Y = np.meshgrid(x, y)
+            q = np.stack(solution(X, Y, t), axis=-1)
+            # x fastest, one blank line after each row of constant y
+            for j in range(my):
+                np.savetxt(f, q[j], fmt="%26.16E")
+                f.write("\n")
+            cells += mx * my
+
+    with open(output_dir / f"fort.t{frame:04d}", "w") as f:
+        f.write(f"{t:26.16E}    time\n{4:6d}                 meqn\n{len(layout):6d}                 ngrids\n"
+                f"{3:6d}                 naux\n{2:6d}                 ndim\n{2:6d}                 nghost\n"
+                f"{'ascii':>6s}                 format\n")
+
+    return cells
+
+def write_gauges(output_dir, layout, times):
+
+    # level, time, h, hu, hv, eta at the finest level holding each gauge
+    for gauge, (x, y) in GAUGES.items():
+        level = max(p[0] for p in layout
+                    if p[1] <= x < p[1] + p[3] * p[5] and p[2] <= y < p[2] + p[4] * p[6])
+        rows = [(level, t, *np.ravel(solution(np.array(x), np.array(y), t))) for t in times]
+        with open(output_dir / f"gauge{gauge:05d}.txt", "w") as f:
+            f.write(f"# gauge_id= {gauge:5d} location=( {x:17.10E} {y:17.10E} ) num_var=  4\n")
+            f.write("# level, time, q[  1  2  3], eta, aux[]\n")
+            np.savetxt(f, rows, fmt=["%02d"] + ["%17.10E"] * 5)
+
+def write_frames(output_dir, frames=5, mx=150, my=100, ratios=(3, 3, 2), patches=(4, 4, 3),
+                 patch_cells=60, tfinal=3600.0, gauge_samples=200, seed=0):
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    layout = patch_layout(mx, my, ratios, patches, patch_cells, seed)
+    times = np.linspace(0.0, tfinal, frames)
+    cells = sum(write_frame(output_dir, frame, t, layout) for frame, t in enumerate(times))
+    write_gauges(output_dir, layout, np.linspace(0.0, tfinal, gauge_samples))
+
+    return {"frames": frames, "patches": len(layout), "cells": cells,
+            "levels": 1 + len(ratios), "cells_per_frame": cells // max(frames, 1)}
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Write synthetic GeoClaw AMR frames and gauges")
+    parser.add_argument("output_dir", nargs="?", default="_synthetic")
+    parser.add_argument("--frames", type=int, default=5)
+    parser.add_argument("--mx", type=int, default=150, help="level 1 cells in x")
+    parser.add_argument("--my", type=int, default=100, help="level 1 cells in y")
+    parser.add_argument("--ratios", type=int, nargs="+", default=[3, 3, 2], help="refinement ratio per level")
+    parser.add_argument("--patches", type=int, nargs="+", default=[4, 4, 3], help="patches per refined level")
+    parser.add_argument("--patch-cells", type=int, default=60, help="largest patch side, in its own cells")
+    parser.add_argument("--tfinal", type=float, default=3600.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if len(args.patches) != len(args.ratios):
+        parser.error("--patches needs one count per refinement ratio")
+
+    info = write_frames(args.output_dir, args.frames, args.mx, args.my, args.ratios, args.patches,
+                        args.patch_cells, args.tfinal, seed=args.seed)
+    print(f"{info['frames']} frames, {info['patches']} patches on {info['levels']} levels, "
+          f"{info['cells_per_frame']} cells per frame -> {args.output_dir}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,149 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2026 Diogo Silva, Frederico Afonso, Tomás Pereira
+
+# ============ Per-stage timing and memory of the post-processing ========= #
+# ==== Authors: Diogo Silva, Frederico Afonso, Tomás Pereira ============== #
+# ======================================================================== #
+
+# A Tracer collects, per frame and per stage (read, parse, derived, vtk,
+# statistics, interpolation, ...), the wall time, bytes read and written,
+# cells processed and the resident memory. Stages entered several times in
+# one frame (e.g. once per patch) are summed into one record, written as a
+# JSON line when the frame ends. summary() prints the totals per stage.
+# An opt-in cProfile run covers everything between start() and close().
+#
+#   tracer = Tracer("trace.jsonl", profile="run.prof")
+#   with tracer.frame(step, time=t):
+#       with tracer.stage("read", bytes_read=size) as rec:
+#           ...
+#           rec["cells"] += n
+#   tracer.close()
+
+import json
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+COUNTERS = ("cells", "bytes_read", "bytes_written")
+
+def rss_mb():
+
+    # Current resident memory (Linux), None elsewhere
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+    except (OSError, ValueError, IndexError):
+        return None
+
+def peak_rss_mb():
+
+    # Process high-water mark (ru_maxrss is kB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+class Tracer:
+    def __init__(self, path=None, profile=None, enabled=True):
+
+        self.enabled = enabled
+        self.path = path
+        self.profile = profile
+        self.context = {}
+        self.totals = {}
+        self._pending = {}
+        self._out = open(path, "w") if (enabled and path) else None
+        self._profiler = None
+        self._t0 = time.perf_counter()
+
+        if enabled and profile:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    @contextmanager
+    def frame(self, step, **info):
+
+        # Records of the stages run inside belong to this frame
+        previous = self.context
+        self.context = {"frame": step, **info}
+        try:
+            yield
+        finally:
+            self.flush()
+            self.context = previous
+
+    @contextmanager
+    def stage(self, name, **counters):
+
+        # The yielded dict takes the counters known only inside the stage
+        record = {key: 0 for key in COUNTERS}
+        record.update(counters)
+        if not self.enabled:
+            yield record
+            return
+
+        t0 = time.perf_counter()
+        try:
+            yield record
+        finally:
+            elapsed = time.perf_counter() - t0
+            key = (self.context.get("frame"), name)
+            entry = self._pending.setdefault(key, {"stage": name, **self.context, "seconds": 0.0, "calls": 0,
+                                                   **{c: 0 for c in COUNTERS}})
+            entry["seconds"] += elapsed
+            entry["calls"] += 1
+            for c in COUNTERS:
+                entry[c] += record.get(c, 0)
+            entry["rss_mb"] = rss_mb()
+            entry["peak_rss_mb"] = peak_rss_mb()
+
+            total = self.totals.setdefault(name, {"seconds": 0.0, "calls": 0, **{c: 0 for c in COUNTERS},
+                                                  "peak_rss_mb": 0.0})
+            total["seconds"] += elapsed
+            total["calls"] += 1
+            for c in COUNTERS:
+                total[c] += record.get(c, 0)
+            total["peak_rss_mb"] = max(total["peak_rss_mb"], entry["peak_rss_mb"])
+
+            # Stages outside a frame are written right away
+            if "frame" not in self.context:
+                self.flush()
+
+    def flush(self):
+
+        if self._out:
+            for entry in self._pending.values():
+                self._out.write(json.dumps(entry) + "\n")
+            self._out.flush()
+        self._pending = {}
+
+    def summary(self, file=None):
+
+        if not self.enabled or not self.totals:
+            return
+        file = file or sys.stdout
+        wall = time.perf_counter() - self._t0
+        print(f"{'stage':14s} {'calls':>6s} {'time (s)':>9s} {'%':>6s} {'cells':>11s} {'Mcells/s':>9s} "
+              f"{'MB read':>8s} {'MB written':>10s} {'peak MB':>8s}", file=file)
+        for name, t in sorted(self.totals.items(), key=lambda item: -item[1]["seconds"]):
+            rate = t["cells"] / t["seconds"] / 1e6 if t["cells"] and t["seconds"] > 0 else 0.0
+            print(f"{name:14s} {t['calls']:6d} {t['seconds']:9.3f} {100 * t['seconds'] / wall:6.1f} {t['cells']:11d} "
+                  f"{rate:9.3f} {t['bytes_read'] / 2**20:8.1f} {t['bytes_written'] / 2**20:10.1f} "
+                  f"{t['peak_rss_mb']:8.1f}", file=file)
+        print(f"{'wall':14s} {'':6s} {wall:9.3f}", file=file)
+
+    def close(self, top=20):
+
+        self.flush()
+        if self._profiler is not None:
+            import pstats
+            self._profiler.disable()
+            self._profiler.dump_stats(self.profile)
+            pstats.Stats(self._profiler).sort_stats("cumulative").print_stats(top)
+            self._profiler = None
+        if self._out:
+            self._out.close()
+            self._out = None
+
+# Default for functions called without a tracer: stages cost one dict
+NULL_TRACER = Tracer(enabled=False)
@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
+import json
 import os
 import sys
+import time
 
 try:
     from paraview.simple import (
         _DisableFirstRenderCameraReset,
+        GetParaViewVersion,
         Calculator,
+        Clip,
         ColorBy,
         Contour,
         GetActiveViewOrCreate,
@@ -30,33 +34,111 @@ except Exception as exc:
     raise SystemExit(f"ParaView Python not available: {exc}")
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: pvpython visualization/make_state.py /path/to/case.foam [output.pvsm] [screenshot.png]")
-        return 1
+CAMERA_FOCUS = [3.5, 0.0, 0.0]
+CAMERA_SCALE = 0.65
+STREAM_SEEDS = ([-0.4, -0.2, 0.0], [-0.4, 0.2, 0.0])
 
-    case_path = os.path.abspath(sys.argv[1])
-    if not os.path.exists(case_path):
-        raise SystemExit(f"Case file not found: {case_path}")
+# Cache of resolved Calculator expressions, shared with simulation/openfoam_reader.py
+CACHE_DIR = ".foam_cache"
 
-    default_state = os.path.join(os.path.dirname(__file__), "vortex_shedding.pvsm")
-    state_path = os.path.abspath(sys.argv[2]) if len(sys.argv) > 2 else default_state
-    screenshot_path = os.path.abspath(sys.argv[3]) if len(sys.argv) > 3 else None
 
+def region_of_interest(view_size, margin=0.1):
+    # Visible window of the parallel camera, extended upstream to the stream seeds
+    half_height = CAMERA_SCALE + margin
+    half_width = CAMERA_SCALE * view_size[0] / view_size[1] + margin
+    return [
+        min(STREAM_SEEDS[0][0], CAMERA_FOCUS[0] - half_width) - margin,
+        CAMERA_FOCUS[0] + half_width,
+        CAMERA_FOCUS[1] - half_height,
+        CAMERA_FOCUS[1] + half_height,
+    ]
+
+
+def _expression_cache(case_path):
+    return os.path.join(os.path.dirname(case_path), CACHE_DIR, "paraview.json")
+
+
+def cached_expression(case_path):
+    # The vorticity array name depends on the reader and ParaView version
+    path = _expression_cache(case_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f).get(str(GetParaViewVersion()), {}).get("vortZ")
+
+
+def store_expression(case_path, expr):
+    path = _expression_cache(case_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            data = json.load(f)
+    data.setdefault(str(GetParaViewVersion()), {})["vortZ"] = expr
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def filter_timings(pipeline, t=None):
+    # Each filter updated after its inputs, so the time is the filter's own work
+    timings = []
+    for name, proxy in pipeline["filters"]:
+        t0 = time.perf_counter()
+        if t is None:
+            proxy.UpdatePipeline()
+        else:
+            proxy.UpdatePipeline(t)
+        timings.append((name, time.perf_counter() - t0))
+    t0 = time.perf_counter()
+    Render(pipeline["view"])
+    timings.append(("render", time.perf_counter() - t0))
+    return timings
+
+
+def print_timings(timings):
+    total = sum(dt for _, dt in timings)
+    for name, dt in timings:
+        print(f"  {name:16s} {dt * 1000:9.1f} ms  {100 * dt / total:5.1f} %")
+    print(f"  {'total':16s} {total * 1000:9.1f} ms")
+
+
+def build_pipeline(case_path, view_size=(1600, 900), lean=False, roi=None):
+    # lean: only the arrays that are drawn (vorticity, and U for the stream
+    # tracer), no point data from the reader, the resolved vorticity
+    # expression cached per case, and a crinkle clip to the region of
+    # interest before the cell -> point conversion
     _DisableFirstRenderCameraReset()
 
     reader = OpenFOAMReader(FileName=case_path)
     reader.MeshRegions = ["internalMesh"]
-    reader.CellArrays = ["U", "p", "vorticity"]
+    reader.CellArrays = ["U", "vorticity"] if lean else ["U", "p", "vorticity"]
+    if lean and hasattr(reader, "Createcelltopointfiltereddata"):
+        reader.Createcelltopointfiltereddata = 0
     reader.UpdatePipeline()
 
     slice_plane = Slice(Input=reader)
     slice_plane.SliceType = "Plane"
     slice_plane.SliceType.Origin = [3.5, 0.0, 0.0]
     slice_plane.SliceType.Normal = [0.0, 0.0, 1.0]
+    filters = [("reader", reader), ("slice", slice_plane)]
+
+    point_input = slice_plane
+    if lean:
+        x0, x1, y0, y1 = roi or region_of_interest(view_size)
+        clip = Clip(Input=slice_plane)
+        clip.ClipType = "Box"
+        if hasattr(clip.ClipType, "UseReferenceBounds"):
+            clip.ClipType.UseReferenceBounds = 0
+        clip.ClipType.Position = [x0, y0, -1.0]
+        clip.ClipType.Length = [x1 - x0, y1 - y0, 2.0]
+        clip.Invert = 1
+        clip.Crinkleclip = 1
+        filters.append(("clip", clip))
+        point_input = clip
 
-    cell_to_point = CellDatatoPointData(Input=slice_plane)
+    cell_to_point = CellDatatoPointData(Input=point_input)
     cell_to_point.PassCellData = 1
+    filters.append(("cell_to_point", cell_to_point))
 
     vort_calc = Calculator(Input=cell_to_point)
     vort_calc.ResultArrayName = "vortZ"
@@ -76,9 +158,16 @@ def main():
             return False
         return _has_array(vort_calc, "vortZ")
 
-    if not _set_calc("vorticity_Z"):
-        if not _set_calc("vorticity[2]"):
-            _set_calc("mag(vorticity)")
+    expr = cached_expression(case_path) if lean else None
+    if expr:
+        vort_calc.Function = expr
+    else:
+        for expr in ("vorticity_Z", "vorticity[2]", "mag(vorticity)"):
+            if _set_calc(expr):
+                break
+        if lean:
+            store_expression(case_path, expr)
+    filters.append(("calculator", vort_calc))
 
     contour = Contour(Input=vort_calc)
     contour.ContourBy = ["POINTS", "vortZ"]
@@ -86,8 +175,8 @@ def main():
 
     stream = StreamTracer(Input=cell_to_point, SeedType="Line")
     stream.Vectors = ["POINTS", "U"]
-    stream.SeedType.Point1 = [-0.4, -0.2, 0.0]
-    stream.SeedType.Point2 = [-0.4, 0.2, 0.0]
+    stream.SeedType.Point1 = STREAM_SEEDS[0]
+    stream.SeedType.Point2 = STREAM_SEEDS[1]
     stream.SeedType.Resolution = 30
     stream.MaximumStreamlineLength = 10.0
     stream.IntegrationDirection = "FORWARD"
@@ -95,11 +184,12 @@ def main():
     tube = Tube(Input=stream)
     tube.Radius = 0.003
     tube.NumberofSides = 10
+    filters += [("contour", contour), ("stream_tracer", stream), ("tube", tube)]
 
     time_annot = AnnotateTimeFilter(Input=vort_calc) if AnnotateTimeFilter else None
 
     view = GetActiveViewOrCreate("RenderView")
-    view.ViewSize = [1600, 900]
+    view.ViewSize = list(view_size)
     view.Background = [0.06, 0.07, 0.09]
     if hasattr(view, "BackgroundColorMode"):
         view.BackgroundColorMode = "Gradient"
@@ -139,10 +229,48 @@ def main():
 
     ResetCamera(view)
     view.CameraParallelProjection = 1
-    view.CameraPosition = [3.5, 0.0, 4.0]
-    view.CameraFocalPoint = [3.5, 0.0, 0.0]
+    view.CameraPosition = [CAMERA_FOCUS[0], CAMERA_FOCUS[1], 4.0]
+    view.CameraFocalPoint = CAMERA_FOCUS
     view.CameraViewUp = [0.0, 1.0, 0.0]
-    view.CameraParallelScale = 0.65
+    view.CameraParallelScale = CAMERA_SCALE
+
+    return {
+        "reader": reader,
+        "view": view,
+        "vort_calc": vort_calc,
+        "vort_lut": vort_lut,
+        "contour": contour,
+        "tube": tube,
+        "filters": filters,
+    }
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    flags = {a for a in sys.argv[1:] if a.startswith("--")}
+
+    if len(args) < 1:
+        print("Usage: pvpython visualization/make_state.py /path/to/case.foam [output.pvsm] [screenshot.png] "
+              "[--lean] [--timings]")
+        return 1
+
+    case_path = os.path.abspath(args[0])
+    if not os.path.exists(case_path):
+        raise SystemExit(f"Case file not found: {case_path}")
+
+    default_state = os.path.join(os.path.dirname(__file__), "vortex_shedding.pvsm")
+    state_path = os.path.abspath(args[1]) if len(args) > 1 else default_state
+    screenshot_path = os.path.abspath(args[2]) if len(args) > 2 else None
+
+    pipeline = build_pipeline(case_path, lean="--lean" in flags)
+    view = pipeline["view"]
+
+    if "--timings" in flags:
+        # Second time step: the first one was already loaded while building
+        times = list(pipeline["reader"].TimestepValues or [])
+        t = times[1] if len(times) > 1 else None
+        print("Per-filter execution time" + (f" (t = {t})" if t is not None else "") + ":")
+        print_timings(filter_timings(pipeline, t))
 
     Render()
     SaveState(state_path)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# Batch rendering of every time step of every case with the make_state pipeline.
+#
+# Launcher (plain python, pvpython or pvbatch): lists the time directories of
+# each case, splits each case's time range into contiguous chunks and starts
+# one pvbatch process per chunk. Workers build the pipeline once per case and
+# only change the view time between frames, writing
+# <out>/<case>/frame_<index>.png with the global time index, so chunks can be
+# rendered in any order and assembled afterwards (e.g. ffmpeg -i frame_%05d.png).
+#
+#   python visualization/render_frames.py simulation/openfoam/case_S simulation/openfoam/case_M --workers 8
+#   pvbatch visualization/render_frames.py simulation/openfoam/case_S --workers 1 --every 2
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+NUMBER = re.compile(r"^-?\d+(\.\d*)?([eE][-+]?\d+)?$")
+
+
+def case_times(case_dir, skip_zero=True):
+    # Same time list as the OpenFOAMReader (which skips 0 by default)
+    times = []
+    for name in os.listdir(case_dir):
+        if NUMBER.match(name) and os.path.isdir(os.path.join(case_dir, name)):
+            value = float(name)
+            if value > 0 or not skip_zero:
+                times.append(value)
+    return sorted(times)
+
+
+def foam_file(case_dir):
+    path = os.path.join(case_dir, "case.foam")
+    if not os.path.exists(path):
+        open(path, "a").close()
+    return os.path.abspath(path)
+
+
+def split_range(n, parts):
+    # Contiguous [start, stop) chunks of almost equal size
+    parts = max(1, min(parts, n))
+    bounds = [round(i * n / parts) for i in range(parts + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(parts) if bounds[i] < bounds[i + 1]]
+
+
+def render_worker(case_dir, out_dir, start, stop, every, size, lean=False):
+    # Runs inside pvbatch: one pipeline, only the time changes between frames
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from make_state import build_pipeline
+    from paraview.simple import SaveScreenshot
+
+    pipeline = build_pipeline(foam_file(case_dir), view_size=size, lean=lean)
+    reader, view = pipeline["reader"], pipeline["view"]
+    times = list(reader.TimestepValues) if reader.TimestepValues else case_times(case_dir)
+
+    os.makedirs(out_dir, exist_ok=True)
+    t0 = time.perf_counter()
+    count = 0
+
+    for index in range(start, min(stop, len(times)), every):
+        view.ViewTime = times[index]
+        SaveScreenshot(os.path.join(out_dir, f"frame_{index:05d}.png"), view, ImageResolution=list(size))
+        count += 1
+
+    elapsed = time.perf_counter() - t0
+    print(f"{os.path.basename(case_dir)} [{start}, {stop}): {count} frames in {elapsed:.1f} s "
+          f"({1000 * elapsed / max(count, 1):.0f} ms/frame)")
+    return count
+
+
+def launch(args):
+    jobs = []
+    for case_dir in args.cases:
+        n = len(case_times(case_dir))
+        if n == 0:
+            print(f"No time directories in {case_dir}, skipped")
+            continue
+        out_dir = os.path.join(args.out, os.path.basename(os.path.normpath(case_dir)))
+        jobs += [(case_dir, out_dir, start, stop) for start, stop in split_range(n, args.workers)]
+
+    # The case count times the workers would oversubscribe the machine, so the
+    # chunks are queued and at most --workers pvbatch processes run at once
+    procs, t0 = [], time.perf_counter()
+    for case_dir, out_dir, start, stop in jobs:
+        while sum(p.poll() is None for p in procs) >= args.workers:
+            time.sleep(0.2)
+
+        # Starts align with the stride so the frame numbering stays global
+        start += (-start) % args.every
+        cmd = [args.pvbatch, os.path.abspath(__file__), case_dir, "--worker",
+               "--out", args.out, "--start", str(start), "--stop", str(stop),
+               "--every", str(args.every), "--size", str(args.size[0]), str(args.size[1])]
+        if args.lean:
+            cmd.append("--lean")
+        procs.append(subprocess.Popen(cmd))
+
+    failed = sum(p.wait() != 0 for p in procs)
+    print(f"Rendered {len(jobs)} chunks in {time.perf_counter() - t0:.1f} s")
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render every time step of OpenFOAM cases with pvbatch")
+    parser.add_argument("cases", nargs="+", help="case directories")
+    parser.add_argument("--out", default="results/frames")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--every", type=int, default=1, help="render every n-th time step")
+    parser.add_argument("--size", type=int, nargs=2, default=[1600, 900])
+    parser.add_argument("--pvbatch", default="pvbatch")
+    parser.add_argument("--lean", action="store_true", help="make_state lean pipeline (ROI clip, fewer arrays)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--start", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--stop", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    for case_dir in args.cases:
+        if not os.path.isdir(case_dir):
+            raise SystemExit(f"Case directory not found: {case_dir}")
+
+    if args.worker or args.workers == 1:
+        for case_dir in args.cases:
+            out_dir = os.path.join(args.out, os.path.basename(os.path.normpath(case_dir)))
+            stop = args.stop if args.stop is not None else len(case_times(case_dir))
+            render_worker(case_dir, out_dir, args.start, stop, args.every, args.size, args.lean)
+        return 0
+
+    return launch(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())